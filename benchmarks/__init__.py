@@ -0,0 +1 @@
+"""Benchmarks for the OraculumX backend, run against local stand-in servers."""
@@ -0,0 +1,75 @@
+"""Per-event cost and memory of the streaming anomaly detector.
+
+Usage: python -m benchmarks.bench_anomaly [--events 200000] [--keys 100000]
+
+Feeds a synthetic mix of session reruns, balance checks, transfers and payments
+from --keys distinct keys, and checks that memory stays flat once the per-key LRU
+is full and that the injected bursts and spikes are the only anomalies.
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from golden_minni.anomaly import Event, StreamDetector
+
+LIMITS = {"session_request": 120, "balance_check": 120, "transfer": 20, "payment": 10}
+
+
+def synthetic_events(count, keys, rate, rng):
+    """(Event, injected) pairs at `rate` events per second of simulated time."""
+    now = 0.0
+    for i in range(count):
+        now += rng.expovariate(rate)
+        roll = rng.random()
+        if i % 50_000 == 25_000: # One transfer 20,000x the usual size
+            yield Event("transfer", "0xspike", 1000.0, now), True
+        elif roll < 0.5:
+            yield Event("session_request", f"s{rng.randrange(keys)}", None, now), False
+        elif roll < 0.8:
+            yield Event("balance_check", f"s{rng.randrange(keys)}", None, now), False
+        elif roll < 0.99:
+            yield Event("transfer", f"0x{rng.randrange(keys):040x}", rng.lognormvariate(-3, 0.5), now), False
+        else:
+            yield Event("payment", f"0x{rng.randrange(keys):040x}", rng.lognormvariate(-5, 0.3), now), False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--keys", type=int, default=100_000, help="Distinct sessions and addresses in the stream")
+    parser.add_argument("--rate", type=float, default=200.0, help="Simulated events per second")
+    parser.add_argument("--max-keys", type=int, default=10_000, help="Per-key LRU size of the detector")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    events = list(synthetic_events(args.events, args.keys, args.rate, rng))
+    detector = StreamDetector(limits=LIMITS, max_keys=args.max_keys, history=10_000)
+
+    tracemalloc.start()
+    checkpoints = []
+    for i, (event, _) in enumerate(events):
+        detector.observe(event.kind, event.key, event.value, event.timestamp)
+        if (i + 1) % (args.events // 4) == 0:
+            checkpoints.append(tracemalloc.get_traced_memory()[0])
+    tracemalloc.stop()
+
+    # Timed again without tracemalloc, which slows allocation-heavy code down
+    detector = StreamDetector(limits=LIMITS, max_keys=args.max_keys, history=10_000)
+    started = time.perf_counter()
+    for _ in detector.scan(event for event, _ in events):
+        pass
+    seconds = time.perf_counter() - started
+
+    injected = sum(1 for _, spike in events if spike)
+    flagged = [a for a in detector.recent if a.key == "0xspike"]
+    print(f"{args.events} events from {args.keys} keys: {1e6 * seconds / args.events:.2f} us per event "
+          f"({args.events / seconds:,.0f} events/s)")
+    print("traced memory at 25/50/75/100%: " + " / ".join(f"{m / 2**20:.1f}" for m in checkpoints) + " MiB")
+    print(f"anomalies: {detector.anomalies} total, {len(flagged)} of {injected} injected spikes flagged")
+    for kind, stats in detector.stats().items():
+        print(f"  {kind:<16} events {stats['events']:>8}  anomalies {stats['anomalies']:>4}  p99 value {stats['value_p99']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""Headless rerun latency, memory and upstream traffic of the whole app, per tab and under N sessions.
+
+The script is driven through Streamlit's AppTest against the stub Etherscan and JSON-RPC
+server, so results are reproducible and need no network. Every tab has a scripted
+interaction (a plain rerun on the Dashboard, a payer lookup on Access & Payment, a tracked
+transaction and a pipeline run on Backend Operations) that is repeated --reruns times.
+
+Single session: p50/p99 rerun latency and upstream requests per rerun for each tab, plus
+the peak and retained Python memory of one session (tracemalloc), and the part of it that
+is Golden Minni state: allocations by the golden_minni package and the app script still
+alive after --memory-sessions sessions, per session.
+Multi session (--sessions 1 8 32): that many users, each in its own thread, keep issuing
+reruns, and the table shows where throughput and tail latency stop scaling. AppTest keeps
+its runtime in process globals, so the runs themselves take turns; a user's latency
+includes the wait for its turn, much like script threads of one server process
+contending for the GIL.
+
+Usage: python -m benchmarks.bench_app [--latency 0.02] [--failure-rate 0.05] [--reruns 20] [--sessions 1 8 32] [--memory-sessions 8]
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+
+from benchmarks.bench_startup import APP_PATH, rss_mb
+from benchmarks.stubs import StubServer
+
+ETH_ADDR = "0x5036dbcEEfae0a7429e64467222e1E259819c7C7"
+PAYER = "0x00000000000000000000000000000000000000aa"
+TABS = ("Dashboard", "Access & Payment", "Golden Minni Backend Operations")
+PACKAGE_DIR = os.path.join(os.path.dirname(APP_PATH), "golden_minni")
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile; good enough for latency tables."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+def seed_chain(server, blocks=50):
+    server.chain.set_balance(ETH_ADDR, 2 * 10**15)
+    for number in range(blocks):
+        payment = {"hash": "0x%064x" % number, "from": PAYER, "to": ETH_ADDR, "value": hex(2 * 10**15)}
+        server.chain.add_block([payment] if number == 5 else [])
+
+
+def configure_app(server, args):
+    """Points the app at the stub server; background pollers run rarely so reruns can be attributed."""
+    os.environ.update(
+        ETHERSCAN_API_URL=server.etherscan_url,
+        SEPOLIA_RPC_URL=server.url,
+        PAYMENTS_DB_PATH=os.path.join(tempfile.mkdtemp(prefix="bench-app-"), "payments.db"),
+        INDEXER_START_BLOCK="1",
+        INDEXER_POLL_INTERVAL=str(args.background_interval),
+        BALANCE_POLL_INTERVAL=str(args.background_interval),
+        HTTP_BACKOFF="0.05",
+    )
+
+
+RUN_LOCK = threading.Lock() # AppTest swaps process-wide runtime state on every run
+
+
+def interact(app, tab, i):
+    """One scripted rerun on `tab`; `i` varies the input so every rerun does real work."""
+    with RUN_LOCK:
+        _interact(app, tab, i)
+
+
+def _interact(app, tab, i):
+    app.session_state["active_tab"] = tab
+    if tab == "Access & Payment":
+        app.text_input(key="payer_address").input(PAYER if i % 2 == 0 else "0x%040x" % (i + 1))
+    elif tab == "Golden Minni Backend Operations":
+        if i % 2 == 0:
+            app.text_input(key="tracked_tx_hash").input("0x%064x" % (10**6 + i))
+        else:
+            next(button for button in app.button if button.label == "Run Full Evaluation Pipeline").click()
+    app.run()
+    if app.exception:
+        raise RuntimeError(f"rerun on {tab!r} failed: {app.exception[0].value}")
+
+
+def share_script_cache():
+    """Makes every AppTest run reuse one compiled script, as sessions of a real server do.
+
+    AppTest otherwise compiles the script again on every run, which would be counted
+    as rerun latency.
+    """
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import local_script_runner
+
+    shared = ScriptCache()
+    local_script_runner.ScriptCache = lambda: shared
+
+
+def new_session(timeout):
+    from streamlit.testing.v1 import AppTest
+
+    with RUN_LOCK:
+        return AppTest.from_file(APP_PATH, default_timeout=timeout).run()
+
+
+def single_session(server, args):
+    started = time.perf_counter()
+    app = new_session(args.timeout)
+    print(f"first render {1000 * (time.perf_counter() - started):.1f} ms (cold process)\n")
+
+    print(f"{'tab':<34}{'reruns':>7}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'req/rerun':>11}  upstream calls")
+    for tab in TABS:
+        latencies = []
+        server.reset_counters()
+        for i in range(args.reruns):
+            started = time.perf_counter()
+            interact(app, tab, i)
+            latencies.append(1000 * (time.perf_counter() - started))
+        counters = server.counters()
+        calls = ", ".join(f"{method} {count}" for method, count in counters["rpc_calls"].most_common()) or "-"
+        if counters["failures"]:
+            calls += f" ({counters['failures']} failed)"
+        print(f"{tab:<34}{len(latencies):>7}{percentile(latencies, 50):>9.1f}{percentile(latencies, 99):>9.1f}"
+              f"{max(latencies):>9.1f}{counters['http_requests'] / len(latencies):>11.2f}  {calls}")
+
+    # Memory of a fresh session: tracemalloc slows everything down, so it gets its own pass
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    app = new_session(args.timeout)
+    for i, tab in enumerate(TABS):
+        interact(app, tab, i)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"\nper session: peak {(peak - baseline) / 2**20:.2f} MiB while rendering, "
+          f"{(current - baseline) / 2**20:.2f} MiB retained after one rerun per tab")
+
+    # Golden Minni state a session keeps alive, averaged over several sessions
+    apps = []
+    tracemalloc.start()
+    gc.collect()
+    before = tracemalloc.take_snapshot()
+    for _ in range(args.memory_sessions):
+        app = new_session(args.timeout)
+        for i, tab in enumerate(TABS):
+            interact(app, tab, i)
+        apps.append(app)
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    ours = [tracemalloc.Filter(True, os.path.join(PACKAGE_DIR, "*")), tracemalloc.Filter(True, APP_PATH)]
+    kept = sum(stat.size_diff for stat in after.filter_traces(ours).compare_to(before.filter_traces(ours), "filename"))
+    print(f"Golden Minni state: {kept / len(apps) / 1024:.1f} KiB per session ({len(apps)} sessions)")
+
+
+def multi_session(server, args, sessions):
+    latencies = defaultdict(list)
+    errors = []
+    lock = threading.Lock()
+    apps = []
+    ready = threading.Barrier(sessions + 1)
+
+    def user(index):
+        try:
+            app = new_session(args.timeout)
+            with lock:
+                apps.append(app)
+        except Exception as e:
+            with lock:
+                errors.append(e)
+            ready.wait()
+            return
+        ready.wait() # Every session exists before the timed reruns start
+        for i in range(args.reruns):
+            tab = TABS[(index + i) % len(TABS)]
+            started = time.perf_counter()
+            try:
+                interact(app, tab, i)
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+                continue
+            with lock:
+                latencies[tab].append(1000 * (time.perf_counter() - started))
+
+    rss_before = rss_mb()
+    users = [threading.Thread(target=user, args=(index,), daemon=True) for index in range(sessions)]
+    for thread in users:
+        thread.start()
+    ready.wait()
+    rss_loaded = rss_mb()
+    server.reset_counters()
+    started = time.perf_counter()
+    for thread in users:
+        thread.join()
+    wall = time.perf_counter() - started
+    samples = [latency for tab in TABS for latency in latencies[tab]]
+    counters = server.counters()
+    by_tab = "  ".join(f"{tab.split()[0]} {percentile(latencies[tab], 99):.0f}" for tab in TABS if latencies[tab])
+    print(f"{sessions:>8}{len(samples):>8}{wall:>8.2f}{len(samples) / wall:>10.1f}{percentile(samples, 50):>9.1f}"
+          f"{percentile(samples, 99):>9.1f}{counters['http_requests']:>7}{counters['failures']:>6}"
+          f"{(rss_loaded - rss_before) / sessions:>11.2f}{len(errors):>7}  {by_tab}")
+    return apps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds added to every stub response")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of stub responses failed with HTTP 503")
+    parser.add_argument("--reruns", type=int, default=20, help="Reruns per tab (single session) or per user (multi session)")
+    parser.add_argument("--sessions", type=int, nargs="*", default=[], help="Concurrent user counts to simulate after the single-session run")
+    parser.add_argument("--memory-sessions", type=int, default=8, help="Sessions the Golden Minni state is averaged over")
+    parser.add_argument("--background-interval", type=float, default=300.0, help="Indexer and balance poller interval in seconds")
+    parser.add_argument("--timeout", type=float, default=60.0, help="AppTest timeout per rerun")
+    args = parser.parse_args()
+
+    server = StubServer(latency=args.latency, failure_rate=args.failure_rate).start()
+    seed_chain(server)
+    configure_app(server, args)
+    share_script_cache()
+    print(f"stub latency {1000 * args.latency:.0f} ms, failure rate {args.failure_rate:.0%}, python {sys.version.split()[0]}")
+    single_session(server, args)
+
+    if args.sessions:
+        print("\nconcurrent sessions (p99 in ms per tab at the end; RSS growth per session in MB)")
+        print(f"{'sessions':>8}{'reruns':>8}{'wall s':>8}{'reruns/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'req':>7}{'fail':>6}{'MB/sess':>11}{'errors':>7}")
+        for sessions in args.sessions:
+            multi_session(server, args, sessions) # Its sessions are released before the next, larger round
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Per-address vs batched balance and receipt lookups against the stub server.
+
+Usage: python -m benchmarks.bench_batch_balances [--latency 0.005] [--sizes 10 100 500]
+"""
+import argparse
+import time
+
+from benchmarks.stubs import StubServer
+from golden_minni.balances import (
+    fetch_balances_wei,
+    fetch_eth_balance_from_etherscan,
+    fetch_eth_balances_from_etherscan,
+)
+from golden_minni.net import HttpPool, JsonRpcClient
+from golden_minni.receipts import fetch_transaction_receipts
+
+
+def measure(server, func):
+    server.reset_counters()
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start, server.http_requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.005, help="Seconds added to every stub response")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500])
+    args = parser.parse_args()
+
+    with StubServer(latency=args.latency) as server:
+        http = HttpPool()
+        rpc = JsonRpcClient(http, server.url)
+        print(f"{'mode':<34}{'N':>6}{'seconds':>10}{'requests':>10}")
+        for size in args.sizes:
+            addresses = ["0x%040x" % i for i in range(1, size + 1)]
+            tx_hashes = ["0x%064x" % i for i in range(1, size + 1)]
+            for address in addresses:
+                server.chain.set_balance(address, 10**15)
+            for tx_hash in tx_hashes:
+                server.chain.receipts[tx_hash] = {"transactionHash": tx_hash, "status": "0x1"}
+            modes = [
+                ("rpc eth_getBalance per address", lambda: [rpc.call("eth_getBalance", [a, "latest"]) for a in addresses]),
+                ("rpc eth_getBalance batched", lambda: fetch_balances_wei(rpc, addresses)),
+                ("etherscan balance per address", lambda: [fetch_eth_balance_from_etherscan(http, a, "key", server.etherscan_url) for a in addresses]),
+                ("etherscan balancemulti", lambda: fetch_eth_balances_from_etherscan(http, addresses, "key", server.etherscan_url)),
+                ("rpc receipts per hash", lambda: [rpc.call("eth_getTransactionReceipt", [h]) for h in tx_hashes]),
+                ("rpc receipts batched", lambda: fetch_transaction_receipts(rpc, tx_hashes)),
+            ]
+            for name, func in modes:
+                seconds, requests_made = measure(server, func)
+                print(f"{name:<34}{size:>6}{seconds:>10.3f}{requests_made:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Premium gate cost: a SQLite payment-total lookup per check vs the shared entitlement cache.
+
+Usage: python -m benchmarks.bench_entitlements [--payers 10000] [--checks 200000] [--threads 8]
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from golden_minni.entitlements import EntitlementStore
+from golden_minni.payments import PaymentStore
+
+MIN_WEI = 10**15
+
+
+def seed(store, payers, rng):
+    for block, start in enumerate(range(0, len(payers), 500)):
+        store.record_block(block, [
+            {"tx_hash": "0x%064x" % i, "sender": payers[i], "receiver": "0x" + "0" * 40, "value_wei": rng.choice([10**14, 2 * 10**15])}
+            for i in range(start, min(start + 500, len(payers)))
+        ])
+
+
+def run_threads(check, lookups, threads):
+    """Checks/s with `threads` callers splitting `lookups`."""
+    share = len(lookups) // threads
+
+    def worker(part):
+        for payer in part:
+            check(payer)
+
+    callers = [threading.Thread(target=worker, args=(lookups[i * share:(i + 1) * share],)) for i in range(threads)]
+    started = time.perf_counter()
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+    return share * threads / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--payers", type=int, default=10_000)
+    parser.add_argument("--checks", type=int, default=200_000)
+    parser.add_argument("--threads", type=int, default=8, help="Concurrent callers, like Streamlit script threads")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    path = os.path.join(tempfile.mkdtemp(prefix="bench-entitlements-"), "payments.db")
+    payments = PaymentStore(path)
+    payers = ["0x%040x" % (i + 1) for i in range(args.payers)]
+    seed(payments, payers, rng)
+    # Sessions recheck the same few payers on every rerun, so lookups are skewed
+    lookups = [payers[min(int(rng.paretovariate(1.2)) - 1, args.payers - 1)] for _ in range(args.checks)]
+    entitlements = EntitlementStore(path, payments, MIN_WEI)
+
+    modes = [
+        ("sqlite total per check", lambda payer: payments.total_paid_wei(payer) >= MIN_WEI),
+        ("entitlement cache", entitlements.is_premium),
+    ]
+    print(f"{'mode':<26}{'threads':>8}{'checks/s':>12}{'us/check':>10}")
+    for name, check in modes:
+        for threads in (1, args.threads):
+            rate = run_threads(check, lookups, threads)
+            print(f"{name:<26}{threads:>8}{rate:>12,.0f}{1e6 / rate:>10.2f}")
+    print(f"cache: {entitlements.stats()}")
+
+    # Invalidation: a payment from a cached non-premium payer is visible on the very next check
+    payer = next(p for p in payers if not entitlements.is_premium(p))
+    payment = {"tx_hash": "0x" + "f" * 64, "sender": payer, "receiver": "0x" + "0" * 40, "value_wei": MIN_WEI}
+    payments.record_block(10**6, [payment])
+    started = time.perf_counter()
+    entitlements.record_payments([payment])
+    visible = entitlements.is_premium(payer)
+    print(f"new payment applied and visible in {1000 * (time.perf_counter() - started):.2f} ms: premium={visible}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Tail latency of balance reads: one RPC provider vs hedged reads across several with different delay profiles.
+
+Usage: python -m benchmarks.bench_hedging [--reads 300] [--hedge-after 0.05]
+
+Three stub providers serve the same chain:
+  jittery  10ms, but --slow-rate of requests take 300ms
+  steady   40ms every time
+  flaky    20ms, fails --failure-rate of requests with HTTP 503
+
+1. Tail: --reads sequential eth_getBalance calls through each provider alone and
+   through the hedged client; p50/p99 and the extra requests hedging cost.
+2. Ranking: the jittery provider turns slow for good; the ranking must move it down.
+3. Agreement: a fourth provider reports a different balance; a 2-of-n read with
+   honest majority agrees, one honest against one lying provider does not.
+"""
+import argparse
+import time
+
+from benchmarks.stubs import StubChain, StubServer
+from golden_minni.net import HttpPool, JsonRpcClient
+from golden_minni.providers import HedgedRpcClient, Provider
+
+ADDRESS = "0x5036dbcEEfae0a7429e64467222e1E259819c7C7"
+WEI = 2 * 10**15
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def measure(rpc, reads):
+    latencies, errors = [], 0
+    for _ in range(reads):
+        started = time.perf_counter()
+        try:
+            assert int(rpc.call("eth_getBalance", [ADDRESS, "latest"]), 16) == WEI
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - started)
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reads", type=int, default=300)
+    parser.add_argument("--hedge-after", type=float, default=0.05, help="Seconds before a read is also sent to the next provider")
+    parser.add_argument("--slow-rate", type=float, default=0.1)
+    parser.add_argument("--failure-rate", type=float, default=0.2)
+    args = parser.parse_args()
+
+    chain = StubChain()
+    chain.set_balance(ADDRESS, WEI)
+    liar_chain = StubChain()
+    liar_chain.set_balance(ADDRESS, WEI + 1)
+    stubs = {
+        "jittery": StubServer(chain, latency=0.01, slow_rate=args.slow_rate, slow_latency=0.3, seed=1),
+        "steady": StubServer(chain, latency=0.04),
+        "flaky": StubServer(chain, latency=0.02, failure_rate=args.failure_rate, seed=2),
+        "liar": StubServer(liar_chain, latency=0.01),
+    }
+    for stub in stubs.values():
+        stub.start()
+    try:
+        pool = HttpPool(pool_size=32, retries=0)
+        clients = {name: JsonRpcClient(pool, stub.url) for name, stub in stubs.items()}
+        honest = ("jittery", "steady", "flaky")
+        hedged = HedgedRpcClient([Provider(name, clients[name]) for name in honest], hedge_after=args.hedge_after)
+
+        print(f"{str(args.reads) + ' reads':<22}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'errors':>8}{'requests':>10}")
+        for name, rpc in [(name, clients[name]) for name in honest] + [("hedged", hedged)]:
+            for stub in stubs.values():
+                stub.reset_counters()
+            latencies, errors = measure(rpc, args.reads)
+            requests = sum(stubs[stub].counters()["http_requests"] for stub in honest)
+            print(f"{name:<22}{1000 * percentile(latencies, 0.5):>9.1f}{1000 * percentile(latencies, 0.99):>9.1f}"
+                  f"{1000 * max(latencies):>9.1f}{errors:>8}{requests:>10}")
+        print(f"\nranking {hedged.stats()['ranking']}, {hedged.hedges} hedged reads")
+        for name, stats in hedged.stats()["providers"].items():
+            print(f"  {name:<10}{stats}")
+
+        stubs["jittery"].latency = stubs["jittery"].slow_latency = 0.3
+        measure(hedged, 60)
+        ranking = hedged.stats()["ranking"]
+        print(f"\njittery turned slow: ranking {ranking}")
+        assert ranking[0] != "jittery", ranking
+
+        quorum = HedgedRpcClient([Provider(name, clients[name]) for name in ("steady", "flaky", "jittery", "liar")])
+        majority = quorum.call_quorum("eth_getBalance", [ADDRESS, "latest"], k=2)
+        split = HedgedRpcClient([Provider(name, clients[name]) for name in ("steady", "liar")]).call_quorum("eth_getBalance", [ADDRESS, "latest"], k=2)
+        print(f"\n2-of-4 with one liar: agreed={majority.agreed} on {majority.result}")
+        print(f"2-of-2 honest vs liar: agreed={split.agreed}, votes {split.votes}")
+        assert majority.agreed and int(majority.result, 16) == WEI and not split.agreed
+    finally:
+        for stub in stubs.values():
+            stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Per-call cost of the instrumentation, disabled and enabled, on a trivial function.
+
+Usage: python -m benchmarks.bench_metrics [--calls 1000000]
+"""
+import argparse
+import time
+
+from golden_minni.metrics import MetricsRegistry
+
+
+def work(x):
+    return x + 1
+
+
+def per_call_ns(func, calls):
+    started = time.perf_counter()
+    for i in range(calls):
+        func(i)
+    return 1e9 * (time.perf_counter() - started) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    registry = MetricsRegistry(enabled=False)
+    instrumented = registry.timed("bench.work")(work)
+
+    def with_span(x):
+        with registry.span("bench.span"):
+            return x + 1
+
+    baseline = per_call_ns(work, args.calls)
+    print(f"{'mode':<26}{'ns/call':>10}{'overhead ns':>13}")
+    print(f"{'plain call':<26}{baseline:>10.0f}{0:>13.0f}")
+    for enabled in (False, True):
+        registry.enabled = enabled
+        state = "enabled" if enabled else "disabled"
+        for name, func in ((f"timed, {state}", instrumented), (f"span, {state}", with_span)):
+            cost = per_call_ns(func, args.calls)
+            print(f"{name:<26}{cost:>10.0f}{cost - baseline:>13.0f}")
+    assert registry.span_summary()["bench.work"]["count"] == args.calls
+
+
+if __name__ == "__main__":
+    main()
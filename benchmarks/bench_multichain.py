@@ -0,0 +1,104 @@
+"""Multi-chain balance reads: ETH, BTC and SOL one after another vs the concurrent, per-chain cached fan-out.
+
+Usage: python -m benchmarks.bench_multichain [--eth-latency 0.05] [--btc-latency 0.15] [--sol-latency 0.1] [--reads 20]
+
+Each chain is served by its own stub with its own latency. Reports:
+1. Cold reads: sequential backend calls vs MultiChain fan-out (no cache).
+2. Warm reads: MultiChain with per-chain caches, as page renders see it.
+3. A chain that hangs: the fan-out returns after that chain's timeout with the
+   other chains filled in, and the late answer is cached for the next read.
+4. Payment detection on every chain through the same interface.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.stubs import StubServer
+from golden_minni.chains import BtcBackend, ChainTimeout, EthBackend, MultiChain, SolBackend
+from golden_minni.net import HttpPool, JsonRpcClient
+from golden_minni.payments import PaymentStore
+
+ADDRESSES = {
+    "eth": "0x5036dbcEEfae0a7429e64467222e1E259819c7C7",
+    "btc": "bc1qxy2kgdygjrsqtzq2n0yrf2493p83kkfjhx0wlh",
+    "sol": "GjKxT3YtFwN3j9p3L0w4V2x8E6r7Q0z1C5B7D8F9A",
+}
+
+
+def timed_ms(func, reads):
+    samples = []
+    for _ in range(reads):
+        started = time.perf_counter()
+        func()
+        samples.append(1000 * (time.perf_counter() - started))
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--eth-latency", type=float, default=0.05)
+    parser.add_argument("--btc-latency", type=float, default=0.15)
+    parser.add_argument("--sol-latency", type=float, default=0.1)
+    parser.add_argument("--timeout", type=float, default=0.5, help="Per-chain timeout")
+    parser.add_argument("--reads", type=int, default=20)
+    args = parser.parse_args()
+
+    stubs = {
+        "eth": StubServer(latency=args.eth_latency),
+        "btc": StubServer(latency=args.btc_latency),
+        "sol": StubServer(latency=args.sol_latency),
+    }
+    for chain, stub in stubs.items():
+        stub.start()
+        stub.chain.set_balance(ADDRESSES[chain], 10**9)
+    stubs["btc"].chain.add_transfer("bc1qpayer", ADDRESSES["btc"], 50000)
+    stubs["sol"].chain.add_transfer("PayerSo1", ADDRESSES["sol"], 10**8, confirmed=False)
+    store = PaymentStore(os.path.join(tempfile.mkdtemp(), "payments.db")) # Per-thread connections need a file
+    store.record_block(1, [{"tx_hash": "0x01", "sender": "0xpayer", "receiver": ADDRESSES["eth"].lower(), "value_wei": 10**15}])
+    try:
+        pool = HttpPool(pool_size=16, retries=0)
+        backends = [
+            EthBackend(JsonRpcClient(pool, stubs["eth"].url), store, timeout=args.timeout),
+            BtcBackend(pool, stubs["btc"].esplora_url, timeout=args.timeout),
+            SolBackend(JsonRpcClient(pool, stubs["sol"].url), timeout=args.timeout),
+        ]
+        query = {chain: [address] for chain, address in ADDRESSES.items()}
+        sequential = lambda: [backend.fetch_balances([ADDRESSES[backend.chain]]) for backend in backends]
+
+        print(f"{'median of ' + str(args.reads) + ' reads':<36}{'ms':>8}")
+        print(f"{'sequential, uncached':<36}{timed_ms(sequential, args.reads):>8.1f}")
+        print(f"{'fan-out, uncached':<36}{timed_ms(lambda: MultiChain(backends, ttl=0).balances(query), args.reads):>8.1f}")
+        cached = MultiChain(backends, ttl=30.0)
+        cached.balances(query)
+        print(f"{'fan-out, per-chain caches':<36}{timed_ms(lambda: cached.balances(query), args.reads):>8.3f}")
+
+        stubs["sol"].latency = 3 * args.timeout # SOL hangs
+        multi = MultiChain(backends, ttl=30.0)
+        started = time.perf_counter()
+        balances = multi.balances(query)
+        seconds = time.perf_counter() - started
+        print(f"\nSOL hanging: first read {1000 * seconds:.0f} ms, "
+              + ", ".join(f"{chain}={balances[chain][ADDRESSES[chain]].amount}" for chain in ADDRESSES))
+        assert isinstance(balances["sol"][ADDRESSES["sol"]].error, ChainTimeout) and seconds < args.timeout + 0.2
+        time.sleep(3 * args.timeout)
+        started = time.perf_counter()
+        balances = multi.balances(query)
+        print(f"after it answered: {1000 * (time.perf_counter() - started):.1f} ms, sol={balances['sol'][ADDRESSES['sol']].amount}")
+        assert balances["sol"][ADDRESSES["sol"]].value == 10**9
+
+        stubs["sol"].latency = args.sol_latency
+        payments = MultiChain(backends).payments(query)
+        print("\npayments:")
+        for chain, found in payments.items():
+            for payment in found[ADDRESSES[chain]]:
+                print(f"  {chain}  {payment['sender']:<12}{payment['value']:>18}  confirmed={payment['confirmed']}")
+        assert all(len(found[ADDRESSES[chain]]) == 1 for chain, found in payments.items())
+    finally:
+        for stub in stubs.values():
+            stub.stop()
+
+
+if __name__ == "__main__":
+    main()
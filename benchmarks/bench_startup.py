@@ -0,0 +1,117 @@
+"""Cold-start cost of the app: import time, first render time and RSS after the first render.
+
+Every run starts a fresh interpreter, points the app at the stub server and renders it
+once headlessly, so cached modules never hide an import regression. Exits non-zero when
+a heavy module (web3, PIL by default) is loaded by the Dashboard render or a budget is
+exceeded.
+
+Usage: python -m benchmarks.bench_startup [--runs 3] [--max-render-seconds 2] [--max-rss-mb 150]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "grok3_minni_kickass.py")
+HEAVY_MODULES = ("web3", "PIL", "qrcode", "pandas", "numpy")
+FORBIDDEN_MODULES = ("web3", "PIL")
+
+
+def rss_mb():
+    """Current resident set size; falls back to the peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure_once():
+    """Runs inside the child interpreter and returns one cold-start measurement."""
+    from benchmarks.stubs import StubServer
+
+    server = StubServer().start()
+    server.chain.set_balance("0x5036dbcEEfae0a7429e64467222e1E259819c7C7", 2 * 10**15)
+    db_dir = tempfile.mkdtemp(prefix="bench-startup-")
+    os.environ.update(
+        ETHERSCAN_API_URL=server.etherscan_url,
+        SEPOLIA_RPC_URL=server.url,
+        PAYMENTS_DB_PATH=os.path.join(db_dir, "payments.db"),
+    )
+    baseline_rss = rss_mb()
+
+    started = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+
+    import_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    app = AppTest.from_file(APP_PATH, default_timeout=60).run()
+    render_seconds = time.perf_counter() - started
+    if app.exception:
+        raise RuntimeError(f"first render failed: {app.exception[0].value}")
+    server.stop()
+    return {
+        "import_seconds": import_seconds,
+        "render_seconds": render_seconds,
+        "baseline_rss_mb": baseline_rss,
+        "rss_mb": rss_mb(),
+        "loaded": [name for name in HEAVY_MODULES if name in sys.modules],
+    }
+
+
+def run_child():
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")])))
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--child"],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to start; medians are reported")
+    parser.add_argument("--max-render-seconds", type=float, default=None, help="Fail when the median first render is slower")
+    parser.add_argument("--max-rss-mb", type=float, default=None, help="Fail when the median RSS after the first render is higher")
+    parser.add_argument("--forbid", nargs="*", default=list(FORBIDDEN_MODULES), help="Modules the first render must not import")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_once()))
+        return
+
+    runs = [run_child() for _ in range(args.runs)]
+    print(f"{'run':>4}{'import s':>10}{'render s':>10}{'RSS MB':>9}  heavy modules loaded")
+    for i, run in enumerate(runs, 1):
+        print(f"{i:>4}{run['import_seconds']:>10.3f}{run['render_seconds']:>10.3f}{run['rss_mb']:>9.1f}  {', '.join(run['loaded']) or '-'}")
+    render_seconds = statistics.median(run["render_seconds"] for run in runs)
+    rss = statistics.median(run["rss_mb"] for run in runs)
+    print(f"median first render {render_seconds:.3f}s, RSS {rss:.1f} MB")
+
+    failures = []
+    loaded = sorted({name for run in runs for name in run["loaded"]} & set(args.forbid))
+    if loaded:
+        failures.append(f"first render imported {', '.join(loaded)}")
+    if args.max_render_seconds is not None and render_seconds > args.max_render_seconds:
+        failures.append(f"first render took {render_seconds:.3f}s (budget {args.max_render_seconds}s)")
+    if args.max_rss_mb is not None and rss > args.max_rss_mb:
+        failures.append(f"RSS after first render is {rss:.1f} MB (budget {args.max_rss_mb} MB)")
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
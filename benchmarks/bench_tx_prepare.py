@@ -0,0 +1,95 @@
+"""Per-transaction vs batched preparation of signed transfers against the stub node.
+
+Usage: python -m benchmarks.bench_tx_prepare [--latency 0.005] [--sizes 16 128 512] [--workers N] [--threads 8]
+
+Parallel signing only pays off with more than one CPU; --workers defaults to the CPU count.
+"""
+import argparse
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from eth_utils import to_checksum_address
+
+from benchmarks.stubs import StubServer
+from golden_minni.net import HttpPool, JsonRpcClient
+from golden_minni.transactions import TransactionPreparer, sender_address, sign_transactions
+
+PRIVATE_KEY = "0x" + "4c" * 32
+
+
+def per_transaction(rpc, transfers):
+    # Mirrors the old send_ethereum_transaction: nonce and gas price from the node, then sign, per transfer
+    sender = sender_address(PRIVATE_KEY)
+    chain_id = int(rpc.call("eth_chainId", []), 16)
+    prepared = []
+    for to, value in transfers:
+        nonce = int(rpc.call("eth_getTransactionCount", [sender, "pending"]), 16)
+        gas_price = int(rpc.call("eth_gasPrice", []), 16)
+        transaction = {"to": to_checksum_address(to), "value": value, "nonce": nonce, "gasPrice": gas_price, "gas": 21000, "chainId": chain_id}
+        prepared.append(sign_transactions(PRIVATE_KEY, [transaction])[0])
+    return prepared
+
+
+def check_concurrent_nonces(rpc, executor, threads, batch_size):
+    """Prepares batches from `threads` callers at once and checks the nonces form one gapless run."""
+    preparer = TransactionPreparer(rpc, executor=executor)
+    transfers = [("0x%040x" % (i + 1), 10**12) for i in range(batch_size)]
+    nonces = []
+    lock = threading.Lock()
+
+    def worker():
+        batch = preparer.prepare_batch(PRIVATE_KEY, transfers)
+        assert [tx.nonce for tx in batch] == list(range(batch[0].nonce, batch[0].nonce + batch_size)), "batch is not consecutive"
+        with lock:
+            nonces.extend(tx.nonce for tx in batch)
+
+    started = time.perf_counter()
+    callers = [threading.Thread(target=worker) for _ in range(threads)]
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+    seconds = time.perf_counter() - started
+    assert sorted(nonces) == list(range(threads * batch_size)), "duplicate or missing nonces across concurrent callers"
+    return seconds, len(nonces)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.005, help="Seconds added to every stub response")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 128, 512])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Signing processes")
+    parser.add_argument("--threads", type=int, default=8, help="Concurrent callers in the nonce check")
+    args = parser.parse_args()
+
+    with StubServer(latency=args.latency) as server, ProcessPoolExecutor(args.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        rpc = JsonRpcClient(HttpPool(), server.url)
+        sign_transactions(PRIVATE_KEY, []) # Import the signer here and start the workers before timing
+        list(pool.map(sign_transactions, [PRIVATE_KEY] * args.workers, [[]] * args.workers))
+        print(f"{'mode':<28}{'N':>6}{'seconds':>10}{'tx/s':>10}{'rpc calls':>11}")
+        for size in args.sizes:
+            transfers = [("0x%040x" % (i + 1), 10**15 + i) for i in range(size)]
+            modes = [
+                ("per transaction", lambda: per_transaction(rpc, transfers)),
+                ("batch, inline signing", lambda: TransactionPreparer(rpc).prepare_batch(PRIVATE_KEY, transfers)),
+                (f"batch, signing on {args.workers} proc", lambda: TransactionPreparer(rpc, executor=pool).prepare_batch(PRIVATE_KEY, transfers)),
+            ]
+            for name, func in modes:
+                server.reset_counters()
+                started = time.perf_counter()
+                func()
+                seconds = time.perf_counter() - started
+                print(f"{name:<28}{size:>6}{seconds:>10.3f}{size / seconds:>10.0f}{sum(server.rpc_calls.values()):>11}")
+
+        batch_size = max(args.sizes[0], 1)
+        server.reset_counters()
+        seconds, count = check_concurrent_nonces(rpc, pool, args.threads, batch_size)
+        print(f"{args.threads} concurrent callers x {batch_size}: {count} unique consecutive nonces in {seconds:.3f}s "
+              f"({count / seconds:.0f} tx/s, {sum(server.rpc_calls.values())} rpc calls)")
+
+
+if __name__ == "__main__":
+    main()
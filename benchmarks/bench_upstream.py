@@ -0,0 +1,106 @@
+"""Thundering herd, rate limiting and upstream failures: direct Etherscan calls vs the coalescing client layer.
+
+Usage: python -m benchmarks.bench_upstream [--sessions 32] [--latency 0.05] [--rate 5]
+
+1. Herd: --sessions threads read the same balance at once, as sessions do when a
+   cached balance expires. Direct calls each hit Etherscan; the stale-while-
+   revalidate cache coalesces them into one call.
+2. Rate: --requests Etherscan calls from --sessions threads through the token
+   bucket; the stub's busiest second must stay within rate + burst.
+3. Outage: the stub fails every request; cached reads keep serving the last good
+   balance instead of 0.0.
+"""
+import argparse
+import threading
+import time
+
+from benchmarks.stubs import StubServer
+from golden_minni.balances import fetch_eth_balance_from_etherscan
+from golden_minni.net import HttpPool
+from golden_minni.upstream import RateLimitedHttp, StaleWhileRevalidate, TokenBucket
+
+ADDRESS = "0x5036dbcEEfae0a7429e64467222e1E259819c7C7"
+API_KEY = "bench"
+
+
+def run_concurrently(func, count):
+    results = [None] * count
+    barrier = threading.Barrier(count)
+
+    def worker(index):
+        barrier.wait() # Release everyone at the same instant
+        try:
+            results[index] = func()
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - started
+
+
+def peak_per_second(times):
+    peak, start = 0, 0
+    for end, now in enumerate(times):
+        while now - times[start] >= 1.0:
+            start += 1
+        peak = max(peak, end - start + 1)
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=32, help="Concurrent readers")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every stub response")
+    parser.add_argument("--rate", type=float, default=5.0, help="Etherscan requests per second per API key")
+    parser.add_argument("--burst", type=float, default=5.0)
+    parser.add_argument("--requests", type=int, default=30, help="Calls in the rate-limit check")
+    args = parser.parse_args()
+
+    with StubServer(latency=args.latency) as server:
+        server.chain.set_balance(ADDRESS, 2 * 10**15)
+        pool = HttpPool(pool_size=args.sessions, retries=0)
+        etherscan = RateLimitedHttp(pool, TokenBucket(args.rate, args.burst), max_wait=60.0, name="etherscan")
+        fetch = lambda: fetch_eth_balance_from_etherscan(pool, ADDRESS, API_KEY, server.etherscan_url)
+        cache = StaleWhileRevalidate(ttl=0.5, max_stale=3600.0)
+
+        print(f"{'herd of ' + str(args.sessions):<34}{'upstream calls':>15}{'wall ms':>10}")
+        for name, read in (("direct calls", fetch), ("coalesced (cold cache)", lambda: cache.get(ADDRESS, fetch).value)):
+            server.reset_counters()
+            results, seconds = run_concurrently(read, args.sessions)
+            assert all(result == 0.002 for result in results), results
+            print(f"{name:<34}{server.counters()['http_requests']:>15}{1000 * seconds:>10.1f}")
+        time.sleep(0.6) # Let the TTL lapse: readers get the old value at once and share one refresh
+        server.reset_counters()
+        results, seconds = run_concurrently(lambda: cache.get(ADDRESS, fetch), args.sessions)
+        time.sleep(2 * args.latency + 0.05)
+        assert all(result.stale for result in results)
+        print(f"{'coalesced (expired, revalidating)':<34}{server.counters()['http_requests']:>15}{1000 * seconds:>10.1f}")
+
+        server.reset_counters()
+        started = time.perf_counter()
+        run_concurrently(lambda: [fetch_eth_balance_from_etherscan(etherscan, ADDRESS, API_KEY, server.etherscan_url)
+                                  for _ in range(args.requests // args.sessions + 1)], args.sessions)
+        seconds = time.perf_counter() - started
+        sent = server.counters()["http_requests"]
+        peak = peak_per_second(server.request_times)
+        print(f"\nrate limit {args.rate:g}/s burst {args.burst:g}: {sent} calls in {seconds:.1f}s, "
+              f"busiest second {peak} calls (allowed {args.rate + args.burst:g})")
+
+        server.failure_rate = 1.0
+        time.sleep(0.6)
+        server.reset_counters()
+        served = [cache.get(ADDRESS, fetch) for _ in range(100)]
+        time.sleep(0.2)
+        attempts = server.counters()["http_requests"]
+        direct = run_concurrently(fetch, 1)[0][0]
+        print(f"\noutage: direct call -> {type(direct).__name__}; 100 cached reads -> balance {served[-1].value} "
+              f"(stale={served[-1].stale}) with {attempts} upstream attempt(s); {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""Local stand-ins for a Sepolia JSON-RPC node, the Etherscan API, a Solana RPC node and a Bitcoin Esplora API.
+
+The server answers from in-memory chain data, can add a fixed latency to every
+HTTP request (and a longer one to a share of them, for a latency tail), fails a
+configurable share of them with HTTP 503 and counts what it was asked, so benchmarks can compare upstream round trips as well as
+wall-clock time.
+"""
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class StubChain:
+    """In-memory chain data served by StubServer."""
+
+    def __init__(self):
+        self.head = 0
+        self.balances = {} # lower-case address -> Wei
+        self.receipts = {} # tx hash -> receipt dict
+        self.nonces = {} # lower-case address -> pending transaction count
+        self.blocks = {} # number -> block dict with full transactions
+        self.transfers = [] # BTC and SOL payments, oldest first: dicts with tx_hash, sender, receiver, value, confirmed
+        self.gas_price = 10**9
+        self.chain_id = 11155111
+        self.lock = threading.Lock()
+
+    def set_balance(self, address, wei):
+        with self.lock:
+            self.balances[address.lower()] = wei
+
+    def add_transfer(self, sender, receiver, value, confirmed=True):
+        """Records a BTC or SOL payment (served by the Esplora and Solana endpoints) and returns its id."""
+        with self.lock:
+            tx_hash = "%064x" % (len(self.transfers) + 1)
+            self.transfers.append({"tx_hash": tx_hash, "sender": sender, "receiver": receiver, "value": value, "confirmed": confirmed})
+            return tx_hash
+
+    def transfers_to(self, address):
+        return [t for t in reversed(self.transfers) if t["receiver"] == address]
+
+    def add_block(self, transactions=()):
+        with self.lock:
+            self.head += 1
+            self.blocks[self.head] = {
+                "number": hex(self.head),
+                "hash": "0x%064x" % self.head,
+                "transactions": list(transactions),
+            }
+            return self.head
+
+
+class StubServer:
+    """Threaded HTTP server speaking enough JSON-RPC and Etherscan for the app."""
+
+    def __init__(self, chain=None, latency=0.0, failure_rate=0.0, seed=0, slow_rate=0.0, slow_latency=0.0):
+        self.chain = chain or StubChain()
+        self.latency = latency
+        self.slow_rate = slow_rate # Share of requests that take slow_latency instead
+        self.slow_latency = slow_latency
+        self.failure_rate = failure_rate
+        self.http_requests = 0
+        self.failures = 0
+        self.rpc_calls = Counter()
+        self.request_times = [] # time.monotonic() of every request, for peak-rate checks
+        self._lock = threading.Lock()
+        self._random = random.Random(seed) # Seeded, so failure patterns repeat between runs
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    @property
+    def etherscan_url(self):
+        return f"{self.url}/api"
+
+    @property
+    def esplora_url(self):
+        return f"{self.url}/api" # Told apart from Etherscan by path
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_counters(self):
+        with self._lock:
+            self.http_requests = 0
+            self.failures = 0
+            self.rpc_calls.clear()
+            self.request_times.clear()
+
+    def counters(self):
+        with self._lock:
+            return {"http_requests": self.http_requests, "failures": self.failures, "rpc_calls": Counter(self.rpc_calls)}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _count(self, *methods):
+        """Counts one HTTP request and returns True when it should be failed."""
+        with self._lock:
+            self.http_requests += 1
+            self.rpc_calls.update(methods)
+            self.request_times.append(time.monotonic())
+            failed = self.failure_rate > 0 and self._random.random() < self.failure_rate
+            self.failures += failed
+            return failed
+
+    def delay(self):
+        """Seconds the next reply waits."""
+        if self.slow_rate > 0:
+            with self._lock:
+                if self._random.random() < self.slow_rate:
+                    return self.slow_latency
+        return self.latency
+
+    def rpc_result(self, method, params):
+        chain = self.chain
+        with chain.lock:
+            if method == "eth_chainId":
+                return hex(chain.chain_id)
+            if method == "eth_blockNumber":
+                return hex(chain.head)
+            if method == "eth_getBalance":
+                return hex(chain.balances.get(params[0].lower(), 0))
+            if method == "eth_getBlockByNumber":
+                number = chain.head if params[0] == "latest" else int(params[0], 16)
+                return chain.blocks.get(number)
+            if method == "eth_getTransactionReceipt":
+                return chain.receipts.get(params[0])
+            if method == "eth_gasPrice":
+                return hex(chain.gas_price)
+            if method == "eth_getTransactionCount":
+                return hex(chain.nonces.get(params[0].lower(), 0))
+            if method == "getBalance":
+                return {"context": {"slot": chain.head}, "value": chain.balances.get(params[0].lower(), 0)}
+            if method == "getSignaturesForAddress":
+                limit = (params[1] if len(params) > 1 else {}).get("limit", 1000)
+                return [
+                    {"signature": t["tx_hash"], "err": None, "confirmationStatus": "finalized" if t["confirmed"] else "confirmed"}
+                    for t in chain.transfers_to(params[0])[:limit]
+                ]
+            if method == "getTransaction":
+                for t in chain.transfers:
+                    if t["tx_hash"] == params[0]:
+                        return {
+                            "meta": {"err": None, "preBalances": [t["value"] + 5000, 0], "postBalances": [0, t["value"]]},
+                            "transaction": {"message": {"accountKeys": [t["sender"], t["receiver"]]}},
+                        }
+                return None
+        raise KeyError(method)
+
+    def esplora_result(self, path):
+        parts = path.strip("/").split("/") # api/address/<address>[/txs]
+        address = parts[2]
+        with self.chain.lock:
+            if len(parts) == 3:
+                funded = self.chain.balances.get(address.lower(), 0)
+                return {
+                    "address": address,
+                    "chain_stats": {"funded_txo_sum": funded, "spent_txo_sum": 0},
+                    "mempool_stats": {"funded_txo_sum": 0, "spent_txo_sum": 0},
+                }
+            return [
+                {
+                    "txid": t["tx_hash"],
+                    "vin": [{"prevout": {"scriptpubkey_address": t["sender"], "value": t["value"] + 1000}}],
+                    "vout": [{"scriptpubkey_address": t["receiver"], "value": t["value"]}],
+                    "status": {"confirmed": t["confirmed"]},
+                }
+                for t in self.chain.transfers_to(address)[:25]
+            ]
+
+    def etherscan_result(self, query):
+        action = query.get("action", [""])[0]
+        addresses = query.get("address", [""])[0].split(",")
+        with self.chain.lock:
+            balances = [(address, self.chain.balances.get(address.lower(), 0)) for address in addresses]
+        if action == "balance":
+            return {"status": "1", "message": "OK", "result": str(balances[0][1])}
+        if action == "balancemulti":
+            return {
+                "status": "1",
+                "message": "OK",
+                "result": [{"account": address, "balance": str(wei)} for address, wei in balances],
+            }
+        return {"status": "0", "message": "NOTOK", "result": f"Unknown action {action}"}
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" # Keep-alive, like the real endpoints
+            disable_nagle_algorithm = True # Headers and body go out in separate writes
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, payload, status=200):
+                body = json.dumps(payload).encode()
+                delay = stub.delay()
+                if delay:
+                    time.sleep(delay)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _fail(self):
+                self._reply({"error": "injected failure"}, status=503)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path.startswith("/api/address/"):
+                    if stub._count("esplora"):
+                        return self._fail()
+                    return self._reply(stub.esplora_result(url.path))
+                if stub._count("etherscan"):
+                    return self._fail()
+                self._reply(stub.etherscan_result(parse_qs(url.query)))
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                calls = request if isinstance(request, list) else [request]
+                if stub._count(*(call["method"] for call in calls)):
+                    return self._fail()
+                responses = []
+                for call in calls:
+                    try:
+                        responses.append({"jsonrpc": "2.0", "id": call["id"], "result": stub.rpc_result(call["method"], call.get("params", []))})
+                    except KeyError:
+                        responses.append({"jsonrpc": "2.0", "id": call["id"], "error": {"code": -32601, "message": "Method not found"}})
+                self._reply(responses if isinstance(request, list) else responses[0])
+
+        return Handler
@@ -0,0 +1 @@
+"""Golden Minni backend services shared by every OraculumX Streamlit session."""
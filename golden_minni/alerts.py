@@ -0,0 +1,180 @@
+"""Bounded, indexed alert log used by SystemState."""
+import heapq
+import itertools
+import time
+from collections import deque
+
+SEVERITIES = ("info", "warning", "error", "critical") # Lowest to highest
+_NO_ALERTS = () # Stands in for a ring buffer until its first alert
+
+
+class AlertRecord:
+    """One alert raised by a Golden Minni layer."""
+    __slots__ = ("timestamp", "layer", "severity", "message")
+
+    def __init__(self, timestamp, layer, severity, message):
+        self.timestamp = timestamp
+        self.layer = layer
+        self.severity = severity
+        self.message = message
+
+    def __str__(self):
+        return self.message
+
+    def __repr__(self):
+        return f"AlertRecord({self.layer!r}, {self.severity!r}, {self.message!r})"
+
+
+class LayerAlerts:
+    """Ring buffer of the latest alerts of one layer, indexed by severity.
+
+    Appending past `capacity` evicts the oldest alert and counts it as dropped, so
+    memory and rendering cost stay flat however long a session runs. Each severity
+    index keeps its own latest `capacity` alerts, so a flood of info alerts cannot
+    push critical ones out of severity queries. Queries over several severities
+    still see at most `capacity` alerts, like the unfiltered buffer. The buffers
+    are allocated on the first append of each severity, since most layers of most
+    sessions never alert.
+    """
+    __slots__ = ("layer", "capacity", "total", "_records", "_by_severity")
+
+    def __init__(self, layer, capacity=200):
+        self.layer = layer
+        self.capacity = capacity
+        self.total = 0
+        self._records = _NO_ALERTS
+        self._by_severity = {}
+
+    def append(self, message, severity="warning", timestamp=None):
+        if severity not in SEVERITIES:
+            raise ValueError(f"Unknown alert severity: {severity}")
+        if self._records is _NO_ALERTS:
+            self._records = deque(maxlen=self.capacity)
+        by_severity = self._by_severity.get(severity)
+        if by_severity is None:
+            by_severity = self._by_severity[severity] = deque(maxlen=self.capacity)
+        record = AlertRecord(timestamp if timestamp is not None else time.time(), self.layer, severity, message)
+        self._records.append(record)
+        by_severity.append(record)
+        self.total += 1
+        return record
+
+    @property
+    def dropped(self):
+        return self.total - len(self._records)
+
+    def _select(self, severity):
+        if severity is None:
+            return self._records
+        if severity not in SEVERITIES:
+            raise KeyError(severity)
+        return self._by_severity.get(severity, _NO_ALERTS)
+
+    def latest(self, n=None, severity=None):
+        """Newest first; `severity` restricts the query to that severity's index."""
+        records = self._select(severity)
+        if n is None:
+            n = len(records)
+        return list(itertools.islice(reversed(records), n))
+
+    def latest_of(self, severities, n=None):
+        """Newest first among alerts with one of `severities`, at most `capacity` of them."""
+        n = self.capacity if n is None else min(n, self.capacity)
+        streams = [self.latest(n, severity) for severity in set(severities)]
+        merged = heapq.merge(*streams, key=lambda record: record.timestamp, reverse=True)
+        return list(itertools.islice(merged, n))
+
+    def count(self, severity=None):
+        return len(self._select(severity))
+
+    def count_of(self, severities):
+        """How many alerts `latest_of(severities)` can return."""
+        return min(self.capacity, sum(self.count(severity) for severity in set(severities)))
+
+    def clear(self):
+        self._records = _NO_ALERTS
+        self._by_severity = {}
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __len__(self):
+        return len(self._records)
+
+    def __bool__(self):
+        return bool(self._records)
+
+
+class AlertLog:
+    """Per-layer alert ring buffers, addressable like the old dict of lists.
+
+    `log["Wallet"].append(message, severity)` keeps working for existing callers,
+    while `latest` and `by_severity` answer queries across layers without scanning
+    more than the N records asked for.
+    """
+    __slots__ = ("capacity", "_layers")
+
+    def __init__(self, layers, capacity=200):
+        self.capacity = capacity
+        self._layers = {layer: LayerAlerts(layer, capacity) for layer in layers}
+
+    def __getitem__(self, layer):
+        return self._layers[layer]
+
+    def __contains__(self, layer):
+        return layer in self._layers
+
+    def __iter__(self):
+        return iter(self._layers)
+
+    def __len__(self):
+        return len(self._layers)
+
+    def keys(self):
+        return self._layers.keys()
+
+    def items(self):
+        return self._layers.items()
+
+    def values(self):
+        return self._layers.values()
+
+    def append(self, layer, message, severity="warning"):
+        return self._layers[layer].append(message, severity)
+
+    def latest(self, n=20, layers=None, severity=None):
+        """The newest `n` alerts across `layers` (all by default), newest first."""
+        selected = [self._layers[layer] for layer in (layers or self._layers)]
+        streams = [layer_alerts.latest(n, severity) for layer_alerts in selected]
+        merged = heapq.merge(*streams, key=lambda record: record.timestamp, reverse=True)
+        return list(itertools.islice(merged, n))
+
+    def by_severity(self, severity, n=20, layers=None):
+        return self.latest(n, layers, severity)
+
+    def count(self, layers=None, severities=None):
+        """Alerts kept for `layers` with one of `severities` (all when None or empty)."""
+        selected = [self._layers[layer] for layer in (layers or self._layers)]
+        if not severities:
+            return sum(len(layer_alerts) for layer_alerts in selected)
+        return sum(layer_alerts.count_of(severities) for layer_alerts in selected)
+
+    def page(self, offset=0, limit=25, layers=None, severities=None):
+        """Alerts `offset` to `offset + limit` of those `count` counts, newest first.
+
+        Only the first `offset + limit` matches of each stream are merged, so the
+        first pages cost the same however many alerts the log holds.
+        """
+        selected = [self._layers[layer] for layer in (layers or self._layers)]
+        streams = [
+            layer_alerts.latest_of(severities, offset + limit) if severities else layer_alerts.latest(offset + limit)
+            for layer_alerts in selected
+        ]
+        merged = heapq.merge(*streams, key=lambda record: record.timestamp, reverse=True)
+        return list(itertools.islice(merged, offset, offset + limit))
+
+    def dropped(self):
+        return {layer: layer_alerts.dropped for layer, layer_alerts in self._layers.items()}
+
+    def total(self):
+        return sum(layer_alerts.total for layer_alerts in self._layers.values())
@@ -0,0 +1,422 @@
+"""Streaming anomaly detection over app events in constant memory, O(1) work per event.
+
+Events (session reruns, balance checks, transfer requests, incoming payments) flow
+through generator stages: `as_events` / `payment_events` normalize raw records and
+`StreamDetector.scan` folds each one into sliding-window statistics, yielding an
+Anomaly whenever an event stands out:
+
+- burst: one key (session, sender, counterparty) sent more events of a kind within
+  the window than that kind's limit;
+- surge: the kind's count in the current bucket (window / buckets seconds) is far
+  above the EWMA baseline of its completed buckets;
+- value_spike: the value (transfer amount, payment size) is above the window's p99
+  sketch and, on a log scale, several EWMA standard deviations above the mean.
+  Amounts are roughly log-normal, so raw z-scores would flag their long tail.
+
+Per-key state lives in a bounded LRU, so memory stays flat whatever the key count.
+"""
+import bisect
+import itertools
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+
+DEFAULT_WINDOW = 60.0
+DEFAULT_BUCKETS = 12
+
+
+class Event:
+    """One observation: `key` identifies who caused it, `value` is None for count-only events."""
+    __slots__ = ("kind", "key", "value", "timestamp")
+
+    def __init__(self, kind, key=None, value=None, timestamp=None):
+        self.kind = kind
+        self.key = key
+        self.value = value
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        return f"Event({self.kind!r}, {self.key!r}, {self.value!r})"
+
+
+class Anomaly:
+    __slots__ = ("kind", "key", "reason", "score", "value", "timestamp")
+
+    def __init__(self, kind, key, reason, score, value, timestamp):
+        self.kind = kind
+        self.key = key
+        self.reason = reason
+        self.score = score # How many times over its threshold the event was, >= 1
+        self.value = value
+        self.timestamp = timestamp
+
+    @property
+    def level(self):
+        """Threat level on the 0-9 scale the alerts use; every anomaly is above 7."""
+        return 9 if self.score >= 2 else 8
+
+    @property
+    def severity(self):
+        return "critical" if self.level >= 9 else "warning"
+
+    def __str__(self):
+        who = f" from {self.key}" if self.key is not None else ""
+        if self.reason == "burst":
+            return f"{self.kind} burst{who}: {self.value} events in the window"
+        if self.reason == "surge":
+            return f"{self.kind} surge: {self.value} events in one bucket"
+        return f"{self.kind} value spike{who}: {self.value:g}"
+
+    def __repr__(self):
+        return f"Anomaly({self.kind!r}, {self.key!r}, {self.reason!r}, score={self.score:.2f})"
+
+
+class WindowedRate:
+    """Events in the last `window` seconds, counted in `buckets` ring slots."""
+    __slots__ = ("bucket_seconds", "total", "_counts", "_epoch")
+
+    def __init__(self, window=DEFAULT_WINDOW, buckets=DEFAULT_BUCKETS):
+        self.bucket_seconds = window / buckets
+        self.total = 0
+        self._counts = [0] * buckets
+        self._epoch = None # Bucket number of the newest slot
+
+    def _advance(self, now):
+        epoch = int(now // self.bucket_seconds)
+        if self._epoch is None:
+            self._epoch = epoch
+            return
+        gap = epoch - self._epoch
+        if gap <= 0: # Same bucket, or the clock stepped back
+            return
+        size = len(self._counts)
+        for i in range(1, min(gap, size) + 1): # At most one pass over the ring
+            slot = (self._epoch + i) % size
+            self.total -= self._counts[slot]
+            self._counts[slot] = 0
+        self._epoch = epoch
+
+    def add(self, now, amount=1):
+        """Counts `amount` events at `now` and returns the window total."""
+        self._advance(now)
+        self._counts[self._epoch % len(self._counts)] += amount
+        self.total += amount
+        return self.total
+
+    def count(self, now):
+        self._advance(now)
+        return self.total
+
+
+class Ewma:
+    """Exponentially weighted mean and variance."""
+    __slots__ = ("alpha", "mean", "var", "count")
+
+    def __init__(self, alpha=0.05):
+        self.alpha = alpha
+        self.mean = 0.0
+        self.var = 0.0
+        self.count = 0
+
+    def std(self):
+        # Floored so a perfectly steady stream still scores a sudden jump
+        return max(math.sqrt(self.var), 1e-3 * abs(self.mean), 1e-9)
+
+    def update(self, x):
+        """Folds in `x` and returns its z-score against the state before it."""
+        if not self.count:
+            self.mean = x
+            self.count = 1
+            return 0.0
+        diff = x - self.mean
+        z = diff / self.std()
+        increment = self.alpha * diff
+        self.mean += increment
+        self.var = (1 - self.alpha) * (self.var + diff * increment)
+        self.count += 1
+        return z
+
+
+class P2Quantile:
+    """Running estimate of the `q` quantile in five markers (Jain and Chlamtac's P-square algorithm)."""
+    __slots__ = ("q", "count", "_heights", "_positions", "_desired", "_increments")
+
+    def __init__(self, q):
+        self.q = q
+        self.count = 0
+        self._heights = []
+        self._positions = [1, 2, 3, 4, 5]
+        self._desired = [1, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5]
+        self._increments = (0, q / 2, q, (1 + q) / 2, 1)
+
+    def add(self, x):
+        self.count += 1
+        h = self._heights
+        if self.count <= 5:
+            bisect.insort(h, x)
+            return
+        if x < h[0]:
+            h[0] = x
+            cell = 0
+        elif x >= h[4]:
+            h[4] = x
+            cell = 3
+        else:
+            cell = bisect.bisect_right(h, x) - 1
+        n, desired = self._positions, self._desired
+        for i in range(cell + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            desired[i] += self._increments[i]
+        for i in (1, 2, 3):
+            delta = desired[i] - n[i]
+            if (delta >= 1 and n[i + 1] - n[i] > 1) or (delta <= -1 and n[i - 1] - n[i] < -1):
+                step = 1 if delta > 0 else -1
+                # Piecewise-parabolic adjustment, linear when that would break marker order
+                height = h[i] + step / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + step) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - step) * (h[i] - h[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not h[i - 1] < height < h[i + 1]:
+                    height = h[i] + step * (h[i + step] - h[i]) / (n[i + step] - n[i])
+                h[i] = height
+                n[i] += step
+
+    def value(self):
+        h = self._heights
+        if not h:
+            return 0.0
+        if self.count <= 5:
+            return h[min(len(h) - 1, round(self.q * (len(h) - 1)))]
+        return h[2]
+
+
+class WindowedQuantile:
+    """Quantile of the current window, falling back to the previous one until it has enough samples."""
+    __slots__ = ("q", "window", "min_samples", "_epoch", "_current", "_previous")
+
+    def __init__(self, q, window=DEFAULT_WINDOW, min_samples=20):
+        self.q = q
+        self.window = window
+        self.min_samples = min_samples
+        self._epoch = None
+        self._current = P2Quantile(q)
+        self._previous = None
+
+    def add(self, now, x):
+        epoch = int(now // self.window)
+        if epoch != self._epoch:
+            if self._epoch is not None:
+                # A silent window in between leaves nothing worth comparing against
+                self._previous = self._current if epoch == self._epoch + 1 else None
+                self._current = P2Quantile(self.q)
+            self._epoch = epoch
+        self._current.add(x)
+
+    def value(self):
+        if self._current.count < self.min_samples and self._previous is not None:
+            return self._previous.value()
+        return self._current.value()
+
+
+class _KindStats:
+    __slots__ = ("limit", "rate", "baseline", "values", "p50", "p99", "events", "anomalies", "bucket", "bucket_count", "flagged")
+
+    def __init__(self, limit, window, buckets):
+        self.limit = limit
+        self.rate = WindowedRate(window, buckets)
+        self.baseline = Ewma(alpha=1 / buckets) # Of completed bucket counts
+        self.values = Ewma(alpha=0.02) # Of log(value)
+        self.p50 = WindowedQuantile(0.5, window)
+        self.p99 = WindowedQuantile(0.99, window)
+        self.events = 0
+        self.anomalies = 0
+        self.bucket = None
+        self.bucket_count = 0
+        self.flagged = None # Bucket of the last surge, so a surge is reported once per bucket
+
+
+class _KeyStats:
+    __slots__ = ("rate", "flagged")
+
+    def __init__(self, window, buckets):
+        self.rate = WindowedRate(window, buckets)
+        self.flagged = None
+
+
+class StreamDetector:
+    """Sliding-window rates, EWMA baselines and quantile sketches per event kind.
+
+    `limits` maps a kind to the events one key may cause per `window` seconds; kinds
+    without a limit are only checked for surges and value spikes. Checks start once
+    a kind has `warmup` samples. Safe to share between threads: each observation
+    takes one lock for a constant amount of work.
+
+    With `clock=None` the detector runs on event time only, for replays of
+    historical records: windows follow the events' timestamps, and events without
+    one are checked for value spikes but not counted towards rates or bursts.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, buckets=DEFAULT_BUCKETS, limits=None, z_threshold=4.0,
+                 warmup=30, min_surge=20, max_keys=10000, max_kinds=64, history=100, clock=time.time):
+        self.window = window
+        self.buckets = buckets
+        self.limits = dict(limits or {})
+        self.z_threshold = z_threshold
+        self.warmup = warmup
+        self.min_surge = min_surge
+        self.max_keys = max_keys
+        self.max_kinds = max_kinds
+        self.clock = clock
+        self.event_time = 0.0 # Newest event timestamp seen
+        self.recent = deque(maxlen=history)
+        self.events = 0
+        self.anomalies = 0
+        self._lock = threading.Lock()
+        self._kinds = {}
+        self._keys = OrderedDict() # (kind, key) -> _KeyStats, least recently seen first
+
+    def _kind_stats(self, kind):
+        stats = self._kinds.get(kind)
+        if stats is None:
+            if len(self._kinds) >= self.max_kinds:
+                kind = "other" # Caps memory against streams with arbitrary kinds
+                stats = self._kinds.get(kind)
+            if stats is None:
+                stats = self._kinds[kind] = _KindStats(self.limits.get(kind), self.window, self.buckets)
+        return kind, stats
+
+    def _key_stats(self, kind, key):
+        entry = (kind, key)
+        stats = self._keys.get(entry)
+        if stats is None:
+            stats = self._keys[entry] = _KeyStats(self.window, self.buckets)
+            if len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+        else:
+            self._keys.move_to_end(entry)
+        return stats
+
+    def observe(self, kind, key=None, value=None, timestamp=None):
+        """Folds one event into the statistics; returns the anomalies it raised (usually none)."""
+        timed = timestamp is not None or self.clock is not None
+        if timestamp is None and timed:
+            timestamp = self.clock()
+        found = []
+        with self._lock:
+            self.events += 1
+            kind, stats = self._kind_stats(kind)
+            stats.events += 1
+            if timed:
+                self.event_time = max(self.event_time, timestamp)
+            now = timestamp if timed else self.event_time
+            bucket = int(now // (self.window / self.buckets))
+
+            if timed:
+                stats.rate.add(now)
+            if timed and bucket != stats.bucket:
+                if stats.bucket is not None and bucket > stats.bucket:
+                    # The first bucket started mid-way, so it only counts once a second one exists
+                    if stats.bucket_count is not None:
+                        stats.baseline.update(stats.bucket_count)
+                    for _ in range(min(bucket - stats.bucket - 1, self.buckets)): # Silent buckets in between
+                        stats.baseline.update(0)
+                    stats.bucket_count = 0
+                else:
+                    stats.bucket_count = None
+                stats.bucket = bucket
+            if timed and stats.bucket_count is not None:
+                stats.bucket_count += 1
+                if (stats.baseline.count >= self.buckets and stats.bucket_count >= self.min_surge
+                        and stats.flagged != bucket):
+                    z = (stats.bucket_count - stats.baseline.mean) / stats.baseline.std()
+                    if z >= self.z_threshold:
+                        stats.flagged = bucket
+                        found.append(Anomaly(kind, None, "surge", z / self.z_threshold, stats.bucket_count, now))
+
+            if timed and key is not None and stats.limit:
+                key_stats = self._key_stats(kind, key)
+                count = key_stats.rate.add(now)
+                if count > stats.limit and key_stats.flagged != bucket:
+                    key_stats.flagged = bucket
+                    found.append(Anomaly(kind, key, "burst", count / stats.limit, count, now))
+
+            if value is not None:
+                warm = stats.values.count >= self.warmup
+                p99 = stats.p99.value()
+                z = stats.values.update(math.log(value)) if value > 0 else 0.0
+                stats.p50.add(now, value)
+                stats.p99.add(now, value)
+                if warm and z >= self.z_threshold and value > p99:
+                    found.append(Anomaly(kind, key, "value_spike", z / self.z_threshold, value, now))
+
+            if found:
+                stats.anomalies += len(found)
+                self.anomalies += len(found)
+                self.recent.extend(found)
+        return found
+
+    def scan(self, events):
+        """Generator stage: yields the anomalies raised by `events`, one event at a time."""
+        observe = self.observe
+        for event in events:
+            yield from observe(event.kind, event.key, event.value, event.timestamp)
+
+    def latest(self, n=20):
+        """The newest `n` anomalies, newest first."""
+        with self._lock:
+            return list(itertools.islice(reversed(self.recent), n))
+
+    def stats(self):
+        now = self.clock() if self.clock is not None else self.event_time
+        with self._lock:
+            return {
+                kind: {
+                    "events": stats.events,
+                    "in_window": stats.rate.count(now),
+                    "baseline": round(stats.baseline.mean, 2),
+                    "limit_per_key": stats.limit,
+                    "value_p50": round(stats.p50.value(), 6) if stats.values.count else None,
+                    "value_p99": round(stats.p99.value(), 6) if stats.values.count else None,
+                    "anomalies": stats.anomalies,
+                }
+                for kind, stats in self._kinds.items()
+            }
+
+
+KEY_FIELDS = ("key", "session", "sender", "counterparty", "to", "address", "user")
+VALUE_FIELDS = ("value", "amount")
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def as_events(records, kind="transfer"):
+    """Generator stage normalizing raw records into Events.
+
+    Accepts Events, (kind, key, value) tuples and dicts such as pipeline transfer
+    requests; a dict's kind defaults to `kind`, and its key is the first of
+    KEY_FIELDS present (a user dict contributes its id).
+    """
+    for record in records:
+        if isinstance(record, Event):
+            yield record
+        elif isinstance(record, tuple):
+            yield Event(*record)
+        elif isinstance(record, dict):
+            key = next((record[field] for field in KEY_FIELDS if record.get(field) is not None), None)
+            if isinstance(key, dict):
+                key = key.get("id")
+            value = next((_number(record[field]) for field in VALUE_FIELDS if record.get(field) is not None), None)
+            yield Event(record.get("kind", kind), key, value, _number(record.get("timestamp")))
+
+
+def payment_events(payments):
+    """Generator stage turning indexed payments (see payments.extract_payments) into Events, values in ETH."""
+    for payment in payments:
+        yield Event("payment", payment["sender"], int(payment["value_wei"]) / 10**18)
@@ -0,0 +1,196 @@
+"""Process-wide ETH balance polling shared by every Streamlit session."""
+import threading
+from datetime import datetime
+
+import requests
+
+from golden_minni.metrics import METRICS, timed
+
+ETHERSCAN_API_URL = "https://api-sepolia.etherscan.io/api"
+ETHERSCAN_MULTI_LIMIT = 20 # Addresses per `balancemulti` call
+
+
+class EtherscanError(Exception):
+    """Raised when Etherscan answers a request with a non-success status."""
+
+
+@timed("etherscan.get_balance")
+def fetch_eth_balance_from_etherscan(http, address, api_key, api_url=ETHERSCAN_API_URL):
+    """Returns the balance of `address` in ETH through the `http` pool, raising on any upstream failure."""
+    params = {
+        "module": "account",
+        "action": "balance",
+        "address": address,
+        "tag": "latest",
+        "apikey": api_key,
+    }
+    try:
+        response = http.get(api_url, params=params)
+        response.raise_for_status() # Raise an HTTPError for bad responses (4xx or 5xx)
+        data = response.json()
+        if data["status"] != "1":
+            raise EtherscanError(f"Etherscan API error: {data['message']}")
+    except Exception:
+        if METRICS.enabled:
+            METRICS.counter("upstream_errors_total", "Failed upstream calls by source", source="etherscan").inc()
+        raise
+    # Balance is in Wei, convert to Ether
+    return int(data["result"]) / (10**18)
+
+
+@timed("etherscan.get_balances")
+def fetch_eth_balances_from_etherscan(http, addresses, api_key, api_url=ETHERSCAN_API_URL):
+    """Balances in Wei for many addresses via Etherscan's `balancemulti` endpoint.
+
+    Addresses are sent ETHERSCAN_MULTI_LIMIT at a time. Returns a dict with an entry
+    per address: the balance, or the exception raised for the chunk it was in.
+    """
+    balances = {}
+    for start in range(0, len(addresses), ETHERSCAN_MULTI_LIMIT):
+        chunk = addresses[start:start + ETHERSCAN_MULTI_LIMIT]
+        params = {
+            "module": "account",
+            "action": "balancemulti",
+            "address": ",".join(chunk),
+            "tag": "latest",
+            "apikey": api_key,
+        }
+        try:
+            response = http.get(api_url, params=params)
+            response.raise_for_status()
+            data = response.json()
+            if data["status"] != "1":
+                raise EtherscanError(f"Etherscan API error: {data['message']}")
+            returned = {entry["account"].lower(): int(entry["balance"]) for entry in data["result"]}
+        except Exception as e:
+            if METRICS.enabled:
+                METRICS.counter("upstream_errors_total", "Failed upstream calls by source", source="etherscan").inc()
+            for address in chunk:
+                balances[address] = e
+            continue
+        for address in chunk:
+            balances[address] = returned.get(address.lower(), EtherscanError(f"No balance returned for {address}"))
+    return balances
+
+
+def fetch_balances_wei(rpc, addresses):
+    """Balances in Wei for many addresses using batched `eth_getBalance` calls.
+
+    Returns a dict with an entry per address: the balance, or the exception for that
+    call. A missing or malformed result counts as a failed call, not a crash.
+    """
+    results = rpc.batch([("eth_getBalance", [address, "latest"]) for address in addresses])
+    balances = {}
+    for address, result in zip(addresses, results):
+        if isinstance(result, Exception):
+            balances[address] = result
+            continue
+        try:
+            balances[address] = int(result, 16)
+        except (TypeError, ValueError):
+            balances[address] = ValueError(f"Invalid eth_getBalance result for {address}: {result!r}")
+    return balances
+
+
+def _describe_balance_error(error):
+    """Formats a balance fetch failure the way the Wallet alerts panel shows it."""
+    if isinstance(error, EtherscanError):
+        return str(error)
+    if isinstance(error, requests.exceptions.RequestException):
+        return f"Network error fetching ETH balance from Etherscan: {error}"
+    if isinstance(error, (ValueError, KeyError)):
+        return f"JSON decoding or data conversion error from Etherscan: {error}"
+    return f"Unexpected error fetching ETH balance from Etherscan: {error}"
+
+
+class BalanceSnapshot:
+    """Immutable view of the last known balance of one address."""
+    __slots__ = ("address", "balance", "updated_at", "checked_at", "error")
+
+    def __init__(self, address, balance=0.0, updated_at=None, checked_at=None, error=None):
+        self.address = address
+        self.balance = balance
+        self.updated_at = updated_at # Last successful fetch
+        self.checked_at = checked_at # Last attempt, successful or not
+        self.error = error # Message of the last attempt if it failed
+
+    @property
+    def loading(self):
+        """True until the first fetch attempt for this address finished."""
+        return self.checked_at is None
+
+    def age(self, now=None):
+        """Seconds since the balance was last fetched successfully, or None if it never was."""
+        if self.updated_at is None:
+            return None
+        return ((now or datetime.now()) - self.updated_at).total_seconds()
+
+    def is_stale(self, max_age, now=None):
+        age = self.age(now)
+        return age is None or age > max_age
+
+
+class BalancePoller:
+    """Keeps the balance of every watched address fresh from a single background thread.
+
+    Sessions only ever read snapshots, so page renders make no network calls and
+    upstream load stays constant no matter how many viewers are connected. The
+    first poll also runs on the thread; until it finishes, snapshots are `loading`.
+    """
+
+    def __init__(self, addresses, fetch_balances, interval=30.0):
+        self.fetch_balances = fetch_balances # addresses -> {address: balance or exception}
+        self.interval = interval
+        self.poll_count = 0
+        self._snapshots = {address: BalanceSnapshot(address) for address in addresses}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def addresses(self):
+        with self._lock:
+            return list(self._snapshots)
+
+    def snapshot(self, address):
+        with self._lock:
+            snapshot = self._snapshots.get(address)
+        return snapshot if snapshot is not None else BalanceSnapshot(address)
+
+    def poll_once(self):
+        addresses = self.addresses()
+        checked_at = datetime.now()
+        try:
+            results = self.fetch_balances(addresses)
+        except Exception as e:
+            results = {address: e for address in addresses}
+        with self._lock:
+            for address in addresses:
+                result = results.get(address)
+                if isinstance(result, Exception) or result is None:
+                    # Keep serving the last good balance; only record what went wrong.
+                    previous = self._snapshots.get(address) or BalanceSnapshot(address)
+                    error = _describe_balance_error(result) if result is not None else "No balance returned by Etherscan"
+                    self._snapshots[address] = BalanceSnapshot(
+                        address, previous.balance, previous.updated_at, checked_at, error
+                    )
+                else:
+                    self._snapshots[address] = BalanceSnapshot(address, result, checked_at, checked_at)
+        self.poll_count += 1
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="balance-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            self.poll_once()
+            if self._stop.wait(self.interval):
+                return
@@ -0,0 +1,282 @@
+"""Chain-agnostic balances and incoming payments for ETH, BTC and SOL, fetched concurrently."""
+import asyncio
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+from golden_minni.balances import fetch_balances_wei
+from golden_minni.metrics import METRICS
+from golden_minni.upstream import StaleWhileRevalidate
+
+BTC_API_URL = "https://blockstream.info/api" # Esplora
+SOL_RPC_URL = "https://api.mainnet-beta.solana.com"
+
+
+class ChainTimeout(Exception):
+    """A chain did not answer within its timeout; its fetch keeps running and fills the cache."""
+
+
+def _count_error(chain):
+    if METRICS.enabled:
+        METRICS.counter("upstream_errors_total", "Failed upstream calls by source", source=chain).inc()
+
+
+class ChainBackend(ABC):
+    """Balances and incoming payments on one chain, in its base unit (Wei, satoshi, lamport).
+
+    Subclasses make blocking calls through the shared HTTP pool; MultiChain runs
+    them concurrently. They must implement both fetch methods; one that does not
+    cannot be instantiated. Payments are dicts with tx_hash, sender, receiver,
+    value and confirmed.
+    """
+    chain = None
+    symbol = None
+    decimals = 0
+
+    def __init__(self, timeout=2.0):
+        self.timeout = timeout
+
+    @abstractmethod
+    def fetch_balances(self, addresses):
+        """{address: balance in base units, or the exception raised for it}."""
+
+    @abstractmethod
+    def fetch_payments(self, address, limit=25):
+        """Newest incoming payments to `address`, at most `limit`."""
+
+    def to_units(self, value):
+        return value / 10**self.decimals
+
+
+class EthBackend(ChainBackend):
+    """Balances over JSON-RPC; payments from the PaymentStore the block indexer fills."""
+    chain, symbol, decimals = "eth", "ETH", 18
+
+    def __init__(self, rpc, store=None, timeout=2.0):
+        super().__init__(timeout)
+        self.rpc = rpc
+        self.store = store
+
+    def fetch_balances(self, addresses):
+        return fetch_balances_wei(self.rpc, addresses)
+
+    def fetch_payments(self, address, limit=25):
+        if self.store is None:
+            return []
+        return [
+            {"tx_hash": p["tx_hash"], "sender": p["sender"], "receiver": p["receiver"], "value": p["value_wei"], "confirmed": True}
+            for p in self.store.payments_to(address, limit)
+        ]
+
+
+class BtcBackend(ChainBackend):
+    """Confirmed balances and incoming transactions from an Esplora API (Blockstream or self-hosted)."""
+    chain, symbol, decimals = "btc", "BTC", 8
+
+    def __init__(self, http, api_url=BTC_API_URL, timeout=2.0):
+        super().__init__(timeout)
+        self.http = http
+        self.api_url = api_url.rstrip("/")
+
+    def _get(self, path):
+        try:
+            response = self.http.get(f"{self.api_url}{path}")
+            response.raise_for_status()
+            return response.json()
+        except Exception:
+            _count_error(self.chain)
+            raise
+
+    def fetch_balances(self, addresses):
+        # Esplora has no multi-address endpoint
+        balances = {}
+        for address in addresses:
+            try:
+                stats = self._get(f"/address/{address}")["chain_stats"]
+                balances[address] = int(stats["funded_txo_sum"]) - int(stats["spent_txo_sum"])
+            except Exception as e:
+                balances[address] = e
+        return balances
+
+    def fetch_payments(self, address, limit=25):
+        payments = []
+        for tx in self._get(f"/address/{address}/txs")[:limit]:
+            senders = [(vin.get("prevout") or {}).get("scriptpubkey_address") for vin in tx.get("vin", [])]
+            if address in senders:
+                continue # Our own spend; any output back to us is change
+            value = sum(int(vout["value"]) for vout in tx.get("vout", []) if vout.get("scriptpubkey_address") == address)
+            if value > 0:
+                payments.append({
+                    "tx_hash": tx["txid"],
+                    "sender": senders[0] if senders else None,
+                    "receiver": address,
+                    "value": value,
+                    "confirmed": bool(tx.get("status", {}).get("confirmed")),
+                })
+        return payments
+
+
+class SolBackend(ChainBackend):
+    """Balances and incoming transfers over Solana JSON-RPC, through a JsonRpcClient."""
+    chain, symbol, decimals = "sol", "SOL", 9
+
+    def __init__(self, rpc, commitment="finalized", timeout=2.0):
+        super().__init__(timeout)
+        self.rpc = rpc
+        self.commitment = commitment
+
+    def fetch_balances(self, addresses):
+        results = self.rpc.batch([("getBalance", [address, {"commitment": self.commitment}]) for address in addresses])
+        return {
+            address: result if isinstance(result, Exception) else int(result["value"])
+            for address, result in zip(addresses, results)
+        }
+
+    def fetch_payments(self, address, limit=25):
+        signatures = [s for s in self.rpc.call("getSignaturesForAddress", [address, {"limit": limit}]) if not s.get("err")]
+        transactions = self.rpc.batch([
+            ("getTransaction", [s["signature"], {"encoding": "json", "maxSupportedTransactionVersion": 0}])
+            for s in signatures
+        ])
+        payments = []
+        for signature, tx in zip(signatures, transactions):
+            if isinstance(tx, Exception) or not tx or (tx.get("meta") or {}).get("err"):
+                continue
+            keys = tx["transaction"]["message"]["accountKeys"]
+            if address not in keys:
+                continue # Only in a lookup table; not a plain transfer to us
+            index = keys.index(address)
+            value = tx["meta"]["postBalances"][index] - tx["meta"]["preBalances"][index]
+            if value > 0 and index != 0: # Index 0 is the fee payer, i.e. the sender
+                payments.append({
+                    "tx_hash": signature["signature"],
+                    "sender": keys[0],
+                    "receiver": address,
+                    "value": value,
+                    "confirmed": signature.get("confirmationStatus") == "finalized",
+                })
+        return payments
+
+
+class ChainBalance:
+    """Balance of one address as last read; `value` is None until a read succeeds."""
+    __slots__ = ("chain", "symbol", "address", "value", "amount", "fetched_at", "stale", "error")
+
+    def __init__(self, chain, symbol, address, value=None, amount=None, fetched_at=None, stale=False, error=None):
+        self.chain = chain
+        self.symbol = symbol
+        self.address = address
+        self.value = value # Base units
+        self.amount = amount # Whole coins
+        self.fetched_at = fetched_at
+        self.stale = stale
+        self.error = error
+
+    def __repr__(self):
+        return f"ChainBalance({self.chain}, {self.address!r}, amount={self.amount}, stale={self.stale})"
+
+
+class MultiChain:
+    """Reads balances and payments from every chain at once.
+
+    Each chain has its own stale-while-revalidate cache and its own timeout. Once a
+    chain has been read, it answers from its cache and refreshes behind the caller.
+    A chain with nothing cached yields a ChainTimeout after `backend.timeout` seconds
+    instead of holding up the others, and its fetch keeps running to fill the cache
+    for the next read. A read therefore costs the slowest timeout at most, not the
+    sum of every chain's latency.
+
+    The backends block on the shared requests pool, so asyncio fans them out to a
+    thread pool of its own, which outlives the event loop of any single read.
+    """
+
+    def __init__(self, backends, ttl=30.0, max_stale=3600.0, max_workers=None):
+        self.backends = {backend.chain: backend for backend in backends}
+        self.caches = {chain: StaleWhileRevalidate(ttl=ttl, max_stale=max_stale) for chain in self.backends}
+        self.timeouts = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or 4 * len(self.backends), thread_name_prefix="chain-fetch")
+
+    def _read(self, chain, key, fetch):
+        def fetch_or_raise():
+            results = fetch()
+            errors = [value for value in results.values() if isinstance(value, Exception)]
+            if errors and len(errors) == len(results):
+                raise errors[0] # Nothing usable, so keep serving the last good read
+            return results
+        return self.caches[chain].get(key, fetch_or_raise)
+
+    async def _fan_out(self, reads):
+        """Runs `reads` ({chain: (key, fetch)}) concurrently; {chain: Cached, or the exception}."""
+        loop = asyncio.get_running_loop()
+
+        async def one(chain, key, fetch):
+            try:
+                return await asyncio.wait_for(
+                    loop.run_in_executor(self._executor, self._read, chain, key, fetch),
+                    self.backends[chain].timeout,
+                )
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                return ChainTimeout(f"{chain} did not answer within {self.backends[chain].timeout:g}s")
+            except Exception as e:
+                return e
+
+        results = await asyncio.gather(*(one(chain, *read) for chain, read in reads.items()))
+        return dict(zip(reads, results))
+
+    async def balances_async(self, addresses_by_chain):
+        """{chain: {address: ChainBalance}} for `addresses_by_chain` ({chain: [address, ...]})."""
+        reads = {}
+        for chain, addresses in addresses_by_chain.items():
+            addresses = tuple(addresses)
+            reads[chain] = (("balances", addresses), lambda backend=self.backends[chain], addresses=addresses: backend.fetch_balances(list(addresses)))
+        results = await self._fan_out(reads)
+        balances = {}
+        for chain, addresses in addresses_by_chain.items():
+            backend, cached = self.backends[chain], results[chain]
+            balances[chain] = {}
+            for address in addresses:
+                if isinstance(cached, Exception):
+                    balances[chain][address] = ChainBalance(chain, backend.symbol, address, error=cached)
+                    continue
+                value = cached.value.get(address)
+                if isinstance(value, Exception) or value is None:
+                    balances[chain][address] = ChainBalance(chain, backend.symbol, address, fetched_at=cached.fetched_at, error=value)
+                else:
+                    balances[chain][address] = ChainBalance(
+                        chain, backend.symbol, address, value, backend.to_units(value), cached.fetched_at, cached.stale, cached.error,
+                    )
+        return balances
+
+    async def payments_async(self, addresses_by_chain, limit=25):
+        """{chain: {address: [payment, ...] or the exception}}, newest payments first."""
+        reads = {}
+        for chain, addresses in addresses_by_chain.items():
+            addresses = tuple(addresses)
+            reads[chain] = (("payments", addresses, limit), lambda backend=self.backends[chain], addresses=addresses: {
+                address: _or_exception(backend.fetch_payments, address, limit) for address in addresses
+            })
+        results = await self._fan_out(reads)
+        return {
+            chain: {
+                address: results[chain] if isinstance(results[chain], Exception) else results[chain].value[address]
+                for address in addresses
+            }
+            for chain, addresses in addresses_by_chain.items()
+        }
+
+    def balances(self, addresses_by_chain):
+        """Blocking form of balances_async, for callers without an event loop (Streamlit scripts)."""
+        return asyncio.run(self.balances_async(addresses_by_chain))
+
+    def payments(self, addresses_by_chain, limit=25):
+        return asyncio.run(self.payments_async(addresses_by_chain, limit))
+
+    def stats(self):
+        return {"timeouts": self.timeouts, **{chain: cache.stats() for chain, cache in self.caches.items()}}
+
+
+def _or_exception(func, *args):
+    try:
+        return func(*args)
+    except Exception as e:
+        return e
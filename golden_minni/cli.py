@@ -0,0 +1,210 @@
+"""Headless batch evaluation: streams JSONL transfer requests through the Golden Minni layers.
+
+Usage: python -m golden_minni.cli requests.jsonl [-o decisions.jsonl] [--workers 4] [--chunk-size 500]
+
+Each input line is one request as the app's pipeline takes it (id, type, amount,
+currency, counterparty, user, timestamp, ...); each output line is its decision,
+in input order. Lines that are not JSON objects get {"line": n, "error": ...}.
+Use "-" for stdin or stdout. Throughput is reported on stderr.
+
+Input is read and written a chunk at a time and at most two chunks per worker are
+in flight, so memory stays flat however long the file is. Every worker process
+builds its own layers; the screening index is compiled once and memory-mapped by
+all of them. Threat statistics are kept per worker, so per-key rate limits see
+each worker's share of the traffic; use --workers 1 to replay them exactly.
+Windows and rate limits run on the records' own "timestamp" (epoch seconds), never
+the wall clock; records without one are not counted towards them.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from golden_minni.anomaly import StreamDetector
+from golden_minni.core import SystemState, build_layers
+from golden_minni.pipeline import EvaluationPipeline
+from golden_minni.screening import ScreeningIndex
+
+DEFAULT_SCREENING_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "screening_lists")
+
+_worker = {} # Layers and pipeline of this process, built by _init_worker
+
+
+class _InlineExecutor:
+    """Runs the pipeline's checks in the calling thread: processes already give the parallelism."""
+
+    def submit(self, func, *args):
+        future = Future()
+        try:
+            future.set_result(func(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def _init_worker(options):
+    system_state = SystemState(alert_capacity=options["alert_capacity"])
+    screening = ScreeningIndex(options["screening_dir"], options["screening_index"]).load()
+    detector = StreamDetector(window=options["threat_window"], limits=options["threat_limits"], z_threshold=options["z_threshold"],
+                              clock=None) # Event time: a replay of last year's transfers is not a burst happening now
+    layers = build_layers(system_state, screening, detector)
+    _worker["pipeline"] = EvaluationPipeline(
+        layers["transfer_ai"], layers["risk_ai"], layers["compliance_ai"], layers["consensus_ai"], layers["self_defense_ai"],
+        executor=_InlineExecutor(),
+    )
+
+
+def _evaluate_chunk(first_line, lines):
+    """JSONL decisions for `lines` plus (approved, rejected, invalid) counts; runs in a worker."""
+    pipeline = _worker["pipeline"]
+    out = []
+    approved = rejected = invalid = 0
+    for number, line in enumerate(lines, first_line):
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("not a JSON object")
+            decision = pipeline.evaluate(request)
+        except Exception as e: # One bad request must not sink the batch
+            invalid += 1
+            out.append(json.dumps({"line": number, "error": f"{type(e).__name__}: {e}"}))
+            continue
+        if decision["approved"]:
+            approved += 1
+        else:
+            rejected += 1
+        out.append(json.dumps(decision, default=str))
+    return out, approved, rejected, invalid
+
+
+def read_chunks(stream, chunk_size):
+    """(first line number, [non-blank lines]) chunks of `stream`."""
+    chunk, first = [], 1
+    for number, line in enumerate(stream, 1):
+        if line.strip():
+            if not chunk:
+                first = number
+            chunk.append(line)
+            if len(chunk) >= chunk_size:
+                yield first, chunk
+                chunk = []
+    if chunk:
+        yield first, chunk
+
+
+class Progress:
+    """Request counts and throughput, reported to stderr at most every `every` seconds."""
+
+    def __init__(self, stream, every=5.0):
+        self.stream = stream
+        self.every = every
+        self.started = time.perf_counter()
+        self.last_report = self.started
+        self.approved = self.rejected = self.invalid = 0
+
+    @property
+    def total(self):
+        return self.approved + self.rejected + self.invalid
+
+    def add(self, approved, rejected, invalid):
+        self.approved += approved
+        self.rejected += rejected
+        self.invalid += invalid
+        now = time.perf_counter()
+        if self.every and now - self.last_report >= self.every:
+            self.last_report = now
+            print(f"{self.total} requests, {self.total / (now - self.started):.0f}/s", file=self.stream, flush=True)
+
+    def summary(self, workers):
+        seconds = time.perf_counter() - self.started
+        peak_mib = max(resource.getrusage(who).ru_maxrss for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)) / 1024
+        return (
+            f"{self.total} requests in {seconds:.2f}s ({self.total / seconds if seconds else 0:.0f}/s) on {workers} worker(s): "
+            f"{self.approved} approved, {self.rejected} rejected, {self.invalid} invalid. Peak RSS per process {peak_mib:.0f} MiB"
+        )
+
+
+def run(source, sink, workers=1, chunk_size=500, options=None, progress=None):
+    """Evaluates every request in `source` (lines) and writes decisions to `sink`; returns the Progress."""
+    options = options or default_options()
+    progress = progress or Progress(sys.stderr, every=0)
+    chunks = read_chunks(source, chunk_size)
+    if workers <= 1:
+        _init_worker(options)
+        for first, lines in chunks:
+            out, *counts = _evaluate_chunk(first, lines)
+            sink.write("\n".join(out) + "\n")
+            progress.add(*counts)
+        return progress
+
+    ScreeningIndex(options["screening_dir"], options["screening_index"]).load() # Compile once; workers only map it
+    # spawn, not fork, as for the signing pool: workers start clean whatever the parent holds
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(options,)) as executor:
+        in_flight = deque()
+        for first, lines in chunks:
+            in_flight.append(executor.submit(_evaluate_chunk, first, lines))
+            if len(in_flight) >= 2 * workers: # Bounded read-ahead keeps memory flat
+                out, *counts = in_flight.popleft().result()
+                sink.write("\n".join(out) + "\n")
+                progress.add(*counts)
+        while in_flight:
+            out, *counts = in_flight.popleft().result()
+            sink.write("\n".join(out) + "\n")
+            progress.add(*counts)
+    return progress
+
+
+def default_options():
+    return {
+        "screening_dir": DEFAULT_SCREENING_DIR,
+        "screening_index": None,
+        "threat_window": 60.0,
+        "threat_limits": {"transfer": 20},
+        "z_threshold": 4.0,
+        "alert_capacity": 200,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help='JSONL transfer requests, or "-" for stdin')
+    parser.add_argument("-o", "--output", default="-", help='JSONL decisions, or "-" for stdout (default)')
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (1 runs inline)")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Requests per unit of work")
+    parser.add_argument("--screening-dir", default=os.getenv("SCREENING_LISTS_DIR", DEFAULT_SCREENING_DIR))
+    parser.add_argument("--screening-index", default=os.getenv("SCREENING_INDEX_PATH"), help="Compiled index path (default: inside --screening-dir)")
+    parser.add_argument("--threat-window", type=float, default=60.0, help="Seconds of event time per sliding window")
+    parser.add_argument("--transfer-limit", type=int, default=20, help="Transfers one key may make per window")
+    parser.add_argument("--z-threshold", type=float, default=4.0)
+    parser.add_argument("--progress-every", type=float, default=5.0, help="Seconds between progress lines (0: summary only)")
+    args = parser.parse_args(argv)
+
+    options = default_options()
+    options.update(
+        screening_dir=args.screening_dir,
+        screening_index=args.screening_index,
+        threat_window=args.threat_window,
+        threat_limits={"transfer": args.transfer_limit},
+        z_threshold=args.z_threshold,
+    )
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        progress = run(source, sink, args.workers, args.chunk_size, options, Progress(sys.stderr, args.progress_every))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    print(progress.summary(args.workers), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
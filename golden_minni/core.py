@@ -0,0 +1,319 @@
+"""Golden Minni AI layers and the SystemState they report into, free of any UI.
+
+The Streamlit app and the batch CLI (golden_minni.cli) both build their layers here;
+shared resources (screening index, threat detector, RPC client) are passed in.
+The app builds one set of layers per process and points them at each session's
+SystemState with use_system_state.
+"""
+import contextvars
+import secrets
+import time
+from collections.abc import MutableMapping
+
+from golden_minni.alerts import AlertLog
+from golden_minni.anomaly import as_events
+from golden_minni.metrics import timed
+from golden_minni.risk import HIGH_RISK_THRESHOLD, assess_batch, score_transaction
+
+
+_current_state = contextvars.ContextVar("golden_minni_system_state")
+
+
+def use_system_state(system_state):
+    """Makes every layer report into `system_state` for the rest of the current context.
+
+    Streamlit runs each session's script in a thread of its own, so setting it at the
+    top of a script run scopes it to that session; EvaluationPipeline carries it over
+    to its worker threads.
+    """
+    _current_state.set(system_state)
+
+
+class CopyOnWriteDict(MutableMapping):
+    """A dict that reads through to a shared dict and keeps only its own writes.
+
+    Nothing is allocated until the first write, and then only the keys written.
+    Deleting a key drops this dict's value for it, bringing back the shared one.
+    """
+    __slots__ = ("_shared", "_own")
+
+    def __init__(self, shared):
+        self._shared = shared
+        self._own = None
+
+    def __getitem__(self, key):
+        if self._own is not None and key in self._own:
+            return self._own[key]
+        return self._shared[key]
+
+    def __setitem__(self, key, value):
+        if self._own is None:
+            self._own = {}
+        self._own[key] = value
+
+    def __delitem__(self, key):
+        if self._own is None or key not in self._own:
+            raise KeyError(key)
+        del self._own[key]
+
+    def __iter__(self):
+        yield from self._shared
+        if self._own is not None:
+            yield from (key for key in self._own if key not in self._shared)
+
+    def __len__(self):
+        return len(self._shared) + sum(1 for key in self._own or () if key not in self._shared)
+
+    def __repr__(self):
+        return f"CopyOnWriteDict({dict(self)!r})"
+
+
+class SystemState:
+    """Centralized state management for Golden Minni operations.
+
+    Built with `shared`, it is a compact per-session view: status and latest
+    operation read through to the shared state until the session writes its own,
+    and alert buffers exist only for layers that raised an alert.
+    """
+    __slots__ = ("eth_balance", "premium_active", "minni_status", "minni_alerts", "minni_latest_operation")
+
+    def __init__(self, alert_capacity=200, shared=None):
+        self.eth_balance = 0.0
+        self.premium_active = False
+        if shared is not None:
+            self.minni_status = CopyOnWriteDict(shared.minni_status)
+            self.minni_latest_operation = CopyOnWriteDict(shared.minni_latest_operation)
+            self.minni_alerts = AlertLog(self.minni_status.keys(), capacity=alert_capacity)
+            return
+        self.minni_status = {
+            "Wallet": "Inactive",
+            "Grok3MinniAI_Setup": "Inactive",
+            "TransferAI": "Inactive",
+            "RiskAI": "Inactive",
+            "ComplianceAI": "Inactive",
+            "ConsensusAI": "Inactive",
+            "SelfDefenseAI": "Inactive"
+        }
+        # Bounded per-layer ring buffers of structured alerts (timestamp, severity, layer)
+        self.minni_alerts = AlertLog(self.minni_status.keys(), capacity=alert_capacity)
+        self.minni_latest_operation = {
+            "Wallet": "N/A",
+            "Grok3MinniAI_Setup": "N/A",
+            "TransferAI": "N/A",
+            "RiskAI": "N/A",
+            "ComplianceAI": "N/A",
+            "ConsensusAI": "N/A",
+            "SelfDefenseAI": "N/A"
+        }
+
+
+class Layer:
+    """Base of the AI layers; they hold no per-session state.
+
+    A layer reports into the SystemState selected with use_system_state, or into
+    the one it was built with where none is selected (the CLI, background tasks).
+    """
+    __slots__ = ("_system_state",)
+
+    def __init__(self, system_state):
+        self._system_state = system_state
+
+    @property
+    def system_state(self):
+        return _current_state.get(self._system_state)
+
+
+class Grok3MinniAI_Setup(Layer):
+    __slots__ = ()
+
+    def __init__(self, system_state):
+        super().__init__(system_state)
+        self._system_state.minni_status["Grok3MinniAI_Setup"] = "Ready"
+        self._system_state.minni_latest_operation["Grok3MinniAI_Setup"] = "Grok-3 Minni AI setup complete."
+    @timed("grok3_setup.run_initial_scan")
+    def run_initial_scan(self):
+        self.system_state.minni_latest_operation["Grok3MinniAI_Setup"] = "Performing initial system scan and optimization."
+        # Simulate some setup
+        time.sleep(0.5)
+        self.system_state.minni_latest_operation["Grok3MinniAI_Setup"] = "Initial system scan complete."
+        return {"status": "success", "message": "Grok-3 initial setup completed."}
+    def sync_initial_scan(self, scan_task):
+        """Mirrors the shared background scan into this session's state without waiting for it."""
+        if scan_task.state == "done":
+            self.system_state.minni_latest_operation["Grok3MinniAI_Setup"] = "Initial system scan complete."
+        elif scan_task.state == "failed":
+            self.system_state.minni_status["Grok3MinniAI_Setup"] = "Error"
+            self.system_state.minni_alerts["Grok3MinniAI_Setup"].append(f"Initial system scan failed: {scan_task.error}", severity="error")
+        else:
+            self.system_state.minni_latest_operation["Grok3MinniAI_Setup"] = (
+                f"Performing initial system scan and optimization ({scan_task.elapsed():.1f}s elapsed)."
+            )
+        return scan_task.state
+
+class _Transfer(Layer): # Renamed to avoid conflict with the function, conceptually represents the AI behind transfers
+    __slots__ = ()
+
+    def __init__(self, system_state):
+        super().__init__(system_state)
+        self._system_state.minni_status["TransferAI"] = "Monitoring"
+        self._system_state.minni_latest_operation["TransferAI"] = "Transfer AI activated, monitoring for transaction requests."
+    @timed("transfer_ai.process_request")
+    def process_request(self, request_data):
+        self.system_state.minni_latest_operation["TransferAI"] = f"Processing transfer request: {request_data.get('type')}"
+        # Simulate transfer logic
+        if request_data.get("amount", 0) > 100:
+            self.system_state.minni_alerts["TransferAI"].append(f"High-value transfer alert: {request_data.get('amount')} {request_data.get('currency')}", severity="warning")
+        return {"status": "processed", "message": "Transfer AI logic applied."}
+
+class _Risk(Layer):
+    __slots__ = ()
+
+    def __init__(self, system_state):
+        super().__init__(system_state)
+        self._system_state.minni_status["RiskAI"] = "Active"
+        self._system_state.minni_latest_operation["RiskAI"] = "Risk AI initialized, continuously assessing."
+    @timed("risk_ai.assess")
+    def assess(self, transaction_details):
+        risk_score = score_transaction(
+            transaction_details.get("value", transaction_details.get("amount", 0)),
+            transaction_details.get("currency"),
+            transaction_details.get("counterparty"),
+        )
+        self.system_state.minni_latest_operation["RiskAI"] = f"Assessed risk for transaction. Score: {risk_score}"
+        if risk_score > HIGH_RISK_THRESHOLD:
+            self.system_state.minni_alerts["RiskAI"].append(f"High risk detected (Score: {risk_score}) for: {transaction_details}", severity="critical")
+            return {"risk": "high", "score": risk_score}
+        return {"risk": "low", "score": risk_score}
+    @timed("risk_ai.assess_batch")
+    def assess_batch(self, transactions):
+        """Vectorized scoring of a columnar batch (DataFrame or dict of value/currency/counterparty arrays).
+
+        Reports one summary to SystemState instead of one alert per row.
+        """
+        result = assess_batch(transactions)
+        self.system_state.minni_latest_operation["RiskAI"] = (
+            f"Batch-assessed {result['count']} transactions. "
+            f"Mean score: {result['mean_score']:.1f}, max: {result['max_score']}"
+        )
+        if result["high_risk_count"]:
+            self.system_state.minni_alerts["RiskAI"].append(
+                f"High risk detected in {result['high_risk_count']} of {result['count']} transactions (max score: {result['max_score']})",
+                severity="critical",
+            )
+        return result
+
+class _Compliance(Layer):
+    __slots__ = ("screening",)
+
+    def __init__(self, system_state, screening):
+        super().__init__(system_state)
+        self.screening = screening
+        self._system_state.minni_status["ComplianceAI"] = "Active"
+        self._system_state.minni_latest_operation["ComplianceAI"] = "Compliance AI initialized, checking regulations."
+    @timed("compliance_ai.check_compliance")
+    def check_compliance(self, user_info, transaction_info):
+        """Screens the user's country and address and the transaction's counterparties."""
+        matches = []
+        if "sanctioned_country" in user_info: # Explicit flag set by upstream KYC
+            matches.append("user flagged as being in a sanctioned country")
+        country = user_info.get("country")
+        list_name = self.screening.screen_country(country)
+        if list_name:
+            matches.append(f"country {country} is on {list_name}")
+        addresses = [user_info.get("address")] + [transaction_info.get(field) for field in ("counterparty", "to", "from")]
+        for address, list_name in self.screening.screen_addresses([a for a in addresses if isinstance(a, str)]).items():
+            matches.append(f"address {address} is on {list_name}")
+        self.system_state.minni_latest_operation["ComplianceAI"] = "Performed compliance checks."
+        if matches:
+            self.system_state.minni_alerts["ComplianceAI"].append(f"Non-compliant user detected: {user_info.get('id')} ({'; '.join(matches)})", severity="critical")
+        return {"compliant": not matches, "matches": matches}
+    @timed("compliance_ai.check_compliance_batch")
+    def check_compliance_batch(self, counterparties):
+        """Screens thousands of counterparty addresses in one call; returns {address: list name} for the listed ones."""
+        matches = self.screening.screen_addresses(counterparties)
+        self.system_state.minni_latest_operation["ComplianceAI"] = f"Screened {len(counterparties)} counterparties, {len(matches)} listed."
+        if matches:
+            self.system_state.minni_alerts["ComplianceAI"].append(
+                f"{len(matches)} listed counterparties in batch, e.g. {next(iter(matches))}",
+                severity="critical",
+            )
+        return matches
+
+class _Consensus(Layer):
+    __slots__ = ("rpc", "quorum")
+
+    def __init__(self, system_state, rpc=None, quorum=2):
+        super().__init__(system_state)
+        self.rpc = rpc
+        self.quorum = quorum
+        self._system_state.minni_status["ConsensusAI"] = "Active"
+        self._system_state.minni_latest_operation["ConsensusAI"] = "Consensus AI active, validating decisions."
+    @timed("consensus_ai.validate_action")
+    def validate_action(self, proposed_action):
+        self.system_state.minni_latest_operation["ConsensusAI"] = f"Validating action: {proposed_action.get('type')}"
+        read = proposed_action.get("read")
+        if proposed_action.get("critical", False) and read:
+            return self._validate_read(proposed_action.get("type"), *read)
+        # Simulate consensus
+        if proposed_action.get("critical", False) and secrets.randbelow(10) < 2:
+            self.system_state.minni_alerts["ConsensusAI"].append(f"Consensus disagreement on critical action: {proposed_action.get('type')}", severity="warning")
+            return False
+        return True
+
+    def _validate_read(self, action_type, method, params):
+        """Asks every RPC provider for the (method, params) read a critical action depends on."""
+        call_quorum = getattr(self.rpc, "call_quorum", None)
+        if call_quorum is None: # No client, or a single provider with nobody to disagree with
+            return True
+        try:
+            agreement = call_quorum(method, params, k=self.quorum)
+        except Exception as e:
+            self.system_state.minni_alerts["ConsensusAI"].append(f"Could not cross-check {method} for {action_type}: {e}", severity="warning")
+            return False
+        if not agreement.agreed:
+            self.system_state.minni_alerts["ConsensusAI"].append(
+                f"RPC providers disagree on {method} for critical action {action_type}: no {agreement.k} of {len(agreement.votes)} answers match",
+                severity="warning",
+            )
+            return False
+        self.system_state.minni_latest_operation["ConsensusAI"] = f"{agreement.k} of {len(self.rpc.providers)} providers agree on {method} for {action_type}"
+        return True
+
+class _SelfDefense(Layer):
+    __slots__ = ("detector",)
+
+    def __init__(self, system_state, detector):
+        super().__init__(system_state)
+        self.detector = detector
+        self._system_state.minni_status["SelfDefenseAI"] = "Monitoring"
+        self._system_state.minni_latest_operation["SelfDefenseAI"] = "Self-Defense AI scanning for threats."
+    def monitor(self, kind, key=None, value=None):
+        """Feeds one live event (a rerun, a balance check) to the shared detector; O(1), so it runs on every rerun."""
+        anomalies = self.detector.observe(kind, key, value)
+        if anomalies:
+            self._report(anomalies)
+        return anomalies
+    @timed("self_defense_ai.detect_threat")
+    def detect_threat(self, data_stream):
+        """Streams `data_stream` (Events or raw request dicts) through the detector; True if anything stood out."""
+        anomalies = list(self.detector.scan(as_events(data_stream)))
+        threat_level = max((anomaly.level for anomaly in anomalies), default=0)
+        self.system_state.minni_latest_operation["SelfDefenseAI"] = f"Threat detection scan. Level: {threat_level}"
+        if anomalies:
+            self._report(anomalies)
+            return True
+        return False
+    def _report(self, anomalies):
+        for anomaly in anomalies:
+            self.system_state.minni_alerts["SelfDefenseAI"].append(f"Potential threat detected (Level: {anomaly.level}): {anomaly}.", severity=anomaly.severity)
+
+
+def build_layers(system_state, screening, detector, rpc=None, quorum=2):
+    """The AI layers an EvaluationPipeline runs, keyed like the app's session backend."""
+    return {
+        "transfer_ai": _Transfer(system_state),
+        "risk_ai": _Risk(system_state),
+        "compliance_ai": _Compliance(system_state, screening),
+        "consensus_ai": _Consensus(system_state, rpc, quorum),
+        "self_defense_ai": _SelfDefense(system_state, detector),
+    }
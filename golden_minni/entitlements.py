@@ -0,0 +1,237 @@
+"""Premium entitlements per payer: an in-memory TTL cache over a local SQLite (WAL) table.
+
+Payer addresses are public on-chain, so a visitor only gets a payer's premium after
+proving control of the address: signing `payer_challenge` with its key. A verified
+payer can be carried across reloads in an HMAC access token.
+"""
+import hashlib
+import hmac
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entitlements (
+    payer TEXT PRIMARY KEY,
+    premium INTEGER NOT NULL,
+    expires_at REAL,
+    total_wei TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def payer_challenge(payer, nonce):
+    """Message the visitor signs (EIP-191 personal_sign) with `payer`'s key; `nonce` is per session."""
+    return f"OraculumX premium access\nAddress: {payer.strip().lower()}\nNonce: {nonce}"
+
+
+def verify_payer_signature(payer, message, signature):
+    """True when `signature` over `message` was made by `payer`'s key."""
+    from eth_account import Account # Slow import, only needed once a signature is submitted
+    from eth_account.messages import encode_defunct
+
+    try:
+        signer = Account.recover_message(encode_defunct(text=message), signature=signature.strip())
+    except Exception:
+        return False # Malformed signatures are simply not proof
+    return signer.lower() == payer.strip().lower()
+
+
+def _token_digest(secret, payer, expires_at):
+    return hmac.new(secret, f"{payer}.{expires_at}".encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def issue_access_token(secret, payer, expires_at):
+    """Token proving `payer` was verified, valid until `expires_at` (epoch seconds)."""
+    payer, expires_at = payer.strip().lower(), int(expires_at)
+    return f"{payer}.{expires_at}.{_token_digest(secret, payer, expires_at)}"
+
+
+def read_access_token(secret, token, now=None):
+    """Payer of a valid, unexpired access token, or None."""
+    try:
+        payer, expires_at, digest = token.split(".")
+        expires_at = int(expires_at)
+    except (AttributeError, ValueError):
+        return None
+    if expires_at <= (now if now is not None else time.time()):
+        return None
+    if not hmac.compare_digest(digest, _token_digest(secret, payer, expires_at)):
+        return None
+    return payer
+
+
+class Entitlement:
+    """Premium status of one payer; `expires_at` is None for access that never lapses."""
+    __slots__ = ("payer", "premium", "expires_at", "total_wei", "updated_at")
+
+    def __init__(self, payer, premium, expires_at, total_wei, updated_at):
+        self.payer = payer
+        self.premium = premium
+        self.expires_at = expires_at
+        self.total_wei = total_wei
+        self.updated_at = updated_at
+
+    def active(self, now=None):
+        if not self.premium:
+            return False
+        return self.expires_at is None or (now if now is not None else time.time()) < self.expires_at
+
+    def __repr__(self):
+        return f"Entitlement({self.payer!r}, premium={self.premium}, expires_at={self.expires_at})"
+
+
+class EntitlementStore:
+    """Shared answer to "is this payer premium?", persisted across reloads and restarts.
+
+    Lookups hit an LRU of at most `max_cached` payers, each entry kept for `ttl`
+    seconds (never past its expiry); misses read the SQLite row and check it against
+    the payment totals in `payments` (a PaymentStore), catching up on payments the
+    row does not count yet: those indexed before it existed, or by a poll whose
+    `record_payments` call failed. `record_payments` is the invalidation path: the
+    payment indexer calls it with every block's new payments.
+
+    Premium needs at least `min_wei` paid in total. With `duration` (seconds) it
+    lapses that long after being granted, and new payments worth `min_wei` extend it.
+    """
+
+    def __init__(self, path, payments, min_wei, duration=None, ttl=30.0, max_cached=10000):
+        self.path = path
+        self.payments = payments
+        self.min_wei = min_wei
+        self.duration = duration
+        self.ttl = ttl
+        self.max_cached = max_cached
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+        self._cache = OrderedDict() # payer -> (Entitlement, cached until)
+        self._generation = 0 # Bumped by invalidate, so a lookup racing a payment does not cache what it read before
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self):
+        # SQLite connections must not be shared across threads; keep one per thread.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _read(self, payer):
+        row = self._connection().execute(
+            "SELECT premium, expires_at, total_wei, updated_at FROM entitlements WHERE payer = ?", (payer,)
+        ).fetchone()
+        if row is None:
+            return None
+        return Entitlement(payer, bool(row[0]), row[1], int(row[2]), row[3])
+
+    def _write(self, conn, entitlement):
+        conn.execute(
+            "INSERT OR REPLACE INTO entitlements (payer, premium, expires_at, total_wei, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (entitlement.payer, int(entitlement.premium), entitlement.expires_at, str(entitlement.total_wei), entitlement.updated_at),
+        )
+
+    def _grant(self, payer, previous, total_wei, new_wei, now):
+        """Entitlement after `new_wei` more was paid, `total_wei` in all."""
+        if self.duration is None:
+            return Entitlement(payer, total_wei >= self.min_wei, None, total_wei, now)
+        if (previous is None and total_wei >= self.min_wei) or new_wei >= self.min_wei:
+            # Renewals stack onto time that is left
+            start = max(previous.expires_at or now, now) if previous is not None and previous.premium else now
+            return Entitlement(payer, True, start + self.duration, total_wei, now)
+        if previous is not None:
+            return Entitlement(payer, previous.premium, previous.expires_at, total_wei, now)
+        return Entitlement(payer, False, None, total_wei, now)
+
+    def _cache_put(self, entitlement, now, generation):
+        until = now + self.ttl
+        if entitlement.premium and entitlement.expires_at is not None:
+            until = min(until, entitlement.expires_at) # Expiry is never served late from the cache
+        with self._cache_lock:
+            if generation != self._generation:
+                return
+            self._cache[entitlement.payer] = (entitlement, until)
+            self._cache.move_to_end(entitlement.payer)
+            if len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+
+    def get(self, payer):
+        payer = payer.strip().lower()
+        now = time.time()
+        with self._cache_lock:
+            cached = self._cache.get(payer)
+            if cached is not None and now < cached[1]:
+                self._cache.move_to_end(payer)
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+            generation = self._generation
+        entitlement = self._read(payer)
+        total_wei = self.payments.total_paid_wei(payer)
+        if entitlement is None or entitlement.total_wei < total_wei:
+            with self._write_lock:
+                existing = self._read(payer) # record_payments may have written the row since
+                if existing is None or existing.total_wei < total_wei:
+                    entitlement = self._grant(payer, existing, total_wei, total_wei - (existing.total_wei if existing else 0), now)
+                    if total_wei:
+                        self._write(self._connection(), entitlement)
+                else:
+                    entitlement = existing
+        self._cache_put(entitlement, now, generation)
+        return entitlement
+
+    def is_premium(self, payer):
+        return bool(payer and payer.strip()) and self.get(payer).active()
+
+    def record_payments(self, payments):
+        """Updates the payers of newly indexed `payments` and drops them from the cache.
+
+        What counts as newly paid is the payment total minus what the row already
+        counts, so payments a lookup has caught up on are not granted twice.
+        """
+        payers = {payment["sender"] for payment in payments}
+        if not payers:
+            return []
+        now = time.time()
+        conn = self._connection()
+        updated = []
+        with self._write_lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for payer in payers:
+                    previous, total_wei = self._read(payer), self.payments.total_paid_wei(payer)
+                    entitlement = self._grant(payer, previous, total_wei, total_wei - (previous.total_wei if previous else 0), now)
+                    self._write(conn, entitlement)
+                    updated.append(entitlement)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        self.invalidate(payers)
+        return updated
+
+    def invalidate(self, payers=None):
+        """Drops `payers` (all when None) from the cache; the next lookup reads SQLite."""
+        with self._cache_lock:
+            self._generation += 1
+            if payers is None:
+                self._cache.clear()
+            else:
+                for payer in payers:
+                    self._cache.pop(payer.lower(), None)
+
+    def stats(self):
+        with self._cache_lock:
+            return {"cached": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,273 @@
+"""In-process timing spans, counters and histograms, exported in Prometheus text format.
+
+Everything reports into the module-level METRICS registry, which starts disabled:
+while it is, `span` hands back a shared no-op context manager and `timed` wrappers
+only check one flag before calling through, so instrumented hot paths cost next to
+nothing. Counters that other components already keep (pool errors, cache hits) are
+pulled in by collectors at scrape time instead of being counted twice.
+"""
+import bisect
+import functools
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Span durations in seconds, from cache hits to upstream timeouts
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = value
+
+
+class Histogram:
+    """Cumulative-bucket histogram with the running sum and count Prometheus expects."""
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1) # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (0 when empty)."""
+        counts, _, count = self.snapshot()
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("registry", "name", "started")
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.observe_span(self.name, time.perf_counter() - self.started, failed=exc_type is not None)
+        return False
+
+
+class MetricsRegistry:
+    """Named metric families keyed by label set, plus collectors read at scrape time.
+
+    Families are created on first use: `counter`, `gauge` and `histogram` return the
+    metric for the given labels. Collectors are callables returning
+    (name, kind, help, labels, value) tuples for counters and gauges kept elsewhere.
+    """
+
+    def __init__(self, enabled=False, prefix="minni"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._families = {} # name -> [kind, help, {label key: metric}]
+        self._collectors = []
+        self._spans = {} # span name -> histogram, skips the label lookup on every observation
+
+    def _metric(self, kind, factory, name, help, labels):
+        key = _label_key(labels)
+        family = self._families.get(name)
+        if family is None or key not in family[2]:
+            with self._lock:
+                family = self._families.setdefault(name, [kind, help, {}])
+                if family[0] != kind:
+                    raise ValueError(f"Metric {name} is already registered as a {family[0]}")
+                family[2].setdefault(key, factory())
+        return family[2][key]
+
+    def counter(self, name, help="", **labels):
+        return self._metric("counter", Counter, f"{self.prefix}_{name}", help, labels)
+
+    def gauge(self, name, help="", **labels):
+        return self._metric("gauge", Gauge, f"{self.prefix}_{name}", help, labels)
+
+    def histogram(self, name, help="", buckets=DEFAULT_BUCKETS, **labels):
+        return self._metric("histogram", lambda: Histogram(buckets), f"{self.prefix}_{name}", help, labels)
+
+    def add_collector(self, collector):
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def span(self, name):
+        """Context manager timing the enclosed block as span `name`."""
+        if not self.enabled:
+            return NOOP_SPAN
+        return _Span(self, name)
+
+    def observe_span(self, name, seconds, failed=False):
+        histogram = self._spans.get(name)
+        if histogram is None:
+            histogram = self._spans[name] = self.histogram("span_seconds", "Duration of instrumented hot paths", span=name)
+        histogram.observe(seconds)
+        if failed:
+            self.counter("span_errors_total", "Instrumented calls that raised", span=name).inc()
+
+    def timed(self, name):
+        """Decorator recording every call of the function as span `name`."""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                started = time.perf_counter()
+                failed = True
+                try:
+                    result = func(*args, **kwargs)
+                    failed = False
+                    return result
+                finally:
+                    self.observe_span(name, time.perf_counter() - started, failed)
+            return wrapper
+        return decorate
+
+    def span_summary(self):
+        """Per-span count, average and bucketed p50/p99 in ms, for the debug panel."""
+        family = self._families.get(f"{self.prefix}_span_seconds")
+        summary = {}
+        for key, histogram in sorted((family[2] if family else {}).items()):
+            _, total, count = histogram.snapshot()
+            summary[dict(key)["span"]] = {
+                "count": count,
+                "avg_ms": round(1000 * total / count, 3) if count else 0.0,
+                "p50_ms_le": 1000 * histogram.quantile(0.5),
+                "p99_ms_le": 1000 * histogram.quantile(0.99),
+            }
+        return summary
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            families = [(name, kind, help, list(metrics.items())) for name, (kind, help, metrics) in sorted(self._families.items())]
+            collectors = list(self._collectors)
+        for name, kind, help, metrics in families:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, metric in metrics:
+                if kind == "histogram":
+                    counts, total, count = metric.snapshot()
+                    cumulative = 0
+                    for bound, bucket_count in zip(metric.buckets + (float("inf"),), counts):
+                        cumulative += bucket_count
+                        lines.append(f"{name}_bucket{_format_labels(key, [('le', _format_value(bound))])} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(total)}")
+                    lines.append(f"{name}_count{_format_labels(key)} {count}")
+                else:
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(metric.value)}")
+        collected = {}
+        for collector in collectors:
+            try:
+                samples = list(collector())
+            except Exception:
+                continue # A broken collector must not take the whole scrape down
+            for name, kind, help, labels, value in samples:
+                collected.setdefault(f"{self.prefix}_{name}", (kind, help, []))[2].append((_label_key(labels), value))
+        for name, (kind, help, samples) in sorted(collected.items()):
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, value in samples:
+                lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+span = METRICS.span
+timed = METRICS.timed
+
+
+def serve_metrics(registry=METRICS, port=9464, host="127.0.0.1"):
+    """Serves `registry` at http://host:port/metrics from a daemon thread; returns the server."""
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
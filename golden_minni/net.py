@@ -0,0 +1,227 @@
+"""Process-wide pooled HTTP layer shared by the Etherscan client and the Web3 provider."""
+import itertools
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from golden_minni.metrics import METRICS, timed
+
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+# JSON-RPC methods that only read chain state, so sending one twice is harmless.
+# Anything else, eth_sendRawTransaction above all, is sent exactly once.
+READ_METHODS = frozenset([
+    "eth_blockNumber", "eth_chainId", "eth_gasPrice", "eth_getBalance", "eth_getBlockByNumber", "eth_getBlockByHash",
+    "eth_getTransactionByHash", "eth_getTransactionCount", "eth_getTransactionReceipt", "eth_getLogs", "eth_call",
+    "eth_estimateGas", "eth_feeHistory", "net_version",
+    "getBalance", "getSignaturesForAddress", "getTransaction", # Solana
+])
+
+
+class HttpPool:
+    """Connection-pooled HTTP session with timeouts, retry/backoff and usage counters.
+
+    One instance is meant to be shared by the whole process so that keep-alive
+    connections are reused instead of paying a TLS handshake per call.
+    """
+
+    def __init__(self, pool_size=20, timeout=10.0, retries=3, backoff=0.5):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=tuple(RETRY_STATUSES),
+            allowed_methods=frozenset(["GET"]), # POSTs are JSON-RPC; JsonRpcClient retries the read-only ones itself
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        self._adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+        # Hooks also fire for requests made by Web3 through this session
+        self.session.hooks["response"].append(self._record_response)
+        self._lock = threading.Lock()
+        self._responses = 0
+        self._errors = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        try:
+            return self.session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            with self._lock:
+                self._errors += 1
+            raise
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def _record_response(self, response, *args, **kwargs):
+        latency = response.elapsed.total_seconds()
+        with self._lock:
+            self._responses += 1
+            self._latency_total += latency
+            self._latency_max = max(self._latency_max, latency)
+            if response.status_code >= 400:
+                self._errors += 1
+
+    def _connection_counts(self):
+        opened = 0
+        requests_sent = 0
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                requests_sent += pool.num_requests
+        return opened, requests_sent
+
+    def stats(self):
+        """Counters for the host pools currently held by the adapter."""
+        opened, requests_sent = self._connection_counts()
+        with self._lock:
+            responses = self._responses
+            return {
+                "pool_size": self.pool_size,
+                "connections_opened": opened,
+                "connections_reused": max(requests_sent - opened, 0),
+                "responses": responses,
+                "errors": self._errors,
+                "latency_avg_ms": round(1000 * self._latency_total / responses, 2) if responses else 0.0,
+                "latency_max_ms": round(1000 * self._latency_max, 2),
+            }
+
+    def close(self):
+        self.session.close()
+
+
+class JsonRpcError(Exception):
+    """Raised when a JSON-RPC node answers with an error object."""
+
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+
+
+def _retry_after(response):
+    """Seconds asked for by a numeric Retry-After header, or 0."""
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", 0)))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _error_from(error):
+    """JsonRpcError for a response's "error" member, which some nodes send as a bare string."""
+    if isinstance(error, dict):
+        return JsonRpcError(error.get("message", "JSON-RPC error"), error.get("code"))
+    return JsonRpcError(str(error))
+
+
+class JsonRpcClient:
+    """Minimal JSON-RPC 2.0 client that sends calls through a shared HttpPool.
+
+    Requests made only of READ_METHODS are retried up to `retries` times, with
+    exponential backoff, after a transport error or a 429/5xx answer. Retries go
+    through `http` like the first attempt, so each takes its own rate-limit token.
+    """
+
+    def __init__(self, http, url, max_batch_size=100, retries=0, backoff=0.5):
+        self.http = http
+        self.url = url
+        self.max_batch_size = max_batch_size
+        self.retries = retries
+        self.backoff = backoff
+        self.retried = 0 # Attempts repeated after a retryable failure
+        self._ids = itertools.count(1)
+
+    def _post(self, payload, methods):
+        attempts = 1 + (self.retries if all(method in READ_METHODS for method in methods) else 0)
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            delay = self.backoff * 2 ** attempt
+            try:
+                response = self.http.post(self.url, json=payload)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if last:
+                    raise
+            else:
+                if last or response.status_code not in RETRY_STATUSES:
+                    return response
+                delay = max(delay, _retry_after(response))
+            self.retried += 1
+            if METRICS.enabled:
+                METRICS.counter("rpc_retries_total", "Read-only JSON-RPC requests sent again after a failure").inc()
+            time.sleep(delay)
+
+    @timed("rpc.call")
+    def call(self, method, params=()):
+        payload = {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": list(params)}
+        try:
+            response = self._post(payload, [method])
+            response.raise_for_status()
+            data = response.json()
+            if not isinstance(data, dict):
+                raise ValueError(f"Invalid JSON-RPC response: {data!r:.100}")
+            if data.get("error"):
+                raise _error_from(data["error"])
+        except Exception:
+            if METRICS.enabled:
+                METRICS.counter("upstream_errors_total", "Failed upstream calls by source", source="rpc").inc()
+            raise
+        return data.get("result")
+
+    def batch(self, calls):
+        """Sends `(method, params)` calls as JSON-RPC batches of at most `max_batch_size`.
+
+        Returns one entry per call, in order: the result, or the exception for calls
+        whose item or whole batch failed, so callers can merge partial results.
+        """
+        results = []
+        for start in range(0, len(calls), self.max_batch_size):
+            results.extend(self._send_batch(calls[start:start + self.max_batch_size]))
+        return results
+
+    @timed("rpc.batch")
+    def _send_batch(self, calls):
+        ids = [next(self._ids) for _ in calls]
+        payload = [
+            {"jsonrpc": "2.0", "id": request_id, "method": method, "params": list(params)}
+            for request_id, (method, params) in zip(ids, calls)
+        ]
+        try:
+            response = self._post(payload, [method for method, _ in calls])
+            response.raise_for_status()
+            data = response.json()
+            if not isinstance(data, list): # Nodes answer a rejected batch with a single error object
+                if isinstance(data, dict) and data.get("error"):
+                    raise _error_from(data["error"])
+                raise JsonRpcError("Invalid batch response")
+        except (requests.exceptions.RequestException, ValueError, JsonRpcError) as e:
+            if METRICS.enabled:
+                METRICS.counter("upstream_errors_total", "Failed upstream calls by source", source="rpc").inc()
+            return [e] * len(calls)
+        by_id = {item.get("id"): item for item in data if isinstance(item, dict)}
+        results = []
+        for request_id in ids:
+            item = by_id.get(request_id)
+            if item is None:
+                results.append(JsonRpcError(f"Missing response for request {request_id}"))
+            elif item.get("error"):
+                results.append(_error_from(item["error"]))
+            else:
+                results.append(item.get("result"))
+        return results
@@ -0,0 +1,224 @@
+"""Incremental block-scanning payment indexer backed by a local SQLite (WAL) store."""
+import sqlite3
+import threading
+import time
+
+CURSOR_NAME = "payments"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS payments (
+    tx_hash TEXT PRIMARY KEY,
+    sender TEXT NOT NULL,
+    receiver TEXT NOT NULL,
+    value_wei TEXT NOT NULL,
+    block_number INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS payments_by_sender ON payments (sender);
+CREATE TABLE IF NOT EXISTS payer_totals (
+    sender TEXT PRIMARY KEY,
+    total_wei TEXT NOT NULL,
+    payment_count INTEGER NOT NULL,
+    last_block INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cursors (
+    name TEXT PRIMARY KEY,
+    block_number INTEGER NOT NULL
+);
+"""
+
+
+class PaymentStore:
+    """Incoming payments indexed by tx hash and sender, plus the indexer's block cursor.
+
+    Wei amounts overflow SQLite integers, so they are stored as decimal text and
+    per-payer totals are kept in their own table to make entitlement checks a
+    single primary-key lookup.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+
+    def _connection(self):
+        # SQLite connections must not be shared across threads; keep one per thread.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def cursor(self, name=CURSOR_NAME):
+        row = self._connection().execute("SELECT block_number FROM cursors WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def record_block(self, block_number, payments, name=CURSOR_NAME):
+        """Stores a block's payments and advances the cursor in one transaction.
+
+        Returns the payments that were not already known.
+        """
+        conn = self._connection()
+        added = []
+        with self._write_lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for payment in payments:
+                    inserted = conn.execute(
+                        "INSERT OR IGNORE INTO payments (tx_hash, sender, receiver, value_wei, block_number) VALUES (?, ?, ?, ?, ?)",
+                        (payment["tx_hash"], payment["sender"], payment["receiver"], str(payment["value_wei"]), block_number),
+                    ).rowcount
+                    if not inserted:
+                        continue
+                    row = conn.execute(
+                        "SELECT total_wei, payment_count FROM payer_totals WHERE sender = ?", (payment["sender"],)
+                    ).fetchone()
+                    total, count = (int(row[0]), row[1]) if row else (0, 0)
+                    conn.execute(
+                        "INSERT OR REPLACE INTO payer_totals (sender, total_wei, payment_count, last_block) VALUES (?, ?, ?, ?)",
+                        (payment["sender"], str(total + int(payment["value_wei"])), count + 1, block_number),
+                    )
+                    added.append(payment)
+                conn.execute(
+                    "INSERT OR REPLACE INTO cursors (name, block_number) VALUES (?, ?)", (name, block_number)
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return added
+
+    def total_paid_wei(self, sender):
+        row = self._connection().execute(
+            "SELECT total_wei FROM payer_totals WHERE sender = ?", (sender.lower(),)
+        ).fetchone()
+        return int(row[0]) if row else 0
+
+    def payments_from(self, sender):
+        rows = self._connection().execute(
+            "SELECT tx_hash, receiver, value_wei, block_number FROM payments WHERE sender = ? ORDER BY block_number",
+            (sender.lower(),),
+        ).fetchall()
+        return [
+            {"tx_hash": tx_hash, "sender": sender.lower(), "receiver": receiver, "value_wei": int(value), "block_number": block}
+            for tx_hash, receiver, value, block in rows
+        ]
+
+    def payments_to(self, receiver, limit=25):
+        """Newest `limit` payments to `receiver`."""
+        rows = self._connection().execute(
+            "SELECT tx_hash, sender, value_wei, block_number FROM payments WHERE receiver = ? ORDER BY block_number DESC LIMIT ?",
+            (receiver.lower(), limit),
+        ).fetchall()
+        return [
+            {"tx_hash": tx_hash, "sender": sender, "receiver": receiver.lower(), "value_wei": int(value), "block_number": block}
+            for tx_hash, sender, value, block in rows
+        ]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def extract_payments(block, receiving_addresses):
+    """Picks the value transfers in a full-transaction block that pay one of `receiving_addresses`."""
+    payments = []
+    for tx in block.get("transactions") or []:
+        receiver = (tx.get("to") or "").lower()
+        value = int(tx.get("value") or "0x0", 16)
+        if receiver in receiving_addresses and value > 0:
+            payments.append({
+                "tx_hash": tx["hash"].lower(),
+                "sender": tx["from"].lower(),
+                "receiver": receiver,
+                "value_wei": value,
+            })
+    return payments
+
+
+class PaymentIndexer:
+    """Follows new blocks from the persisted cursor and records payments to our addresses.
+
+    Only blocks at least `confirmations` deep are indexed. Without a saved cursor the
+    indexer starts at `start_block`, or at the current safe head when none is given,
+    and afterwards always resumes where it stopped instead of rescanning the chain.
+    `on_payments`, if given, is called from the indexer thread with each block's new
+    payments as soon as the block is recorded, which makes the indexer an event feed
+    for other components.
+    """
+
+    def __init__(self, rpc, store, receiving_addresses, confirmations=2, start_block=None,
+                 max_blocks_per_poll=50, interval=12.0, on_payments=None):
+        self.rpc = rpc
+        self.store = store
+        self.receiving_addresses = {address.lower() for address in receiving_addresses}
+        self.confirmations = confirmations
+        self.start_block = start_block
+        self.max_blocks_per_poll = max_blocks_per_poll
+        self.interval = interval
+        self.on_payments = on_payments
+        self.last_error = None
+        self.last_poll_at = None
+        self.caught_up = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _fetch_blocks(self, numbers):
+        # One batched round trip for the whole range instead of one call per block
+        return self.rpc.batch([("eth_getBlockByNumber", [hex(number), True]) for number in numbers])
+
+    def poll_once(self):
+        """Indexes the next batch of confirmed blocks and returns the new payments found."""
+        head = int(self.rpc.call("eth_blockNumber"), 16)
+        safe_head = head - self.confirmations
+        cursor = self.store.cursor()
+        if cursor is None:
+            cursor = (self.start_block if self.start_block is not None else safe_head) - 1
+        last = min(safe_head, cursor + self.max_blocks_per_poll)
+        found = []
+        self.caught_up = last >= safe_head
+        numbers = list(range(cursor + 1, last + 1))
+        for number, block in zip(numbers, self._fetch_blocks(numbers)):
+            if isinstance(block, Exception): # Blocks before it are already recorded
+                raise block
+            if block is None: # Node has not caught up; retry on the next poll
+                self.caught_up = True
+                break
+            added = self.store.record_block(number, extract_payments(block, self.receiving_addresses))
+            if added and self.on_payments is not None:
+                # Per block, so a later block failing cannot keep recorded payments from listeners
+                self.on_payments(added)
+            found.extend(added)
+        self.last_poll_at = time.time()
+        return found
+
+    def has_paid(self, sender, min_wei):
+        return self.store.total_paid_wei(sender) >= min_wei
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="payment-indexer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = f"Payment indexer error: {e}"
+                self.caught_up = True # Back off instead of hammering a failing node
+            if self.caught_up:
+                self._stop.wait(self.interval)
@@ -0,0 +1,125 @@
+"""Concurrent evaluation of transfer requests through the Golden Minni AI layers."""
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+STAGES = ("transfer", "risk", "compliance", "threat", "consensus", "total")
+
+
+class StageLatency:
+    """Thread-safe per-stage latency counters (count, average and max in ms)."""
+
+    def __init__(self, stages=STAGES):
+        self._lock = threading.Lock()
+        self._stats = {stage: [0, 0.0, 0.0] for stage in stages}
+
+    def record(self, stage, seconds):
+        with self._lock:
+            stats = self._stats[stage]
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+
+    def summary(self):
+        with self._lock:
+            return {
+                stage: {"count": count, "avg_ms": round(1000 * total / count, 3) if count else 0.0, "max_ms": round(1000 * worst, 3)}
+                for stage, (count, total, worst) in self._stats.items()
+            }
+
+
+def _timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+class EvaluationPipeline:
+    """Runs a transfer request through every layer and returns one combined decision.
+
+    The transfer layer takes the request in first; the independent risk, compliance
+    and threat checks then run concurrently on a thread pool, and consensus is only
+    asked once all three pass. Threads (not processes) are used because the layers
+    report into the shared SystemState. Each check runs in a copy of the caller's
+    context, so layers shared by many sessions report into the caller's
+    SystemState (see golden_minni.core.use_system_state).
+    """
+
+    def __init__(self, transfer_ai, risk_ai, compliance_ai, consensus_ai, self_defense_ai, max_workers=4, executor=None):
+        self.transfer_ai = transfer_ai
+        self.risk_ai = risk_ai
+        self.compliance_ai = compliance_ai
+        self.consensus_ai = consensus_ai
+        self.self_defense_ai = self_defense_ai
+        self.latency = StageLatency()
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="minni-pipeline")
+
+    def _submit(self, func, *args):
+        # A context can only be entered by one thread at a time, so each check gets its own copy
+        return self._executor.submit(contextvars.copy_context().run, _timed, func, *args)
+
+    def _submit_checks(self, request):
+        transfer, seconds = _timed(self.transfer_ai.process_request, request)
+        self.latency.record("transfer", seconds)
+        checks = {
+            "risk": self._submit(self.risk_ai.assess, request),
+            "compliance": self._submit(self.compliance_ai.check_compliance, request.get("user", {}), request),
+            "threat": self._submit(self.self_defense_ai.detect_threat, request.get("events", [request])),
+        }
+        return transfer, checks
+
+    def _decide(self, request, started, transfer, checks):
+        results = {}
+        for stage, future in checks.items():
+            results[stage], seconds = future.result()
+            self.latency.record(stage, seconds)
+        decision = {
+            "request_id": request.get("id"),
+            "transfer": transfer,
+            "risk": results["risk"],
+            "compliance": results["compliance"],
+            "threat": results["threat"],
+            "consensus": None,
+        }
+        reasons = []
+        if results["risk"].get("risk") == "high":
+            reasons.append("high risk")
+        if not results["compliance"].get("compliant", False):
+            reasons.append("non-compliant")
+        if results["threat"]:
+            reasons.append("threat detected")
+        if not reasons:
+            action = {"type": request.get("type", "transfer"), "critical": request.get("critical", False), "read": request.get("read")}
+            decision["consensus"], seconds = _timed(self.consensus_ai.validate_action, action)
+            self.latency.record("consensus", seconds)
+            if not decision["consensus"]:
+                reasons.append("consensus rejected")
+        decision["approved"] = not reasons
+        decision["reasons"] = reasons
+        total = time.perf_counter() - started
+        self.latency.record("total", total)
+        decision["latency_ms"] = round(1000 * total, 3)
+        return decision
+
+    def evaluate(self, request):
+        started = time.perf_counter()
+        transfer, checks = self._submit_checks(request)
+        return self._decide(request, started, transfer, checks)
+
+    def evaluate_many(self, requests, concurrency=8):
+        """Yields decisions in request order, keeping at most `concurrency` requests in flight."""
+        in_flight = deque()
+        for request in requests:
+            started = time.perf_counter()
+            in_flight.append((request, started) + self._submit_checks(request))
+            if len(in_flight) >= concurrency:
+                yield self._decide(*in_flight.popleft())
+        while in_flight:
+            yield self._decide(*in_flight.popleft())
+
+    def close(self):
+        if self._owns_executor:
+            self._executor.shutdown(wait=True)
@@ -0,0 +1,218 @@
+"""Hedged reads across several JSON-RPC providers, ranked by observed latency and errors."""
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError, as_completed, wait
+from urllib.parse import urlparse
+
+from golden_minni.metrics import METRICS
+from golden_minni.net import JsonRpcError
+
+# Never sent to more than one provider: a duplicate would race its own nonce
+WRITE_METHODS = frozenset(["eth_sendRawTransaction", "eth_sendTransaction"])
+
+
+class Provider:
+    """One RPC endpoint and its running latency and error statistics.
+
+    Latency is the median of the last `window` successful calls rather than a mean:
+    hedging already cuts off a provider's slow tail, so what decides who goes first
+    is how fast it usually answers.
+    """
+
+    def __init__(self, name, client, window=32, alpha=0.2):
+        self.name = name
+        self.client = client
+        self.alpha = alpha
+        self.latency = None # Median of recent successful call latencies, seconds
+        self.error_rate = 0.0 # EWMA of failures (1) and successes (0)
+        self._samples = deque(maxlen=window)
+        self.calls = 0
+        self.wins = 0 # Hedged calls this provider answered first
+        self._lock = threading.Lock()
+
+    def record(self, seconds, failed):
+        with self._lock:
+            self.calls += 1
+            self.error_rate += self.alpha * ((1.0 if failed else 0.0) - self.error_rate)
+            if not failed:
+                self._samples.append(seconds)
+                self.latency = sorted(self._samples)[len(self._samples) // 2]
+
+    def score(self):
+        """Lower is better; providers never measured come first so they get measured."""
+        with self._lock:
+            if self.latency is None:
+                return 0.0 if self.error_rate < 0.5 else float("inf")
+            return self.latency * (1 + 10 * self.error_rate)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "wins": self.wins,
+                "latency_ms": round(1000 * self.latency, 2) if self.latency is not None else None,
+                "error_rate": round(self.error_rate, 3),
+            }
+
+
+class Agreement:
+    """Outcome of a k-of-n read: the agreed result, if any, and what each provider answered."""
+    __slots__ = ("result", "agreed", "k", "votes")
+
+    def __init__(self, result, agreed, k, votes):
+        self.result = result
+        self.agreed = agreed
+        self.k = k
+        self.votes = votes # provider name -> result or exception
+
+    def __repr__(self):
+        return f"Agreement(agreed={self.agreed}, k={self.k}, votes={len(self.votes)})"
+
+
+def provider_names(urls):
+    """Short display names for `urls` (host, or host/n when a host repeats); keys in paths stay hidden."""
+    hosts = [urlparse(url).netloc or url for url in urls]
+    return [host if hosts.count(host) == 1 else f"{host}/{i}" for i, host in enumerate(hosts)]
+
+
+class HedgedRpcClient:
+    """JsonRpcClient look-alike that spreads reads over several providers.
+
+    A read goes to the best-ranked provider first. If no valid answer arrives within
+    `hedge_after` seconds the next one is asked too, up to `max_parallel` at once,
+    and the first valid answer wins. A transport failure moves on to the next
+    provider right away; a JSON-RPC error is final, since other nodes would give
+    it too. Every call, losers included, updates its provider's latency and error
+    rate, which decide the ranking. Every `explore_every`-th read starts at the
+    runner-up so a recovered provider can win its place back.
+    """
+
+    def __init__(self, providers, hedge_after=0.25, max_parallel=2, quorum_timeout=5.0, explore_every=20, executor=None):
+        if not providers:
+            raise ValueError("HedgedRpcClient needs at least one provider")
+        self.providers = list(providers)
+        self.hedge_after = hedge_after
+        self.max_parallel = max(1, min(max_parallel, len(self.providers)))
+        self.quorum_timeout = quorum_timeout
+        self.explore_every = explore_every
+        self.hedges = 0 # Reads that were sent to a second provider
+        self._reads = itertools.count(1)
+        self._executor = executor or ThreadPoolExecutor(max_workers=4 * len(self.providers), thread_name_prefix="rpc-hedge")
+
+    @property
+    def url(self):
+        return self.ranked()[0].client.url
+
+    def ranked(self):
+        return sorted(self.providers, key=Provider.score)
+
+    def _run(self, provider, func):
+        started = time.perf_counter()
+        try:
+            result = func(provider.client)
+        except JsonRpcError:
+            provider.record(time.perf_counter() - started, failed=False) # The node answered; the call was bad
+            raise
+        except Exception:
+            provider.record(time.perf_counter() - started, failed=True)
+            raise
+        failed = isinstance(result, list) and result and all(isinstance(item, Exception) for item in result)
+        provider.record(time.perf_counter() - started, failed=failed)
+        return result
+
+    def _hedged(self, func, valid):
+        ranked = self.ranked()
+        if self.explore_every and len(ranked) > 1 and next(self._reads) % self.explore_every == 0:
+            ranked[0], ranked[1] = ranked[1], ranked[0]
+        remaining = iter(ranked)
+        pending = {}
+        last_error = None
+
+        def launch():
+            provider = next(remaining, None)
+            if provider is not None:
+                pending[self._executor.submit(self._run, provider, func)] = provider
+            return provider is not None
+
+        launch()
+        launched = 1
+        while pending:
+            can_hedge = launched < len(ranked) and len(pending) < self.max_parallel
+            done, _ = wait(list(pending), timeout=self.hedge_after if can_hedge else None, return_when=FIRST_COMPLETED)
+            if not done: # Too slow: ask the next provider as well
+                launch()
+                launched += 1
+                self.hedges += 1
+                if METRICS.enabled:
+                    METRICS.counter("rpc_hedges_total", "Reads sent to a second provider after the hedge delay").inc()
+                continue
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    result = future.result()
+                except JsonRpcError:
+                    raise # Another provider would reject the call the same way
+                except Exception as e:
+                    last_error = e
+                else:
+                    if valid(result):
+                        provider.wins += 1
+                        return result
+                    last_error = result
+                if launch(): # Failed or invalid: fail over without waiting out the delay
+                    launched += 1
+        if isinstance(last_error, Exception):
+            raise last_error
+        return last_error # Every provider answered, none validly; hand back the last answer
+
+    def call(self, method, params=()):
+        if method in WRITE_METHODS:
+            return self.ranked()[0].client.call(method, params)
+        return self._hedged(lambda client: client.call(method, params), lambda result: True)
+
+    def batch(self, calls):
+        """Like JsonRpcClient.batch; an answer where every item failed counts as invalid."""
+        if not calls:
+            return [] # Nothing to send; keeps instant non-answers out of the latency stats
+        if any(method in WRITE_METHODS for method, _ in calls):
+            return self.ranked()[0].client.batch(calls)
+        return self._hedged(
+            lambda client: client.batch(calls),
+            lambda results: not all(isinstance(item, Exception) for item in results),
+        )
+
+    def call_quorum(self, method, params=(), k=2):
+        """Asks every provider and returns once `k` of them gave the same answer."""
+        k = max(1, min(k, len(self.providers)))
+        futures = {self._executor.submit(self._run, provider, lambda client: client.call(method, params)): provider for provider in self.providers}
+        votes = {}
+        tallies = {}
+        try:
+            for future in as_completed(futures, timeout=self.quorum_timeout):
+                name = futures[future].name
+                try:
+                    result = future.result()
+                except Exception as e:
+                    votes[name] = e
+                    continue
+                votes[name] = result
+                key = json.dumps(result, sort_keys=True, default=str)
+                tally = tallies.setdefault(key, [result, 0])
+                tally[1] += 1
+                if tally[1] >= k:
+                    return Agreement(result, True, k, votes)
+        except TimeoutError:
+            pass # Slow providers count as not agreeing
+        best = max(tallies.values(), key=lambda tally: tally[1], default=[None, 0])
+        return Agreement(best[0], False, k, votes)
+
+    def stats(self):
+        return {
+            "hedge_after_ms": round(1000 * self.hedge_after, 1),
+            "hedges": self.hedges,
+            "ranking": [provider.name for provider in self.ranked()],
+            "providers": {provider.name: provider.stats() for provider in self.providers},
+        }
@@ -0,0 +1,161 @@
+"""Cached rendering of payment QR codes (PNG through PIL, or SVG without it).
+
+qrcode is only imported on a cache miss: importing it also loads PIL whenever PIL
+is installed, which is a noticeable part of a cold start.
+"""
+import base64
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+ERROR_CORRECTION_LEVELS = ("L", "M", "Q", "H") # Resolved to qrcode.constants.ERROR_CORRECT_<level>
+
+MIME_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+
+def _make_qr(data, box_size, border, error_correction):
+    import qrcode
+
+    if error_correction not in ERROR_CORRECTION_LEVELS:
+        raise ValueError(f"Unknown QR error correction level: {error_correction}")
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=getattr(qrcode.constants, f"ERROR_CORRECT_{error_correction}"),
+        box_size=box_size,
+        border=border,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr
+
+
+def render_qr_png(data, box_size=10, border=4, error_correction="L"):
+    img = _make_qr(data, box_size, border, error_correction).make_image(fill_color="black", back_color="white")
+    buf = BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def render_qr_svg(data, box_size=10, border=4, error_correction="L"):
+    import qrcode.image.svg
+
+    # SvgPathImage only builds XML, so this path never draws through PIL
+    img = _make_qr(data, box_size, border, error_correction).make_image(image_factory=qrcode.image.svg.SvgPathImage)
+    return img.to_string()
+
+
+RENDERERS = {"png": render_qr_png, "svg": render_qr_svg}
+
+
+class QRCodeCache:
+    """LRU cache of base64-encoded QR images keyed by payload and render parameters.
+
+    At most `max_entries` images are kept in memory, so per-customer payment URIs
+    cannot grow it without limit. With `cache_dir` set, rendered images are also
+    written to disk and survive restarts; the disk store keeps the
+    `max_disk_entries` most recently used files (disk hits refresh a file's mtime).
+    """
+
+    def __init__(self, max_entries=256, cache_dir=None, max_disk_entries=4096):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def cache_key(data, fmt, box_size, border, error_correction):
+        params = json.dumps([data, fmt, box_size, border, error_correction])
+        return hashlib.sha256(params.encode("utf-8")).hexdigest()
+
+    def get(self, data, fmt="png", box_size=10, border=4, error_correction="L"):
+        """Base64 of the rendered QR code for `data`, rendering it only on a miss."""
+        key = self.cache_key(data, fmt, box_size, border, error_correction)
+        with self._lock:
+            encoded = self._entries.get(key)
+            if encoded is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return encoded
+        encoded = self._load(key, fmt)
+        with self._lock:
+            if encoded is not None:
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+        if encoded is None:
+            image = RENDERERS[fmt](data, box_size, border, error_correction)
+            encoded = base64.b64encode(image if isinstance(image, bytes) else image.encode("utf-8")).decode("utf-8")
+            self._store(key, fmt, encoded)
+        with self._lock:
+            self._entries[key] = encoded
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return encoded
+
+    def _path(self, key, fmt):
+        return os.path.join(self.cache_dir, f"{key}.{fmt}.b64")
+
+    def _load(self, key, fmt):
+        if not self.cache_dir:
+            return None
+        path = self._path(key, fmt)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                encoded = f.read()
+            os.utime(path) # Recently used files are the last to be pruned
+        except OSError:
+            return None
+        return encoded
+
+    def _store(self, key, fmt, encoded):
+        if not self.cache_dir:
+            return
+        path = self._path(key, fmt)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(encoded)
+            os.replace(tmp_path, path) # Atomic, so concurrent workers never read half a file
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return # The disk store is only an optimisation
+        self._prune()
+
+    def _prune(self):
+        """Deletes the least recently used files beyond `max_disk_entries`."""
+        try:
+            with os.scandir(self.cache_dir) as entries:
+                files = [(entry.stat().st_mtime, entry.path) for entry in entries if entry.name.endswith(".b64")]
+        except OSError:
+            return
+        if len(files) <= self.max_disk_entries:
+            return
+        files.sort()
+        for _, path in files[:len(files) - self.max_disk_entries]:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass # Already pruned by another worker
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
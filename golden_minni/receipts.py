@@ -0,0 +1,177 @@
+"""Transaction receipt lookups and the shared non-blocking receipt watcher."""
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+TX_HASH_PATTERN = re.compile(r"0x[0-9a-fA-F]{64}")
+
+
+def fetch_transaction_receipts(rpc, tx_hashes):
+    """Receipts for many transactions using batched `eth_getTransactionReceipt` calls.
+
+    Returns a dict with an entry per hash: the receipt, None while the transaction
+    is still pending, or the exception for that call.
+    """
+    results = rpc.batch([("eth_getTransactionReceipt", [tx_hash]) for tx_hash in tx_hashes])
+    return dict(zip(tx_hashes, results))
+
+
+def receipt_status(receipt):
+    """Maps a raw receipt to the status strings used throughout the app."""
+    if receipt is None:
+        return "Pending"
+    return "Confirmed" if int(receipt.get("status") or "0x0", 16) == 1 else "Failed"
+
+
+class ReceiptHandle:
+    """Non-blocking view of one watched transaction.
+
+    `status` can be read at any time; `future` resolves to the receipt once the
+    transaction is mined, or to an exception on timeout.
+    """
+    __slots__ = ("tx_hash", "status", "receipt", "submitted_at", "resolved_at", "future")
+
+    def __init__(self, tx_hash):
+        self.tx_hash = tx_hash
+        self.status = "Pending"
+        self.receipt = None
+        self.submitted_at = time.monotonic()
+        self.resolved_at = None
+        self.future = Future()
+
+    def done(self):
+        return self.future.done()
+
+    def _resolve(self, status, receipt=None, error=None):
+        self.status = status
+        self.receipt = receipt
+        self.resolved_at = time.monotonic()
+        if error is not None:
+            self.future.set_exception(error)
+        else:
+            self.future.set_result(receipt)
+
+
+class ReceiptTimeout(Exception):
+    """Raised through a handle's future when no receipt appeared in time."""
+
+
+class ReceiptWatcher:
+    """Tracks pending transactions from one background worker.
+
+    Every pending hash is checked in a single batched round trip per poll. The poll
+    interval starts at `min_interval` and backs off towards `max_interval` while
+    nothing changes, so hundreds of in-flight transactions stay cheap to follow.
+    Resolved handles are remembered (up to `max_resolved`) for status lookups. A
+    timeout is not final: the transaction may still be mined, so watching the hash
+    again starts a new handle.
+    """
+
+    def __init__(self, rpc, min_interval=1.0, max_interval=15.0, timeout=120.0, max_resolved=1000):
+        self.rpc = rpc
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.timeout = timeout
+        self.max_resolved = max_resolved
+        self.polls = 0
+        self._pending = {}
+        self._resolved = OrderedDict()
+        self._interval = min_interval
+        self._last_poll = float("-inf")
+        self._wakeup = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def watch(self, tx_hash):
+        """Starts tracking `tx_hash` and returns its handle immediately.
+
+        Raises ValueError unless `tx_hash` is "0x" followed by 64 hex digits.
+        """
+        if not isinstance(tx_hash, str) or not TX_HASH_PATTERN.fullmatch(tx_hash):
+            raise ValueError(f"Invalid transaction hash: {tx_hash!r}")
+        tx_hash = tx_hash.lower()
+        with self._wakeup:
+            handle = self._pending.get(tx_hash) or self._resolved.get(tx_hash)
+            if handle is None or handle.status == "Timeout":
+                self._resolved.pop(tx_hash, None)
+                handle = self._pending[tx_hash] = ReceiptHandle(tx_hash)
+                self._interval = self.min_interval # New work: poll promptly again
+                self._wakeup.notify()
+            return handle
+
+    def status(self, tx_hash):
+        tx_hash = tx_hash.lower()
+        with self._wakeup:
+            handle = self._pending.get(tx_hash) or self._resolved.get(tx_hash)
+        return handle.status if handle is not None else None
+
+    def pending_count(self):
+        with self._wakeup:
+            return len(self._pending)
+
+    def poll_once(self):
+        """Checks every pending transaction in one batch; returns how many resolved."""
+        with self._wakeup:
+            handles = list(self._pending.values())
+        if not handles:
+            return 0
+        self._last_poll = time.monotonic()
+        receipts = fetch_transaction_receipts(self.rpc, [handle.tx_hash for handle in handles])
+        self.polls += 1
+        now = time.monotonic()
+        resolved = []
+        for handle in handles:
+            receipt = receipts.get(handle.tx_hash)
+            if receipt is not None and not isinstance(receipt, Exception):
+                handle._resolve(receipt_status(receipt), receipt)
+                resolved.append(handle)
+            elif now - handle.submitted_at > self.timeout:
+                handle._resolve("Timeout", error=ReceiptTimeout(f"No receipt for {handle.tx_hash} after {self.timeout:.0f}s"))
+                resolved.append(handle)
+        with self._wakeup:
+            for handle in resolved:
+                self._pending.pop(handle.tx_hash, None)
+                self._resolved[handle.tx_hash] = handle
+            while len(self._resolved) > self.max_resolved:
+                self._resolved.popitem(last=False)
+            if resolved:
+                self._interval = self.min_interval
+            else:
+                self._interval = min(self._interval * 2, self.max_interval)
+        return len(resolved)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="receipt-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        with self._wakeup:
+            self._stopped = True
+            self._wakeup.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._wakeup:
+                while not self._stopped:
+                    if not self._pending:
+                        self._wakeup.wait() # Idle until something is watched
+                        continue
+                    # New work resets the interval but never polls faster than min_interval
+                    delay = self._last_poll + self._interval - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self._wakeup.wait(delay)
+                if self._stopped:
+                    return
+            try:
+                self.poll_once()
+            except Exception:
+                with self._wakeup:
+                    self._interval = min(self._interval * 2, self.max_interval)
@@ -0,0 +1,90 @@
+"""Transaction risk scoring, per transaction and vectorized over columnar batches.
+
+numpy and pandas are imported inside the vectorized functions, so scoring single
+transactions never pays for loading them.
+"""
+import math
+import zlib
+
+HIGH_RISK_THRESHOLD = 70
+
+# Multipliers applied to the value component; unknown currencies get DEFAULT_CURRENCY_WEIGHT
+CURRENCY_WEIGHTS = {"USD": 1.0, "EUR": 1.0, "USDC": 1.0, "ETH": 1.2, "BTC": 1.2, "SOL": 1.4}
+DEFAULT_CURRENCY_WEIGHT = 1.5
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value)) or str(value) == ""
+
+
+def counterparty_score(counterparty):
+    """Stable 0-29 reputation penalty derived from the counterparty identifier."""
+    if _is_missing(counterparty):
+        return 15 # Unknown counterparties sit in the middle of the range
+    return zlib.crc32(str(counterparty).lower().encode("utf-8")) % 30
+
+
+def currency_weight(currency):
+    if _is_missing(currency):
+        return DEFAULT_CURRENCY_WEIGHT
+    return CURRENCY_WEIGHTS.get(str(currency).upper(), DEFAULT_CURRENCY_WEIGHT)
+
+
+def transaction_value(value):
+    """`value` as a float; a missing value (None, NaN or "") counts as 0."""
+    if _is_missing(value):
+        return 0.0
+    value = float(value)
+    return 0.0 if math.isnan(value) else value
+
+
+def score_transaction(value, currency, counterparty):
+    """Risk score (0-99) of a single transaction."""
+    value_score = min(60.0, 12.0 * math.log10(1.0 + max(transaction_value(value), 0.0)))
+    return int(min(99, max(0, round(value_score * currency_weight(currency) + counterparty_score(counterparty)))))
+
+
+def _per_distinct(column, length, func):
+    """Applies `func` once per distinct value of `column` and spreads the results over its rows."""
+    import numpy as np
+    import pandas as pd
+
+    if column is None:
+        return np.full(length, func(None), dtype=np.float64)
+    # factorize hashes instead of sorting, and gives missing values the code -1
+    codes, distinct = pd.factorize(np.asarray(column, dtype=object))
+    mapped = np.array([func(value) for value in distinct] + [func(None)], dtype=np.float64)
+    return mapped[codes]
+
+
+def score_transactions(columns):
+    """Scores a columnar batch in vectorized form; matches score_transaction row by row.
+
+    `columns` is a DataFrame or a mapping of equally long `value`, `currency` and
+    `counterparty` arrays. Currency and counterparty are factorized first, so the
+    per-string work is done once per distinct value instead of once per row.
+    Missing values count as 0, as in transaction_value.
+    """
+    import numpy as np
+
+    values = np.nan_to_num(np.asarray(columns["value"], dtype=np.float64), nan=0.0)
+    weights = _per_distinct(columns["currency"] if "currency" in columns else None, values.size, currency_weight)
+    penalties = _per_distinct(columns["counterparty"] if "counterparty" in columns else None, values.size, counterparty_score)
+    value_score = np.minimum(60.0, 12.0 * np.log10(1.0 + np.maximum(values, 0.0)))
+    # np.round rounds half to even, exactly like the built-in round in score_transaction
+    scores = np.round(value_score * weights + penalties)
+    return np.clip(scores, 0, 99).astype(np.int64)
+
+
+def assess_batch(columns, threshold=HIGH_RISK_THRESHOLD):
+    """Scores and high-risk flags for a batch, plus the summary the Risk layer reports."""
+    scores = score_transactions(columns)
+    high_risk = scores > threshold
+    return {
+        "scores": scores,
+        "high_risk": high_risk,
+        "count": int(scores.size),
+        "high_risk_count": int(high_risk.sum()),
+        "max_score": int(scores.max()) if scores.size else 0,
+        "mean_score": float(scores.mean()) if scores.size else 0.0,
+    }
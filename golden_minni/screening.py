@@ -0,0 +1,268 @@
+"""Sanctions and watchlist screening against a compiled, memory-mapped index.
+
+List files are plain text with one entry per line, optionally followed by a comma
+and the name of the list it came from; blank lines and `#` comments are skipped:
+
+    0x8589427373d6d84e98730d7795d8f6f8731fda16,OFAC-SDN
+
+Files whose name contains "address" hold addresses (matched case-insensitively) and
+files whose name contains "countr" hold country codes or names. All of them are
+compiled into one binary file: a Bloom filter that rejects most clean entries after
+a few bit tests, and an open-addressing hash table of 64-bit entry digests. The file
+is opened with mmap, so every worker process on the host shares one copy through
+the page cache, and a lookup costs one digest plus O(1) reads.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+MAGIC = b"MNSCREEN"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIIQQQI") # magic, version, bloom hashes, bloom bytes, table slots, entries, meta length
+SLOT = struct.Struct("<QI4x") # entry digest (0 = empty), list id
+BLOOM_BITS_PER_ENTRY = 10 # About 1% false positives with 7 hashes
+BLOOM_HASHES = 7
+
+
+def normalize(kind, value):
+    value = str(value).strip()
+    return value.lower() if kind == "address" else value.upper()
+
+
+def _digest(kind, value):
+    """Table key and Bloom step for an already normalized entry; both are odd, so never 0."""
+    d = hashlib.blake2b(f"{kind}:{value}".encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(d[:8], "little") | 1, int.from_bytes(d[8:], "little") | 1
+
+
+def list_kind(path):
+    name = os.path.basename(path).lower()
+    if "address" in name:
+        return "address"
+    if "countr" in name:
+        return "country"
+    return None
+
+
+def find_list_files(lists_dir):
+    if not lists_dir or not os.path.isdir(lists_dir):
+        return []
+    return sorted(
+        os.path.join(lists_dir, name) for name in os.listdir(lists_dir)
+        if name.endswith((".txt", ".csv")) and list_kind(name)
+    )
+
+
+def fingerprint(paths):
+    """Identifies one version of the list files without reading them."""
+    h = hashlib.sha256()
+    for path in paths:
+        stat = os.stat(path)
+        h.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns};".encode("utf-8"))
+    return h.hexdigest()
+
+
+def read_list(path):
+    """(normalized entry, list name) pairs of one list file."""
+    kind = list_kind(path)
+    default_list = os.path.splitext(os.path.basename(path))[0]
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            value, _, list_name = line.partition(",")
+            if value.strip():
+                yield kind, normalize(kind, value), list_name.strip() or default_list
+
+
+def compile_index(paths, out_path):
+    """Compiles the list files at `paths` into the binary index at `out_path` and returns its entry count."""
+    lists = []
+    list_ids = {}
+    digests = {}
+    for path in paths:
+        for kind, value, list_name in read_list(path):
+            if list_name not in list_ids:
+                list_ids[list_name] = len(lists)
+                lists.append(list_name)
+            digests.setdefault(_digest(kind, value), list_ids[list_name]) # First list that names an entry wins
+
+    slots = 8
+    while slots < 2 * len(digests): # Load factor <= 0.5 keeps probe runs short
+        slots *= 2
+    bloom_bytes = max(8, (len(digests) * BLOOM_BITS_PER_ENTRY + 7) // 8)
+    bloom_bits = bloom_bytes * 8
+    bloom = bytearray(bloom_bytes)
+    table = bytearray(slots * SLOT.size)
+    mask = slots - 1
+    for (key, step), list_id in digests.items():
+        for i in range(BLOOM_HASHES):
+            position = (key + i * step) % bloom_bits
+            bloom[position >> 3] |= 1 << (position & 7)
+        slot = key & mask
+        while SLOT.unpack_from(table, slot * SLOT.size)[0]:
+            slot = (slot + 1) & mask
+        SLOT.pack_into(table, slot * SLOT.size, key, list_id)
+
+    meta = json.dumps({"fingerprint": fingerprint(paths), "lists": lists, "compiled_at": time.time()}).encode("utf-8")
+    meta += b"\0" * (-(HEADER.size + len(meta)) % 8) # Keep the table 8-byte aligned
+    tmp_path = f"{out_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, BLOOM_HASHES, bloom_bytes, slots, len(digests), len(meta)))
+        f.write(meta)
+        f.write(bloom)
+        f.write(table)
+    os.replace(tmp_path, out_path) # Atomic, so other workers only ever map a complete file
+    return len(digests)
+
+
+class CompiledIndex:
+    """Read-only view of a compiled index file. Instances are never modified after opening."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.bloom_hashes, bloom_bytes, self.slots, self.entries, meta_length = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} screening index")
+        meta = json.loads(self._map[HEADER.size:HEADER.size + meta_length].rstrip(b"\0"))
+        self.fingerprint = meta["fingerprint"]
+        self.lists = meta["lists"]
+        self.compiled_at = meta["compiled_at"]
+        self._bloom_offset = HEADER.size + meta_length
+        self._bloom_bits = bloom_bytes * 8
+        self._table_offset = self._bloom_offset + bloom_bytes
+
+    def lookup(self, kind, value):
+        """Name of the list `value` is on, or None; `value` must already be normalized."""
+        key, step = _digest(kind, value)
+        data = self._map
+        bloom_offset, bloom_bits = self._bloom_offset, self._bloom_bits
+        for i in range(self.bloom_hashes):
+            position = (key + i * step) % bloom_bits
+            if not data[bloom_offset + (position >> 3)] & (1 << (position & 7)):
+                return None # Definitely not listed
+        mask = self.slots - 1
+        slot = key & mask
+        while True:
+            stored, list_id = SLOT.unpack_from(data, self._table_offset + slot * SLOT.size)
+            if stored == key:
+                return self.lists[list_id]
+            if not stored:
+                return None # Bloom false positive
+            slot = (slot + 1) & mask
+
+
+class ScreeningIndex:
+    """Screens addresses and countries against the lists in `lists_dir`.
+
+    The compiled file (`index_path`, next to the lists by default) is reused while
+    it matches the list files, so workers after the first only map it. Reloads
+    compile into a new file and swap the reference in one assignment, so checks
+    that are running keep using the old index and never wait for a reload.
+    """
+
+    def __init__(self, lists_dir, index_path=None, reload_interval=60.0):
+        self.lists_dir = lists_dir
+        self.index_path = index_path or os.path.join(lists_dir or ".", "screening.idx")
+        self.reload_interval = reload_interval
+        self.reloads = 0
+        self.last_error = None
+        self._compiled = None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def load(self):
+        """Maps the compiled index, compiling it first when the lists changed; returns self."""
+        self.reload_if_changed()
+        return self
+
+    def reload_if_changed(self):
+        """Swaps in a fresh index when the list files changed; True when it did."""
+        with self._reload_lock: # Serializes reloads, never lookups
+            paths = find_list_files(self.lists_dir)
+            current_fingerprint = fingerprint(paths)
+            if self._compiled is not None and self._compiled.fingerprint == current_fingerprint:
+                return False
+            compiled = None
+            if os.path.exists(self.index_path):
+                try:
+                    compiled = CompiledIndex(self.index_path)
+                except (OSError, ValueError):
+                    compiled = None
+            if compiled is None or compiled.fingerprint != current_fingerprint:
+                try:
+                    compile_index(paths, self.index_path)
+                except OSError:
+                    # Read-only list directory: compile into the temp dir, still shared by this host's workers
+                    digest = hashlib.sha256(os.path.abspath(self.lists_dir or ".").encode("utf-8")).hexdigest()[:16]
+                    self.index_path = os.path.join(tempfile.gettempdir(), f"screening-{digest}.idx")
+                    compile_index(paths, self.index_path)
+                compiled = CompiledIndex(self.index_path)
+            self._compiled = compiled
+            self.reloads += 1
+            return True
+
+    @property
+    def compiled(self):
+        if self._compiled is None:
+            self.load()
+        return self._compiled
+
+    def screen_address(self, address):
+        if not address:
+            return None
+        return self.compiled.lookup("address", normalize("address", address))
+
+    def screen_country(self, country):
+        if not country:
+            return None
+        return self.compiled.lookup("country", normalize("country", country))
+
+    def screen_addresses(self, addresses):
+        """Bulk screening: {address: list name} for the listed ones among `addresses`."""
+        compiled = self.compiled # One index for the whole batch, even if a reload lands meanwhile
+        lookup = compiled.lookup
+        matches = {}
+        for address in set(addresses):
+            if address:
+                list_name = lookup("address", normalize("address", address))
+                if list_name is not None:
+                    matches[address] = list_name
+        return matches
+
+    def stats(self):
+        compiled = self._compiled
+        return {
+            "entries": compiled.entries if compiled else 0,
+            "lists": compiled.lists if compiled else [],
+            "compiled_at": compiled.compiled_at if compiled else None,
+            "reloads": self.reloads,
+            "last_error": str(self.last_error) if self.last_error else None,
+        }
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="screening-reloader", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.reload_interval):
+            try:
+                self.reload_if_changed()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e # Keep screening against the last good index
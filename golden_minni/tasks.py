@@ -0,0 +1,56 @@
+"""One-shot background tasks that sessions can attach to without blocking."""
+import threading
+import time
+
+
+class BackgroundTask:
+    """Runs `func` once in a daemon thread and exposes its progress and outcome.
+
+    Sessions read `state`, `result` and `error` on every rerun instead of waiting
+    for the work to finish before they can render.
+    """
+
+    def __init__(self, name, func, *args, **kwargs):
+        self.name = name
+        self.state = "pending" # pending -> running -> done | failed
+        self.result = None
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self.state != "pending":
+                return self
+            self.state = "running"
+            self.started_at = time.time()
+        threading.Thread(target=self._run, name=self.name, daemon=True).start()
+        return self
+
+    def _run(self):
+        try:
+            self.result = self._func(*self._args, **self._kwargs)
+            self.state = "done"
+        except Exception as e:
+            self.error = e
+            self.state = "failed"
+        finally:
+            self.finished_at = time.time()
+            self._done.set()
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Blocks until the task finishes; only meant for scripts and benchmarks."""
+        return self._done.wait(timeout)
+
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
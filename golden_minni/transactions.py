@@ -0,0 +1,227 @@
+"""Batch preparation of signed Ethereum transfers: local nonces, cached gas price, parallel signing."""
+import threading
+import time
+
+DEFAULT_GAS_LIMIT = 21000 # Plain ETH transfer
+
+
+def _first_fit(nonces, count):
+    """Start of the lowest run of `count` consecutive numbers in `nonces`, or None."""
+    run_start, run_length = None, 0
+    for nonce in sorted(nonces):
+        if run_length and nonce == run_start + run_length:
+            run_length += 1
+        else:
+            run_start, run_length = nonce, 1
+        if run_length >= count:
+            return run_start
+    return None
+
+
+class NonceAllocator:
+    """Hands out consecutive nonces per sender without asking the node each time.
+
+    The first allocation for a sender reads its pending transaction count; after
+    that nonces come from a local counter, so concurrent callers never share a nonce
+    and every batch gets one contiguous block. Blocks that end up unused must be
+    handed back with `release`, otherwise the sender's next transactions would wait
+    behind a gap. Released nonces below the counter are handed out again before the
+    counter moves on: a block takes the lowest run of released nonces long enough
+    for it, and only when none is does it come from the counter.
+    """
+
+    def __init__(self, rpc):
+        self.rpc = rpc
+        self.node_reads = 0
+        self._lock = threading.Lock()
+        self._next = {} # lower-case address -> next free nonce
+        self._base = {} # lower-case address -> first nonce handed out since the node was read
+        self._released = {} # lower-case address -> set of released nonces below _next
+        self._sender_locks = {}
+
+    def _sender_lock(self, key):
+        with self._lock:
+            return self._sender_locks.setdefault(key, threading.Lock())
+
+    def allocate(self, address, count=1):
+        """First nonce of a block of `count` consecutive nonces reserved for `address`."""
+        key = address.lower()
+        # Per-sender lock: one sender's first node read does not hold up the others
+        with self._sender_lock(key):
+            if key not in self._next:
+                self._next[key] = self._base[key] = int(self.rpc.call("eth_getTransactionCount", [address, "pending"]), 16)
+                self.node_reads += 1
+            released = self._released.get(key)
+            start = _first_fit(released, count) if released else None
+            if start is not None:
+                released.difference_update(range(start, start + count))
+                return start
+            start = self._next[key]
+            self._next[key] = start + count
+            return start
+
+    def release(self, address, start, count):
+        """Hands back an unused block so its nonces are allocated again instead of left as a gap.
+
+        Returns False when the counter was reset since the block was allocated.
+        Raises ValueError for nonces that are not currently handed out.
+        """
+        key = address.lower()
+        block = range(start, start + count)
+        with self._sender_lock(key):
+            if key not in self._next or start < self._base[key]:
+                return False # Reset since; the node's pending count no longer includes them
+            released = self._released.setdefault(key, set())
+            if count < 1 or block.stop > self._next[key] or not released.isdisjoint(block):
+                raise ValueError(f"Nonces {start}..{block.stop - 1} of {address} are not allocated")
+            released.update(block)
+            while self._next[key] - 1 in released: # Released blocks at the top just lower the counter
+                self._next[key] -= 1
+                released.discard(self._next[key])
+            return True
+
+    def reset(self, address):
+        """Forgets the local counter so the next allocation re-reads the node."""
+        key = address.lower()
+        with self._sender_lock(key):
+            self._next.pop(key, None)
+            self._base.pop(key, None)
+            self._released.pop(key, None)
+
+    def peek(self, address):
+        with self._lock:
+            return self._next.get(address.lower())
+
+
+class GasPriceCache:
+    """Gas price read from the node at most once every `ttl` seconds.
+
+    Callers that arrive while a refresh is in flight wait for it instead of sending
+    their own eth_gasPrice.
+    """
+
+    def __init__(self, rpc, ttl=5.0):
+        self.rpc = rpc
+        self.ttl = ttl
+        self.hits = 0
+        self.fetches = 0
+        self._price = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._price is not None and time.monotonic() - self._fetched_at < self.ttl:
+                self.hits += 1
+                return self._price
+            self._price = int(self.rpc.call("eth_gasPrice", []), 16)
+            self._fetched_at = time.monotonic()
+            self.fetches += 1
+            return self._price
+
+    def invalidate(self):
+        with self._lock:
+            self._price = None
+
+
+class PreparedTransaction:
+    """A signed transfer ready for eth_sendRawTransaction."""
+    __slots__ = ("sender", "to", "value", "nonce", "gas_price", "gas", "raw_transaction", "tx_hash")
+
+    def __init__(self, sender, to, value, nonce, gas_price, gas, raw_transaction, tx_hash):
+        self.sender = sender
+        self.to = to
+        self.value = value
+        self.nonce = nonce
+        self.gas_price = gas_price
+        self.gas = gas
+        self.raw_transaction = raw_transaction
+        self.tx_hash = tx_hash
+
+    def __repr__(self):
+        return f"PreparedTransaction(nonce={self.nonce}, to={self.to!r}, value={self.value}, tx_hash={self.tx_hash!r})"
+
+
+def sign_transactions(private_key, transactions):
+    """(raw transaction, hash) hex pairs for `transactions`; module level so process pools can run it."""
+    from eth_account import Account
+
+    signed = [Account.sign_transaction(transaction, private_key) for transaction in transactions]
+    return [("0x" + s.raw_transaction.hex(), "0x" + s.hash.hex()) for s in signed]
+
+
+def sender_address(private_key):
+    from eth_account import Account
+
+    return Account.from_key(private_key).address
+
+
+class TransactionPreparer:
+    """Builds and signs batches of transfers with two node round trips at most.
+
+    Nonces come from the NonceAllocator and the gas price from the GasPriceCache,
+    so a warm batch needs no round trip at all. Signing is split into chunks of
+    `chunk_size` and spread over `executor`. Use a process pool unless the signing
+    backend releases the GIL; without an executor, signing runs inline.
+    """
+
+    def __init__(self, rpc, nonces=None, gas_prices=None, executor=None, chunk_size=16, gas_limit=DEFAULT_GAS_LIMIT):
+        self.rpc = rpc
+        self.nonces = nonces or NonceAllocator(rpc)
+        self.gas_prices = gas_prices or GasPriceCache(rpc)
+        self.chunk_size = chunk_size
+        self.gas_limit = gas_limit
+        self._executor = executor
+        self._chain_id = None
+        self._chain_id_lock = threading.Lock()
+
+    @property
+    def chain_id(self):
+        with self._chain_id_lock:
+            if self._chain_id is None:
+                self._chain_id = int(self.rpc.call("eth_chainId", []), 16)
+            return self._chain_id
+
+    def prepare_batch(self, private_key, transfers):
+        """Signed transactions for `transfers`, an iterable of (to, value in Wei), in order.
+
+        The key and every transfer are validated before nonces are reserved, so a
+        bad entry fails the batch without consuming any. If signing still fails, the
+        block is handed back. So is every transaction the caller does not broadcast,
+        through `self.nonces.release`.
+        """
+        from eth_utils import to_checksum_address
+
+        transfers = [(to_checksum_address(to), int(value)) for to, value in transfers] # Raises on malformed addresses
+        if not transfers:
+            return []
+        for to, value in transfers:
+            if value < 0:
+                raise ValueError(f"Negative transfer value for {to}: {value}")
+        sender = sender_address(private_key)
+        chain_id = self.chain_id
+        gas_price = self.gas_prices.get()
+        start = self.nonces.allocate(sender, len(transfers))
+        transactions = [
+            {"to": to, "value": value, "nonce": start + i, "gasPrice": gas_price, "gas": self.gas_limit, "chainId": chain_id}
+            for i, (to, value) in enumerate(transfers)
+        ]
+        try:
+            signed = self._sign(private_key, transactions)
+        except Exception:
+            self.nonces.release(sender, start, len(transfers))
+            raise
+        return [
+            PreparedTransaction(sender, tx["to"], tx["value"], tx["nonce"], gas_price, tx["gas"], raw, tx_hash)
+            for tx, (raw, tx_hash) in zip(transactions, signed)
+        ]
+
+    def prepare(self, private_key, to, value):
+        return self.prepare_batch(private_key, [(to, value)])[0]
+
+    def _sign(self, private_key, transactions):
+        chunks = [transactions[i:i + self.chunk_size] for i in range(0, len(transactions), self.chunk_size)]
+        if self._executor is None or len(chunks) == 1:
+            return [pair for chunk in chunks for pair in sign_transactions(private_key, chunk)]
+        futures = [self._executor.submit(sign_transactions, private_key, chunk) for chunk in chunks]
+        return [pair for future in futures for pair in future.result()]
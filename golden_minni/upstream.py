@@ -0,0 +1,255 @@
+"""Upstream call discipline: per-key token buckets, request coalescing and stale-while-revalidate caching."""
+import threading
+import time
+
+from golden_minni.metrics import METRICS
+
+
+class RateLimited(Exception):
+    """Raised when a call would have to wait longer than allowed for a rate-limit token."""
+
+
+class TokenBucket:
+    """`rate` tokens per second, up to `burst` saved up; one token per upstream request."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.waited = 0.0 # Total seconds callers spent waiting for tokens
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Takes a token, possibly one not yet earned; returns how long to wait until it is."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def _refund(self):
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
+
+    def acquire(self, timeout=None):
+        """Waits for a token; raises RateLimited instead of waiting longer than `timeout` seconds."""
+        wait = self._reserve()
+        if wait <= 0:
+            return 0.0
+        if timeout is not None and wait > timeout:
+            self._refund()
+            raise RateLimited(f"Rate limit of {self.rate:g}/s would delay the call by {wait:.2f}s")
+        time.sleep(wait) # Reserved tokens queue callers in arrival order
+        self.waited += wait
+        return wait
+
+
+class RateLimiter:
+    """One token bucket per API key (or endpoint), created on first use."""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, key, rate, burst=None):
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(rate, burst)
+            return bucket
+
+    def stats(self):
+        with self._lock:
+            return {key: {"rate": bucket.rate, "burst": bucket.burst, "waited_s": round(bucket.waited, 3)} for key, bucket in self._buckets.items()}
+
+
+class RateLimitedHttp:
+    """HttpPool stand-in that takes a token from `bucket` before every request.
+
+    Anything other than requests (session, stats) is passed through to the pool.
+    """
+
+    def __init__(self, http, bucket, max_wait=10.0, name="upstream"):
+        self.http = http
+        self.bucket = bucket
+        self.max_wait = max_wait
+        self.name = name
+
+    def request(self, method, url, **kwargs):
+        try:
+            self.bucket.acquire(self.max_wait)
+        except RateLimited:
+            if METRICS.enabled:
+                METRICS.counter("rate_limited_total", "Upstream calls refused by the local rate limit", source=self.name).inc()
+            raise
+        return self.http.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.http, name)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one; everyone gets its result or exception."""
+
+    def __init__(self):
+        self.calls = 0 # Calls that actually ran
+        self.shared = 0 # Callers served by someone else's call
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    def do(self, key, func):
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+
+
+class Cached:
+    """A value served by StaleWhileRevalidate, with how it was obtained."""
+    __slots__ = ("value", "fetched_at", "stale", "error")
+
+    def __init__(self, value, fetched_at, stale=False, error=None):
+        self.value = value
+        self.fetched_at = fetched_at # time.time() of the fetch that produced `value`
+        self.stale = stale
+        self.error = error # Last upstream failure while refreshing the stale value, if any
+
+    def age(self, now=None):
+        return (now if now is not None else time.time()) - self.fetched_at
+
+
+class StaleWhileRevalidate:
+    """Per-key cache that answers from memory and refreshes behind the caller.
+
+    Within `ttl` a value is served as is. Past it, it is still served while one
+    coalesced background fetch replaces it. If fetching fails, the last good value
+    is served (flagged stale, with the error) for up to `max_stale` seconds, so a
+    flaky upstream degrades to old data instead of a made-up zero. Background
+    failures are kept on the entry and returned with later stale hits until a
+    fetch succeeds. Only keys never fetched successfully make callers wait, and
+    they raise if the fetch fails.
+    """
+
+    def __init__(self, ttl=15.0, max_stale=3600.0, flight=None):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.flight = flight or SingleFlight()
+        self.hits = 0
+        self.stale_served = 0
+        self.errors = 0
+        self._entries = {} # key -> (value, fetched_at, last refresh error or None)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def peek(self, key):
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key, value, fetched_at=None):
+        with self._lock:
+            self._entries[key] = (value, fetched_at if fetched_at is not None else time.time(), None)
+
+    def _failed(self, key, error):
+        """Counts a failed fetch and remembers it on the entry, if there is one."""
+        with self._lock:
+            self.errors += 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (entry[0], entry[1], error)
+                return self._entries[key]
+            return None
+
+    def _fetch(self, key, fetch):
+        value = fetch()
+        self.put(key, value)
+        return value
+
+    def _revalidate(self, key, fetch):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self.flight.do(key, lambda: self._fetch(key, fetch))
+            except Exception as e:
+                self._failed(key, e) # The stale value stays; the next caller tries again
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+        threading.Thread(target=run, name="swr-revalidate", daemon=True).start()
+
+    def get(self, key, fetch):
+        """Cached for `key`, calling `fetch()` (coalesced per key) when there is nothing fresh."""
+        now = time.time()
+        entry = self.peek(key)
+        if entry is not None:
+            value, fetched_at, error = entry
+            if now - fetched_at < self.ttl:
+                with self._lock:
+                    self.hits += 1
+                return Cached(value, fetched_at)
+            if now - fetched_at < self.max_stale:
+                with self._lock:
+                    self.stale_served += 1
+                self._revalidate(key, fetch)
+                return Cached(value, fetched_at, stale=True, error=error)
+        try:
+            value = self.flight.do(key, lambda: self._fetch(key, fetch))
+        except Exception as e:
+            entry = self._failed(key, e)
+            if entry is not None and time.time() - entry[1] < self.max_stale:
+                with self._lock:
+                    self.stale_served += 1
+                return Cached(entry[0], entry[1], stale=True, error=e)
+            raise
+        return Cached(value, self.peek(key)[1])
+
+    def stats(self):
+        with self._lock:
+            entries, hits, stale_served, errors = len(self._entries), self.hits, self.stale_served, self.errors
+        return {
+            "entries": entries,
+            "hits": hits,
+            "stale_served": stale_served,
+            "errors": errors,
+            "upstream_calls": self.flight.calls,
+            "coalesced": self.flight.shared,
+        }
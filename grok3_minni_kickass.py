@@ -1,24 +1,42 @@
 import streamlit as st
-import qrcode
-from PIL import Image
-from io import BytesIO
-import requests
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import os
 import time
+import threading
 import json
-import base64
-from web3 import Web3
-from web3.middleware import ExtraDataToPOAMiddleware
-from datetime import datetime, timedelta
+from datetime import datetime
 import secrets
+from decimal import Decimal
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
 import hmac
 import hashlib
 
+from golden_minni.alerts import SEVERITIES
+from golden_minni.anomaly import StreamDetector, payment_events
+from golden_minni.balances import BalancePoller, fetch_balances_wei, fetch_eth_balances_from_etherscan
+from golden_minni.chains import BtcBackend, ChainTimeout, EthBackend, MultiChain, SolBackend
+from golden_minni.core import Grok3MinniAI_Setup, Layer, SystemState, build_layers, use_system_state
+from golden_minni.entitlements import EntitlementStore, issue_access_token, payer_challenge, read_access_token, verify_payer_signature
+from golden_minni.metrics import METRICS, serve_metrics, timed
+from golden_minni.net import HttpPool, JsonRpcClient
+from golden_minni.payments import PaymentIndexer, PaymentStore
+from golden_minni.pipeline import EvaluationPipeline
+from golden_minni.providers import HedgedRpcClient, Provider, provider_names
+from golden_minni.qr import MIME_TYPES, QRCodeCache
+from golden_minni.screening import ScreeningIndex
+from golden_minni.tasks import BackgroundTask
+from golden_minni.transactions import GasPriceCache, TransactionPreparer
+from golden_minni.upstream import RateLimitedHttp, RateLimiter, StaleWhileRevalidate
+from golden_minni.receipts import ReceiptWatcher, fetch_transaction_receipts
+
 # --- Global Configurations ---
 # Your fixed wallet addresses for receiving payments (OraculumX's control)
 ETH_ADDR = "0x5036dbcEEfae0a7429e64467222e1E259819c7C7" # Example Ethereum address
 BTC_ADDR = "bc1qxy2kgdygjrsqtzq2n0yrf2493p83kkfjhx0wlh" # Example Bitcoin address
 SOL_ADDR = "GjKxT3YtFwN3j9p3L0w4V2x8E6r7Q0z1C5B7D8F9A" # Example Solana address
+# Extra ETH deposit addresses to watch alongside ETH_ADDR (comma-separated)
+DEPOSIT_ADDRESSES = [address.strip() for address in os.getenv("DEPOSIT_ADDRESSES", "").split(",") if address.strip()]
 
 # Etherscan API Key (Get yours from [https://etherscan.io/apis](https://etherscan.io/apis))
 # It's highly recommended to set this as an environment variable for security.
@@ -28,83 +46,360 @@ ETHERSCAN_API_KEY = os.getenv("ETHERSCAN_API_KEY", "YOUR_ETHERSCAN_API_KEY")
 # Infura Project ID for Web3 connection (Sepolia Testnet)
 INFURA_PROJECT_ID = "YOUR_INFURA_PROJECT_ID" # Replace with your actual Infura Project ID
 
+# Upstream endpoints (override to point at a local node or stand-in servers)
+ETHERSCAN_API_URL = os.getenv("ETHERSCAN_API_URL", "https://api-sepolia.etherscan.io/api")
+SEPOLIA_RPC_URL = os.getenv("SEPOLIA_RPC_URL", f"https://sepolia.infura.io/v3/{INFURA_PROJECT_ID}")
+
+# JSON-RPC providers for reads (comma-separated). With more than one, a read that has no answer after
+# RPC_HEDGE_AFTER seconds is also sent to the next-best provider, ranked by observed latency and errors,
+# and critical actions need RPC_QUORUM providers to agree on the chain value they depend on
+RPC_URLS = [url.strip() for url in os.getenv("RPC_URLS", SEPOLIA_RPC_URL).split(",") if url.strip()]
+RPC_HEDGE_AFTER = float(os.getenv("RPC_HEDGE_AFTER", "0.25"))
+RPC_QUORUM = int(os.getenv("RPC_QUORUM", "2"))
+
+# Shared HTTP connection pool used by Etherscan and Web3 calls. Retries apply to
+# GETs and to read-only JSON-RPC calls; transactions are never sent twice
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+
+# Token buckets per API key, in requests per second (0 turns a limit off). Etherscan's free tier
+# allows 5/s. A call that would wait longer than HTTP_TIMEOUT for a token fails instead
+ETHERSCAN_RATE_LIMIT = float(os.getenv("ETHERSCAN_RATE_LIMIT", "5"))
+ETHERSCAN_RATE_BURST = float(os.getenv("ETHERSCAN_RATE_BURST", "5"))
+RPC_RATE_LIMIT = float(os.getenv("RPC_RATE_LIMIT", "0"))
+RPC_RATE_BURST = float(os.getenv("RPC_RATE_BURST", "0")) # 0: one second's worth
+
+# On-demand balance reads: fresh for BALANCE_CACHE_TTL seconds, then served while one coalesced
+# refresh runs; when upstream fails the last good balance is served for up to BALANCE_MAX_STALE seconds
+BALANCE_CACHE_TTL = float(os.getenv("BALANCE_CACHE_TTL", "15"))
+BALANCE_MAX_STALE = float(os.getenv("BALANCE_MAX_STALE", "3600"))
+
+# BTC (Esplora API) and SOL (JSON-RPC) balances, read concurrently with ETH's. Each chain gets CHAIN_TIMEOUT
+# seconds before the page renders without it, and is cached for CHAIN_CACHE_TTL seconds
+BTC_API_URL = os.getenv("BTC_API_URL", "https://blockstream.info/api")
+SOL_RPC_URL = os.getenv("SOL_RPC_URL", "https://api.mainnet-beta.solana.com")
+CHAIN_TIMEOUT = float(os.getenv("CHAIN_TIMEOUT", "2"))
+CHAIN_CACHE_TTL = float(os.getenv("CHAIN_CACHE_TTL", "30"))
+
+# Payment indexer: follows confirmed blocks and records who paid us
+PAYMENTS_DB_PATH = os.getenv("PAYMENTS_DB_PATH", "oraculumx_payments.db")
+INDEXER_CONFIRMATIONS = int(os.getenv("INDEXER_CONFIRMATIONS", "2"))
+INDEXER_POLL_INTERVAL = float(os.getenv("INDEXER_POLL_INTERVAL", "12"))
+INDEXER_START_BLOCK = int(os.environ["INDEXER_START_BLOCK"]) if os.getenv("INDEXER_START_BLOCK") else None # Defaults to the current head
+
+# Premium entitlements: one row per payer in SQLite (the payments database by default), cached in
+# memory for PREMIUM_CACHE_TTL seconds and refreshed as payments are indexed. 0 days never expires
+ENTITLEMENTS_DB_PATH = os.getenv("ENTITLEMENTS_DB_PATH", PAYMENTS_DB_PATH)
+PREMIUM_CACHE_TTL = float(os.getenv("PREMIUM_CACHE_TTL", "30"))
+PREMIUM_DURATION_DAYS = float(os.getenv("PREMIUM_DURATION_DAYS", "0"))
+# A payer proven by signature rides along in the URL as an HMAC token valid for PREMIUM_LINK_DAYS.
+# Without PREMIUM_LINK_SECRET a random key is used, so links stop working when the process restarts
+PREMIUM_LINK_SECRET = os.getenv("PREMIUM_LINK_SECRET")
+PREMIUM_LINK_DAYS = float(os.getenv("PREMIUM_LINK_DAYS", "30"))
+
+# Receipt watcher: pending transactions are polled in batches with adaptive backoff
+RECEIPT_MIN_INTERVAL = float(os.getenv("RECEIPT_MIN_INTERVAL", "2"))
+RECEIPT_MAX_INTERVAL = float(os.getenv("RECEIPT_MAX_INTERVAL", "15"))
+RECEIPT_TIMEOUT = float(os.getenv("RECEIPT_TIMEOUT", "120"))
+
+# Payment QR codes: "svg" renders without PIL, "png" goes through PIL
+QR_FORMAT = os.getenv("QR_FORMAT", "svg")
+QR_CACHE_SIZE = int(os.getenv("QR_CACHE_SIZE", "256"))
+QR_CACHE_DIR = os.getenv("QR_CACHE_DIR") # Optional on-disk store shared across restarts
+QR_CACHE_DISK_SIZE = int(os.getenv("QR_CACHE_DISK_SIZE", "4096")) # Files kept in QR_CACHE_DIR
+
+# Live updates: "fragment" re-renders only the live panels on a timer,
+# "meta" reloads the whole page through a <meta http-equiv="refresh"> tag
+LIVE_REFRESH_MODE = os.getenv("LIVE_REFRESH_MODE", "fragment")
+LIVE_REFRESH_INTERVAL = int(os.getenv("LIVE_REFRESH_INTERVAL", "30"))
+
 # Minimum ETH required for premium access
 MIN_ETH_FOR_PREMIUM = 0.001
 
-# --- Golden Minni Backend Core (Simplified for Streamlit Integration) ---
+# Threads shared by every session's AI-layer evaluation pipeline
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "8"))
 
-class SystemState:
-    """Centralized state management for Golden Minni operations."""
-    def __init__(self):
-        self.eth_balance = 0.0
-        self.premium_active = False
-        self.minni_status = {
-            "Wallet": "Inactive",
-            "Grok3MinniAI_Setup": "Inactive",
-            "TransferAI": "Inactive",
-            "RiskAI": "Inactive",
-            "ComplianceAI": "Inactive",
-            "ConsensusAI": "Inactive",
-            "SelfDefenseAI": "Inactive"
-        }
-        self.minni_alerts = {
-            "Wallet": [],
-            "Grok3MinniAI_Setup": [],
-            "TransferAI": [],
-            "RiskAI": [],
-            "ComplianceAI": [],
-            "ConsensusAI": [],
-            "SelfDefenseAI": []
-        }
-        self.minni_latest_operation = {
-            "Wallet": "N/A",
-            "Grok3MinniAI_Setup": "N/A",
-            "TransferAI": "N/A",
-            "RiskAI": "N/A",
-            "ComplianceAI": "N/A",
-            "ConsensusAI": "N/A",
-            "SelfDefenseAI": "N/A"
-        }
-
-# Initialize SystemState in Streamlit's session state
-if 'system_state' not in st.session_state:
-    st.session_state.system_state = SystemState()
-
-class Wallet:
-    def __init__(self, address, system_state):
+# Outgoing transactions: gas price is re-read at most every GAS_PRICE_TTL seconds,
+# and batches are signed on SIGNING_WORKERS processes (inline when 1)
+GAS_PRICE_TTL = float(os.getenv("GAS_PRICE_TTL", "5"))
+SIGNING_WORKERS = int(os.getenv("SIGNING_WORKERS", str(os.cpu_count() or 1)))
+
+# Alerts kept per Golden Minni layer (oldest are dropped beyond this) and rows per page of the alerts table
+ALERT_LOG_CAPACITY = int(os.getenv("ALERT_LOG_CAPACITY", "200"))
+ALERTS_PAGE_SIZE = int(os.getenv("ALERTS_PAGE_SIZE", "25"))
+
+# Shared balance poller: one upstream check per interval for the whole process
+BALANCE_POLL_INTERVAL = float(os.getenv("BALANCE_POLL_INTERVAL", "30"))
+# Balances older than this are flagged as stale in the UI
+BALANCE_STALE_AFTER = float(os.getenv("BALANCE_STALE_AFTER", str(3 * BALANCE_POLL_INTERVAL)))
+
+# Compliance screening: list files in SCREENING_LISTS_DIR are compiled into a shared,
+# memory-mapped index and re-read every SCREENING_RELOAD_INTERVAL seconds when they change
+SCREENING_LISTS_DIR = os.getenv("SCREENING_LISTS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "screening_lists"))
+SCREENING_INDEX_PATH = os.getenv("SCREENING_INDEX_PATH") # Defaults to screening.idx inside SCREENING_LISTS_DIR
+SCREENING_RELOAD_INTERVAL = float(os.getenv("SCREENING_RELOAD_INTERVAL", "60"))
+
+# Self-defense: sliding-window anomaly detection over session reruns, balance checks, transfer
+# requests and indexed payments. Limits are events one session or address may cause per THREAT_WINDOW seconds
+THREAT_WINDOW = float(os.getenv("THREAT_WINDOW", "60"))
+THREAT_Z_THRESHOLD = float(os.getenv("THREAT_Z_THRESHOLD", "4"))
+THREAT_RATE_LIMITS = {
+    "session_request": int(os.getenv("THREAT_SESSION_REQUEST_LIMIT", "120")),
+    "balance_check": int(os.getenv("THREAT_BALANCE_CHECK_LIMIT", "120")),
+    "transfer": int(os.getenv("THREAT_TRANSFER_LIMIT", "20")),
+    "payment": int(os.getenv("THREAT_PAYMENT_LIMIT", "10")),
+}
+
+# Instrumentation: hot-path timing spans and counters, off unless METRICS_ENABLED=1.
+# When on, they are served at http://127.0.0.1:METRICS_PORT/metrics (0 disables the endpoint)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0") == "1"
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+METRICS.enabled = METRICS_ENABLED
+
+# --- Shared Network Resources (one per process, reused by every session) ---
+
+@st.cache_resource
+def get_http_pool():
+    return HttpPool(pool_size=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT, retries=HTTP_RETRIES, backoff=HTTP_BACKOFF)
+
+@st.cache_resource
+def get_web3():
+    """Single Web3 client whose provider sends every RPC call through the shared HTTP pool.
+
+    web3 is imported here rather than at module level: it is the slowest import in
+    the app, and only signing and a few Wallet calls need it.
+    """
+    from web3 import Web3
+    from web3.middleware import ExtraDataToPOAMiddleware
+
+    web3 = Web3(Web3.HTTPProvider(SEPOLIA_RPC_URL, request_kwargs={"timeout": HTTP_TIMEOUT}, session=get_http_pool().session))
+    web3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
+    return web3
+
+@st.cache_resource
+def get_rate_limiter():
+    return RateLimiter()
+
+def rate_limited(http, name, secret, rate, burst):
+    """`http` behind the process-wide token bucket for `secret` (an API key or keyed URL), or as is when `rate` is 0."""
+    if rate <= 0:
+        return http
+    key = f"{name}:{hashlib.sha256(secret.encode('utf-8')).hexdigest()[:8]}" # Keeps keys out of the debug panel
+    return RateLimitedHttp(http, get_rate_limiter().bucket(key, rate, burst or None), max_wait=HTTP_TIMEOUT, name=name)
+
+@st.cache_resource
+def get_etherscan_http():
+    return rate_limited(get_http_pool(), "etherscan", ETHERSCAN_API_KEY, ETHERSCAN_RATE_LIMIT, ETHERSCAN_RATE_BURST)
+
+@st.cache_resource
+def get_rpc_client(urls=None):
+    """JSON-RPC client for `urls` (RPC_URLS by default): a plain client for one provider, a hedged one for several."""
+    urls = tuple(urls or RPC_URLS)
+    clients = [
+        JsonRpcClient(rate_limited(get_http_pool(), "rpc", url, RPC_RATE_LIMIT, RPC_RATE_BURST), url, retries=HTTP_RETRIES, backoff=HTTP_BACKOFF)
+        for url in urls
+    ]
+    if len(clients) == 1:
+        return clients[0]
+    providers = [Provider(name, client) for name, client in zip(provider_names(urls), clients)]
+    return HedgedRpcClient(providers, hedge_after=RPC_HEDGE_AFTER, quorum_timeout=HTTP_TIMEOUT)
+
+@st.cache_resource
+def get_balance_cache():
+    """Balances in Wei keyed by ("eth", address), shared by every session and the balance poller."""
+    return StaleWhileRevalidate(ttl=BALANCE_CACHE_TTL, max_stale=BALANCE_MAX_STALE)
+
+@st.cache_resource
+def get_threat_detector():
+    """Sliding-window statistics shared by every session and the payment indexer."""
+    return StreamDetector(window=THREAT_WINDOW, limits=THREAT_RATE_LIMITS, z_threshold=THREAT_Z_THRESHOLD)
+
+@st.cache_resource
+def get_payment_store():
+    return PaymentStore(PAYMENTS_DB_PATH)
+
+@st.cache_resource
+def get_multichain():
+    """Balance and payment reads for every supported chain, cached per chain and shared by every session."""
+    return MultiChain([
+        EthBackend(get_rpc_client(), get_payment_store(), timeout=CHAIN_TIMEOUT),
+        BtcBackend(get_http_pool(), BTC_API_URL, timeout=CHAIN_TIMEOUT),
+        SolBackend(JsonRpcClient(get_http_pool(), SOL_RPC_URL, retries=HTTP_RETRIES, backoff=HTTP_BACKOFF), timeout=CHAIN_TIMEOUT),
+    ], ttl=CHAIN_CACHE_TTL, max_stale=BALANCE_MAX_STALE)
+
+@st.cache_resource
+def get_entitlement_store():
+    """Premium status per payer, shared by every session and kept across reloads and restarts."""
+    return EntitlementStore(
+        ENTITLEMENTS_DB_PATH,
+        get_payment_store(),
+        min_wei=int(MIN_ETH_FOR_PREMIUM * 10**18),
+        duration=PREMIUM_DURATION_DAYS * 86400 if PREMIUM_DURATION_DAYS > 0 else None,
+        ttl=PREMIUM_CACHE_TTL,
+    )
+
+@st.cache_resource
+def get_access_token_secret():
+    return PREMIUM_LINK_SECRET.encode("utf-8") if PREMIUM_LINK_SECRET else secrets.token_bytes(32)
+
+@st.cache_resource
+def get_payment_indexer():
+    """Background indexer shared by all sessions; new payments update entitlements and feed threat detection."""
+    detector, entitlements = get_threat_detector(), get_entitlement_store()
+
+    def on_payments(payments):
+        entitlements.record_payments(payments)
+        # Anomalies stay in the detector's history; there is no session to alert from the indexer thread
+        for _ in detector.scan(payment_events(payments)):
+            pass
+
+    indexer = PaymentIndexer(
+        get_rpc_client(),
+        get_payment_store(),
+        [ETH_ADDR] + DEPOSIT_ADDRESSES,
+        confirmations=INDEXER_CONFIRMATIONS,
+        start_block=INDEXER_START_BLOCK,
+        interval=INDEXER_POLL_INTERVAL,
+        on_payments=on_payments,
+    )
+    indexer.start()
+    return indexer
+
+@st.cache_resource
+def get_receipt_watcher():
+    """One worker tracks every session's pending transactions."""
+    watcher = ReceiptWatcher(
+        get_rpc_client(),
+        min_interval=RECEIPT_MIN_INTERVAL,
+        max_interval=RECEIPT_MAX_INTERVAL,
+        timeout=RECEIPT_TIMEOUT,
+    )
+    watcher.start()
+    return watcher
+
+@st.cache_resource
+def get_screening_index():
+    """Screening index shared by every session; reloads swap in behind running checks."""
+    return ScreeningIndex(SCREENING_LISTS_DIR, SCREENING_INDEX_PATH, reload_interval=SCREENING_RELOAD_INTERVAL).load().start()
+
+@st.cache_resource
+def get_signing_executor():
+    if SIGNING_WORKERS <= 1:
+        return None
+    # spawn, not fork: forking the threaded server process is unsafe
+    return ProcessPoolExecutor(max_workers=SIGNING_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+@st.cache_resource
+def get_transaction_preparer():
+    """Process-wide nonce allocator and gas-price cache, so concurrent sessions never reuse a nonce."""
+    return TransactionPreparer(
+        get_rpc_client(),
+        gas_prices=GasPriceCache(get_rpc_client(), ttl=GAS_PRICE_TTL),
+        executor=get_signing_executor(),
+    )
+
+class Wallet(Layer):
+    __slots__ = ("address", "_web3", "rpc", "balances", "receipt_watcher")
+
+    def __init__(self, address, system_state, web3=None, rpc=None, receipt_watcher=None, balances=None, rpc_urls=None):
+        super().__init__(system_state)
         self.address = address
-        self.web3 = Web3(Web3.HTTPProvider(f'https://sepolia.infura.io/v3/{INFURA_PROJECT_ID}'))
-        # This is line 77 causing the error:
-        self.web3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
-        self.system_state = system_state
-        self.system_state.minni_status["Wallet"] = "Initialized"
-        self.system_state.minni_latest_operation["Wallet"] = f"Wallet initialized with address: {self.address}"
+        self._web3 = web3 # Resolved on first use, see the web3 property
+        self.rpc = rpc if rpc is not None else get_rpc_client(tuple(rpc_urls) if rpc_urls else None)
+        self.balances = balances if balances is not None else get_balance_cache()
+        self.receipt_watcher = receipt_watcher if receipt_watcher is not None else get_receipt_watcher()
+        self._system_state.minni_status["Wallet"] = "Initialized"
+        self._system_state.minni_latest_operation["Wallet"] = f"Wallet initialized with address: {self.address}"
 
+    @property
+    def web3(self):
+        if self._web3 is None:
+            self._web3 = get_web3()
+        return self._web3
+
+    @timed("wallet.get_eth_balance")
     def get_eth_balance(self):
+        """ETH balance of this wallet from the shared cache, or None if it was never fetched.
+
+        Concurrent reads of an expired balance share one upstream call, and upstream
+        errors serve the last good balance rather than 0.0, which would look like an
+        empty wallet.
+        """
         try:
-            balance_wei = self.web3.eth.get_balance(self.address)
-            balance_eth = self.web3.from_wei(balance_wei, 'ether')
-            self.system_state.minni_latest_operation["Wallet"] = f"Retrieved ETH balance: {balance_eth}"
-            return balance_eth
+            cached = self.balances.get(
+                ("eth", self.address.lower()),
+                lambda: int(self.rpc.call("eth_getBalance", [self.address, "latest"]), 16),
+            )
         except Exception as e:
             self.system_state.minni_status["Wallet"] = "Error"
-            self.system_state.minni_alerts["Wallet"].append(f"Failed to get ETH balance: {e}")
-            return 0.0
+            self.system_state.minni_alerts["Wallet"].append(f"Failed to get ETH balance: {e}", severity="error")
+            return None
+        balance_eth = Decimal(cached.value) / Decimal(10**18)
+        if cached.error is not None:
+            self.system_state.minni_alerts["Wallet"].append(f"Serving the ETH balance from {cached.age():.0f}s ago: {cached.error}", severity="warning")
+        self.system_state.minni_latest_operation["Wallet"] = f"Retrieved ETH balance: {balance_eth}"
+        return balance_eth
+
+    def get_eth_balances(self, addresses):
+        """Balances for many addresses in as few round trips as possible.
 
+        Uses JSON-RPC batches first and retries whatever failed through Etherscan's
+        multi-address endpoint. Addresses neither source could resolve get their last
+        good balance from the shared cache, or are left out if there is none.
+        """
+        results = fetch_balances_wei(self.rpc, addresses)
+        failed = [address for address, result in results.items() if isinstance(result, Exception)]
+        if failed:
+            results.update(fetch_eth_balances_from_etherscan(get_etherscan_http(), failed, ETHERSCAN_API_KEY, ETHERSCAN_API_URL))
+        balances = {}
+        for address, result in results.items():
+            if isinstance(result, Exception):
+                entry = self.balances.peek(("eth", address.lower()))
+                if entry is not None and time.time() - entry[1] < self.balances.max_stale:
+                    self.system_state.minni_alerts["Wallet"].append(f"Serving the ETH balance of {address} from {time.time() - entry[1]:.0f}s ago: {result}", severity="warning")
+                    result = entry[0]
+                else:
+                    self.system_state.minni_alerts["Wallet"].append(f"Failed to get ETH balance for {address}: {result}", severity="error")
+                    continue
+            else:
+                self.balances.put(("eth", address.lower()), result)
+            balances[address] = Decimal(result) / Decimal(10**18) # Same value as web3's from_wei, without importing web3
+        self.system_state.minni_latest_operation["Wallet"] = f"Retrieved ETH balances for {len(balances)}/{len(addresses)} addresses"
+        return balances
+
+    def get_transaction_receipts(self, tx_hashes):
+        """Receipts for many transactions in batched round trips (None while pending)."""
+        receipts = {}
+        for tx_hash, result in fetch_transaction_receipts(self.rpc, tx_hashes).items():
+            if isinstance(result, Exception):
+                self.system_state.minni_alerts["Wallet"].append(f"Error fetching receipt for {tx_hash}: {result}", severity="error")
+            else:
+                receipts[tx_hash] = result
+        return receipts
+
+    def watch_transaction(self, tx_hash):
+        """Hands `tx_hash` to the shared receipt watcher and returns its handle right away."""
+        return self.receipt_watcher.watch(tx_hash)
+
+    @timed("wallet.check_transaction_status")
     def check_transaction_status(self, tx_hash):
+        """Current status of `tx_hash` ("Pending", "Confirmed", "Failed" or "Timeout"); never blocks."""
         try:
-            tx_receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
-            if tx_receipt.status == 1:
+            status = self.watch_transaction(tx_hash).status
+            if status == "Confirmed":
                 self.system_state.minni_latest_operation["Wallet"] = f"Transaction {tx_hash} confirmed."
-                return "Confirmed"
-            else:
+            elif status == "Failed":
                 self.system_state.minni_latest_operation["Wallet"] = f"Transaction {tx_hash} failed."
-                return "Failed"
+            elif status == "Timeout":
+                self.system_state.minni_latest_operation["Wallet"] = f"No receipt for transaction {tx_hash} after {RECEIPT_TIMEOUT:.0f}s."
+            return status
         except Exception as e:
-            self.system_state.minni_alerts["Wallet"].append(f"Error checking transaction status: {e}")
+            self.system_state.minni_alerts["Wallet"].append(f"Error checking transaction status: {e}", severity="error")
             return "Error"
 
-def send_ethereum_transaction(sender_private_key, receiver_address, amount_eth, system_state):
+def send_ethereum_transaction(sender_private_key, receiver_address, amount_eth, system_state, preparer=None):
     """
     Simulates sending an Ethereum transaction using a private key.
     In a real application, this would be a secure backend operation.
@@ -113,145 +408,114 @@ def send_ethereum_transaction(sender_private_key, receiver_address, amount_eth,
     """
     system_state.minni_latest_operation["TransferAI"] = "Attempting to prepare Ethereum transaction..."
     try:
-        w3 = Web3(Web3.HTTPProvider(f'[https://sepolia.infura.io/v3/](https://sepolia.infura.io/v3/){INFURA_PROJECT_ID}'))
-        w3.middleware_onion.inject(geth_poa_middleware, layer=0)
-
-        # Get sender address from private key
-        sender_account = w3.eth.account.from_key(sender_private_key)
-        sender_address = sender_account.address
-
-        nonce = w3.eth.get_transaction_count(sender_address)
-        gas_price = w3.eth.gas_price
-
-        transaction = {
-            'from': sender_address,
-            'to': receiver_address,
-            'value': w3.to_wei(amount_eth, 'ether'),
-            'nonce': nonce,
-            'gasPrice': gas_price,
-            'gas': 21000 # Standard gas limit for ETH transfer
-        }
-
-        # Sign the transaction
-        signed_txn = w3.eth.account.sign_transaction(transaction, private_key=sender_private_key)
-
-        # In a real scenario, you'd send this:
-        # tx_hash = w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-        # system_state.minni_latest_operation["TransferAI"] = f"Ethereum transaction sent! Tx Hash: {tx_hash.hex()}"
-        # return tx_hash.hex()
-
-        system_state.minni_latest_operation["TransferAI"] = (
-            f"Ethereum transaction PREPARED (simulated sending): "
-            f"From {sender_address}, To {receiver_address}, Amount {amount_eth} ETH. "
-            f"Signed Tx Raw: {signed_txn.rawTransaction.hex()[:50]}..."
-        )
-        system_state.minni_alerts["TransferAI"].append("Simulation: Actual transaction not sent for security reasons.")
+        preparer = preparer or get_transaction_preparer()
+        # Nonce and gas price come from the shared allocator and cache, not from a node round trip each
+        prepared = preparer.prepare(sender_private_key, receiver_address, int(Decimal(str(amount_eth)) * 10**18))
+        try:
+            # In a real scenario, you'd send this (and keep the nonce once it is broadcast):
+            # tx_hash = get_rpc_client().call("eth_sendRawTransaction", [prepared.raw_transaction])
+            # system_state.minni_latest_operation["TransferAI"] = f"Ethereum transaction sent! Tx Hash: {tx_hash}"
+            # return tx_hash
+
+            system_state.minni_latest_operation["TransferAI"] = (
+                f"Ethereum transaction PREPARED (simulated sending): "
+                f"From {prepared.sender}, To {receiver_address}, Amount {amount_eth} ETH, Nonce {prepared.nonce}. "
+                f"Signed Tx Raw: {prepared.raw_transaction[:50]}..."
+            )
+        finally:
+            # Nothing was broadcast: hand the nonce back so the sender's real transactions leave no gap
+            preparer.nonces.release(prepared.sender, prepared.nonce, 1)
+        system_state.minni_alerts["TransferAI"].append("Simulation: Actual transaction not sent for security reasons.", severity="info")
         return "SIMULATED_TX_HASH_" + secrets.token_hex(16) # Return a simulated hash
     except Exception as e:
         system_state.minni_status["TransferAI"] = "Error"
-        system_state.minni_alerts["TransferAI"].append(f"Error preparing Ethereum transaction: {e}")
+        system_state.minni_alerts["TransferAI"].append(f"Error preparing Ethereum transaction: {e}", severity="error")
+        return None
+
+def prepare_ethereum_transactions(sender_private_key, transfers, system_state, preparer=None):
+    """
+    Signs a batch of payouts or rebalances, `transfers` being (receiver address, amount in ETH) pairs.
+    The batch gets consecutive nonces and costs at most three node round trips however large it is.
+    Returns the PreparedTransaction list, or None if the batch could not be prepared. Transactions
+    the caller does not broadcast must be handed back with preparer.nonces.release.
+    """
+    system_state.minni_latest_operation["TransferAI"] = f"Preparing a batch of {len(transfers)} Ethereum transactions..."
+    try:
+        preparer = preparer or get_transaction_preparer()
+        prepared = preparer.prepare_batch(
+            sender_private_key,
+            [(receiver, int(Decimal(str(amount_eth)) * 10**18)) for receiver, amount_eth in transfers],
+        )
+        if prepared:
+            system_state.minni_latest_operation["TransferAI"] = (
+                f"Prepared {len(prepared)} Ethereum transactions from {prepared[0].sender}, "
+                f"nonces {prepared[0].nonce}-{prepared[-1].nonce} (simulated, not sent)."
+            )
+        return prepared
+    except Exception as e:
+        system_state.minni_status["TransferAI"] = "Error"
+        system_state.minni_alerts["TransferAI"].append(f"Error preparing Ethereum transaction batch: {e}", severity="error")
         return None
 
-# Placeholder AI Layers
-class Grok3MinniAI_Setup:
-    def __init__(self, system_state):
-        self.system_state = system_state
-        self.system_state.minni_status["Grok3MinniAI_Setup"] = "Ready"
-        self.system_state.minni_latest_operation["Grok3MinniAI_Setup"] = "Grok-3 Minni AI setup complete."
-    def run_initial_scan(self):
-        self.system_state.minni_latest_operation["Grok3MinniAI_Setup"] = "Performing initial system scan and optimization."
-        # Simulate some setup
-        time.sleep(0.5)
-        self.system_state.minni_latest_operation["Grok3MinniAI_Setup"] = "Initial system scan complete."
-        return {"status": "success", "message": "Grok-3 initial setup completed."}
-
-class _Transfer: # Renamed to avoid conflict with the function, conceptually represents the AI behind transfers
-    def __init__(self, system_state):
-        self.system_state = system_state
-        self.system_state.minni_status["TransferAI"] = "Monitoring"
-        self.system_state.minni_latest_operation["TransferAI"] = "Transfer AI activated, monitoring for transaction requests."
-    def process_request(self, request_data):
-        self.system_state.minni_latest_operation["TransferAI"] = f"Processing transfer request: {request_data.get('type')}"
-        # Simulate transfer logic
-        if request_data.get("amount", 0) > 100:
-            self.system_state.minni_alerts["TransferAI"].append(f"High-value transfer alert: {request_data.get('amount')} {request_data.get('currency')}")
-        return {"status": "processed", "message": "Transfer AI logic applied."}
-
-class _Risk:
-    def __init__(self, system_state):
-        self.system_state = system_state
-        self.system_state.minni_status["RiskAI"] = "Active"
-        self.system_state.minni_latest_operation["RiskAI"] = "Risk AI initialized, continuously assessing."
-    def assess(self, transaction_details):
-        risk_score = secrets.randbelow(100) # Simulate risk score
-        self.system_state.minni_latest_operation["RiskAI"] = f"Assessed risk for transaction. Score: {risk_score}"
-        if risk_score > 70:
-            self.system_state.minni_alerts["RiskAI"].append(f"High risk detected (Score: {risk_score}) for: {transaction_details}")
-            return {"risk": "high", "score": risk_score}
-        return {"risk": "low", "score": risk_score}
-
-class _Compliance:
-    def __init__(self, system_state):
-        self.system_state = system_state
-        self.system_state.minni_status["ComplianceAI"] = "Active"
-        self.system_state.minni_latest_operation["ComplianceAI"] = "Compliance AI initialized, checking regulations."
-    def check_compliance(self, user_info, transaction_info):
-        is_compliant = True # Simulate compliance check
-        self.system_state.minni_latest_operation["ComplianceAI"] = "Performed compliance checks."
-        if "sanctioned_country" in user_info:
-            is_compliant = False
-            self.system_state.minni_alerts["ComplianceAI"].append(f"Non-compliant user detected: {user_info.get('id')}")
-        return {"compliant": is_compliant}
-
-class _Consensus:
-    def __init__(self, system_state):
-        self.system_state = system_state
-        self.system_state.minni_status["ConsensusAI"] = "Active"
-        self.system_state.minni_latest_operation["ConsensusAI"] = "Consensus AI active, validating decisions."
-    def validate_action(self, proposed_action):
-        self.system_state.minni_latest_operation["ConsensusAI"] = f"Validating action: {proposed_action.get('type')}"
-        # Simulate consensus
-        if proposed_action.get("critical", False) and secrets.randbelow(10) < 2:
-            self.system_state.minni_alerts["ConsensusAI"].append(f"Consensus disagreement on critical action: {proposed_action.get('type')}")
-            return False
-        return True
-
-class _SelfDefense:
-    def __init__(self, system_state):
-        self.system_state = system_state
-        self.system_state.minni_status["SelfDefenseAI"] = "Monitoring"
-        self.system_state.minni_latest_operation["SelfDefenseAI"] = "Self-Defense AI scanning for threats."
-    def detect_threat(self, data_stream):
-        threat_level = secrets.randbelow(10) # Simulate threat detection
-        self.system_state.minni_latest_operation["SelfDefenseAI"] = f"Threat detection scan. Level: {threat_level}"
-        if threat_level > 7:
-            self.system_state.minni_alerts["SelfDefenseAI"].append(f"Potential threat detected (Level: {threat_level}) in data stream.")
-            return True
-        return False
-
-# --- Golden Minni Backend Initialization (Persistent in Session State) ---
+# --- Golden Minni Backend Initialization (one backend per process, one SystemState per session) ---
+@st.cache_resource
+def get_pipeline_executor():
+    return ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="minni-pipeline")
+
+def build_evaluation_pipeline(golden_minni):
+    """Pipeline over the AI layers, running its checks on the shared thread pool."""
+    return EvaluationPipeline(
+        golden_minni["transfer_ai"],
+        golden_minni["risk_ai"],
+        golden_minni["compliance_ai"],
+        golden_minni["consensus_ai"],
+        golden_minni["self_defense_ai"],
+        executor=get_pipeline_executor(),
+    )
+
+@st.cache_resource
+def get_initial_scan():
+    """Grok-3 initial scan, run once per process in the background and shared by every session."""
+    return BackgroundTask("grok3-initial-scan", Grok3MinniAI_Setup(SystemState(alert_capacity=ALERT_LOG_CAPACITY)).run_initial_scan).start()
+
+@st.cache_resource
+def get_shared_system_state():
+    """Status and latest operations every session starts from; sessions copy what they change."""
+    return SystemState(alert_capacity=ALERT_LOG_CAPACITY)
+
+@st.cache_resource
+def get_golden_minni_backend():
+    """Wallet, AI layers and pipeline shared by every session.
+
+    They keep no session state: each reports into the SystemState the current
+    script run selects with use_system_state.
+    """
+    system_state = get_shared_system_state()
+    backend = {
+        "wallet": Wallet(ETH_ADDR, system_state),
+        "grok3_setup": Grok3MinniAI_Setup(system_state),
+        **build_layers(system_state, get_screening_index(), get_threat_detector(), rpc=get_rpc_client(), quorum=RPC_QUORUM),
+    }
+    backend["pipeline"] = build_evaluation_pipeline(backend)
+    return backend
+
+@timed("init_golden_minni_backend")
 def init_golden_minni_backend():
-    if 'golden_minni' not in st.session_state:
-        st.session_state.golden_minni = {
-            "wallet": Wallet(ETH_ADDR, st.session_state.system_state),
-            "grok3_setup": Grok3MinniAI_Setup(st.session_state.system_state),
-            "transfer_ai": _Transfer(st.session_state.system_state),
-            "risk_ai": _Risk(st.session_state.system_state),
-            "compliance_ai": _Compliance(st.session_state.system_state),
-            "consensus_ai": _Consensus(st.session_state.system_state),
-            "self_defense_ai": _SelfDefense(st.session_state.system_state)
-        }
-        # Run initial setup for Grok3 Minni
-        st.session_state.golden_minni["grok3_setup"].run_initial_scan()
+    if 'system_state' not in st.session_state:
+        st.session_state.system_state = SystemState(alert_capacity=ALERT_LOG_CAPACITY, shared=get_shared_system_state())
         st.session_state.minni_initialized = True
-    else:
-        # Ensure system_state reference is updated if the object itself is re-initialized (Streamlit reruns)
-        for ai_module in st.session_state.golden_minni.values():
-            if hasattr(ai_module, 'system_state'):
-                ai_module.system_state = st.session_state.system_state
+    use_system_state(st.session_state.system_state) # The shared layers report into this session for the rest of the run
+    sync_initial_scan_state()
+
+def sync_initial_scan_state():
+    # The initial scan runs once per process in the background; sessions only follow its progress
+    if st.session_state.get("initial_scan_state") not in ("done", "failed"):
+        st.session_state.initial_scan_state = get_golden_minni_backend()["grok3_setup"].sync_initial_scan(get_initial_scan())
 
 # --- OraculumX Streamlit Application ---
 
+script_run_started = time.perf_counter()
+
 st.set_page_config(layout="wide", page_title="OraculumX Command Center", page_icon="🌐")
 
 # Custom CSS for a sleek, futuristic look
@@ -357,86 +621,303 @@ st.markdown("""
 st.markdown('<p class="main-header">ORACULUMX COMMAND CENTER</p>', unsafe_allow_html=True)
 st.markdown('<p class="subheader">Golden Minni AI Integrated</p>', unsafe_allow_html=True)
 
-# Initialize Golden Minni backend on first run
+# Select this session's SystemState for the shared Golden Minni backend
 init_golden_minni_backend()
-
-# Retrieve the Wallet instance from session state
-minni_wallet = st.session_state.golden_minni["wallet"]
+minni_backend = get_golden_minni_backend()
+minni_wallet = minni_backend["wallet"]
 
 # --- Functions ---
-def generate_qr_code(data):
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(data)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
-    buf = BytesIO()
-    img.save(buf, format="PNG")
-    return base64.b64encode(buf.getvalue()).decode("utf-8")
-
-@st.cache_data(ttl=30) # Cache for 30 seconds
-def get_eth_balance_from_etherscan(address, api_key):
-    url = f"[https://api-sepolia.etherscan.io/api?module=account&action=balance&address=](https://api-sepolia.etherscan.io/api?module=account&action=balance&address=){address}&tag=latest&apikey={api_key}"
+@st.cache_resource
+def get_qr_cache():
+    return QRCodeCache(max_entries=QR_CACHE_SIZE, cache_dir=QR_CACHE_DIR, max_disk_entries=QR_CACHE_DISK_SIZE)
+
+@timed("generate_qr_code")
+def generate_qr_code(data, fmt=QR_FORMAT):
+    """Base64 QR image for `data`; rendered once per payload and served from the shared cache after that."""
+    return get_qr_cache().get(data, fmt=fmt, box_size=10, border=4, error_correction="L")
+
+def fetch_watched_balances(addresses):
+    """ETH balances for every watched address, 20 per Etherscan call."""
+    results = fetch_eth_balances_from_etherscan(get_etherscan_http(), addresses, ETHERSCAN_API_KEY, ETHERSCAN_API_URL)
+    balance_cache = get_balance_cache()
+    for address, result in results.items():
+        if not isinstance(result, Exception):
+            balance_cache.put(("eth", address.lower()), result) # On-demand reads of watched addresses become cache hits
+    return {
+        address: result if isinstance(result, Exception) else result / (10**18)
+        for address, result in results.items()
+    }
+
+@st.cache_resource
+def get_balance_poller():
+    """One balance poller per process; every session reads its snapshots."""
+    poller = BalancePoller([ETH_ADDR] + DEPOSIT_ADDRESSES, fetch_watched_balances, interval=BALANCE_POLL_INTERVAL)
+    poller.start() # Polls right away on its own thread; pages show "loading" until the first snapshot lands
+    return poller
+
+def read_eth_balance(address):
+    """Reads the shared balance snapshot for `address` without touching the network."""
+    snapshot = get_balance_poller().snapshot(address)
+    minni_backend["self_defense_ai"].monitor("balance_check", st.session_state.session_id)
+    system_state = st.session_state.system_state
+    if snapshot.error and st.session_state.get("last_balance_error_at") != snapshot.checked_at:
+        # Surface each upstream failure once per session
+        st.session_state.last_balance_error_at = snapshot.checked_at
+        system_state.minni_alerts["Wallet"].append(snapshot.error, severity="error")
+    elif snapshot.updated_at is not None:
+        system_state.minni_latest_operation["Wallet"] = f"Etherscan ETH balance check: {snapshot.balance:.6f} ETH"
+    return snapshot
+
+class RenderStats:
+    """Process-wide timings of full script runs versus live fragment refreshes."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs = {}
+
+    def record(self, kind, seconds):
+        with self._lock:
+            count, total, worst = self.runs.get(kind, (0, 0.0, 0.0))
+            self.runs[kind] = (count + 1, total + seconds, max(worst, seconds))
+        if METRICS.enabled:
+            METRICS.observe_span(f"script.{kind}", seconds)
+
+    def summary(self):
+        with self._lock:
+            return {
+                kind: {"runs": count, "avg_ms": round(1000 * total / count, 2), "max_ms": round(1000 * worst, 2)}
+                for kind, (count, total, worst) in self.runs.items()
+            }
+
+@st.cache_resource
+def get_render_stats():
+    return RenderStats()
+
+class SessionActivity:
+    """Sessions seen within the last `window` seconds, as a stand-in for connected users."""
+    def __init__(self, window):
+        self.window = window
+        self._lock = threading.Lock()
+        self._last_seen = {}
+
+    def touch(self, session_id):
+        with self._lock:
+            self._last_seen[session_id] = time.monotonic()
+
+    def active(self):
+        cutoff = time.monotonic() - self.window
+        with self._lock:
+            for session_id in [sid for sid, seen in self._last_seen.items() if seen < cutoff]:
+                del self._last_seen[session_id]
+            return len(self._last_seen)
+
+@st.cache_resource
+def get_session_activity():
+    # Live panels rerun every LIVE_REFRESH_INTERVAL, so an open tab is never silent for two intervals
+    return SessionActivity(window=2 * LIVE_REFRESH_INTERVAL)
+
+@st.cache_resource
+def get_metrics_exporter():
+    """Registers collectors for counters kept by the shared resources and starts the /metrics endpoint."""
+    http_pool, qr_cache, preparer = get_http_pool(), get_qr_cache(), get_transaction_preparer()
+    receipt_watcher, sessions = get_receipt_watcher(), get_session_activity()
+    entitlements, balance_cache = get_entitlement_store(), get_balance_cache()
+
+    def collect():
+        pool = http_pool.stats()
+        qr = qr_cache.stats()
+        balances = balance_cache.stats()
+        return [
+            ("http_responses_total", "counter", "Upstream HTTP responses", {}, pool["responses"]),
+            ("http_errors_total", "counter", "Upstream HTTP errors and error statuses", {}, pool["errors"]),
+            ("http_connections_opened_total", "counter", "Upstream connections opened", {}, pool["connections_opened"]),
+            ("http_connections_reused_total", "counter", "Upstream requests sent on a kept-alive connection", {}, pool["connections_reused"]),
+            ("qr_cache_hits_total", "counter", "QR codes served from cache", {"tier": "memory"}, qr["hits"]),
+            ("qr_cache_hits_total", "counter", "QR codes served from cache", {"tier": "disk"}, qr["disk_hits"]),
+            ("qr_cache_misses_total", "counter", "QR codes rendered", {}, qr["misses"]),
+            ("gas_price_cache_hits_total", "counter", "Gas prices served from cache", {}, preparer.gas_prices.hits),
+            ("gas_price_fetches_total", "counter", "Gas prices read from the node", {}, preparer.gas_prices.fetches),
+            ("balance_cache_hits_total", "counter", "On-demand balance reads served fresh from memory", {}, balances["hits"]),
+            ("balance_cache_stale_served_total", "counter", "Balance reads served stale while refreshing or during upstream errors", {}, balances["stale_served"]),
+            ("upstream_calls_coalesced_total", "counter", "Balance reads that joined an identical in-flight call", {}, balances["coalesced"]),
+            ("entitlement_cache_hits_total", "counter", "Premium checks answered from memory", {}, entitlements.hits),
+            ("entitlement_cache_misses_total", "counter", "Premium checks that read SQLite", {}, entitlements.misses),
+            ("receipts_pending", "gauge", "Transactions waiting for a receipt", {}, receipt_watcher.pending_count()),
+            ("active_sessions", "gauge", "Sessions that reran within the activity window", {}, sessions.active()),
+        ]
+
+    METRICS.add_collector(collect)
+    if not METRICS_PORT:
+        return None
     try:
-        response = requests.get(url)
-        response.raise_for_status() # Raise an HTTPError for bad responses (4xx or 5xx)
-        data = response.json()
-        if data["status"] == "1":
-            # Balance is in Wei, convert to Ether
-            balance_wei = int(data["result"])
-            balance_eth = balance_wei / (10**18)
-            st.session_state.system_state.minni_latest_operation["Wallet"] = f"Etherscan ETH balance check: {balance_eth:.6f} ETH"
-            return balance_eth
-        else:
-            st.session_state.system_state.minni_alerts["Wallet"].append(f"Etherscan API error: {data['message']}")
-            return 0.0
-    except requests.exceptions.RequestException as e:
-        st.session_state.system_state.minni_alerts["Wallet"].append(f"Network error fetching ETH balance from Etherscan: {e}")
-        return 0.0
-    except ValueError as e:
-        st.session_state.system_state.minni_alerts["Wallet"].append(f"JSON decoding or data conversion error from Etherscan: {e}")
-        return 0.0
+        return serve_metrics(METRICS, port=METRICS_PORT)
+    except OSError:
+        return None # Port taken, e.g. by another server process; the debug panel still works
+
+def is_fragment_run():
+    """True while Streamlit reruns fragments alone instead of the whole script."""
+    ctx = get_script_run_ctx()
+    return bool(ctx is not None and ctx.fragment_ids_this_run)
+
+def live_fragment(render):
+    """Re-runs `render` alone every LIVE_REFRESH_INTERVAL seconds in fragment mode, timing each run."""
+    def timed_render():
+        started = time.perf_counter()
+        fragment_run = is_fragment_run()
+        # Fragment runs skip init_golden_minni_backend and may start on a fresh thread
+        use_system_state(st.session_state.system_state)
+        if METRICS_ENABLED:
+            get_session_activity().touch(st.session_state.session_id)
+        if fragment_run:
+            minni_backend["self_defense_ai"].monitor("session_request", st.session_state.session_id)
+        render()
+        if fragment_run:
+            # Only time fragment-scoped reruns, not the pass inside a full script run
+            get_render_stats().record(f"fragment:{render.__name__}", time.perf_counter() - started)
+    timed_render.__name__ = render.__name__
+    if LIVE_REFRESH_MODE == "fragment":
+        return st.fragment(run_every=LIVE_REFRESH_INTERVAL)(timed_render)
+    return render
 
 # --- Payment and Premium Access Logic ---
 
-# Check if premium access is already active in session state
-if 'premium_active' not in st.session_state:
-    st.session_state.premium_active = False
-if 'last_balance_check_time' not in st.session_state:
-    st.session_state.last_balance_check_time = datetime.min
-
-# Only check balance every 30 seconds to avoid API rate limits
-if not st.session_state.premium_active or (datetime.now() - st.session_state.last_balance_check_time) > timedelta(seconds=30):
-    current_eth_balance = get_eth_balance_from_etherscan(ETH_ADDR, ETHERSCAN_API_KEY)
-    st.session_state.eth_balance = current_eth_balance
-    st.session_state.last_balance_check_time = datetime.now()
-    if st.session_state.eth_balance >= MIN_ETH_FOR_PREMIUM:
-        st.session_state.premium_active = True
-        st.session_state.system_state.premium_active = True # Update Golden Minni's state
-    else:
-        st.session_state.premium_active = False
-        st.session_state.system_state.premium_active = False # Update Golden Minni's state
+def describe_chain_balance(balance):
+    if balance is None:
+        return "(Balance not loaded)"
+    if balance.value is None:
+        return "(Balance loading...)" if isinstance(balance.error, ChainTimeout) else "(Balance unavailable)"
+    return f"Balance: {balance.amount:.8f} {balance.symbol}" + (" (cached, refreshing)" if balance.stale else "")
 
-st.markdown("---")
+def verify_payer():
+    """The payer address this session proved control of by signature, or ""."""
+    payer_address = st.session_state.get("payer_address", "").strip().lower()
+    if st.session_state.verified_payer != payer_address:
+        st.session_state.verified_payer = "" # Proof is per address; a different one needs its own
+    signature = st.session_state.get("payer_signature", "").strip()
+    attempt = (payer_address, signature)
+    if payer_address and signature and not st.session_state.verified_payer and st.session_state.get("payer_signature_checked") != attempt:
+        st.session_state.payer_signature_checked = attempt # Fragment reruns do not recheck a bad signature
+        if verify_payer_signature(payer_address, payer_challenge(payer_address, st.session_state.payer_nonce), signature):
+            st.session_state.verified_payer = payer_address
+    verified_payer = st.session_state.verified_payer
+    if verified_payer and read_access_token(get_access_token_secret(), st.query_params.get("access", "")) != verified_payer:
+        # Only a verified payer rides along in the URL, so a reload keeps the gate open for its owner
+        st.query_params["access"] = issue_access_token(get_access_token_secret(), verified_payer, time.time() + PREMIUM_LINK_DAYS * 86400)
+    elif not verified_payer and "access" in st.query_params:
+        del st.query_params["access"]
+    return verified_payer
 
-tab1, tab2, tab3 = st.tabs(["Dashboard", "Access & Payment", "Golden Minni Backend Operations"])
+def refresh_balance_state():
+    """Updates the session's balance and premium status from the shared snapshots."""
+    # Balances are refreshed by the shared poller, so every rerun just reads the latest snapshot
+    snapshot = read_eth_balance(ETH_ADDR)
+    st.session_state.eth_balance = snapshot.balance
+    st.session_state.balance_loading = snapshot.loading
+    st.session_state.last_balance_check_time = snapshot.updated_at or datetime.min
+    st.session_state.balance_is_stale = not snapshot.loading and snapshot.is_stale(BALANCE_STALE_AFTER)
+    # Premium is granted per payer: whoever paid at least MIN_ETH_FOR_PREMIUM from an address they proved is theirs
+    verified_payer = verify_payer()
+    get_payment_indexer() # Keeps entitlements following new payments
+    st.session_state.premium_active = get_entitlement_store().is_premium(verified_payer)
+    st.session_state.system_state.premium_active = st.session_state.premium_active # Update Golden Minni's state
+    return snapshot
 
-with tab1:
-    st.header("OraculumX Dashboard")
+@live_fragment
+def render_balance_panel():
+    was_premium = st.session_state.get("premium_active")
+    snapshot = refresh_balance_state()
+    if was_premium is not None and was_premium != st.session_state.premium_active:
+        st.rerun(scope="app") # Premium flipped: the gated content outside this panel must change too
 
     col1, col2 = st.columns(2)
     with col1:
-        st.metric(label="Current ETH Balance (Your Wallet)", value=f"{st.session_state.eth_balance:.6f} ETH", delta_color="normal")
+        if snapshot.loading:
+            st.metric(label="Current ETH Balance (Your Wallet)", value="Loading...")
+            st.caption("Fetching the balance; this panel updates when it arrives.")
+        else:
+            st.metric(label="Current ETH Balance (Your Wallet)", value=f"{st.session_state.eth_balance:.6f} ETH", delta_color="normal")
+            balance_age = snapshot.age()
+            if balance_age is None:
+                st.caption("Balance not retrieved yet.")
+            else:
+                st.caption(f"Updated {balance_age:.0f}s ago{' (stale)' if st.session_state.balance_is_stale else ''}.")
     with col2:
         if st.session_state.premium_active:
             st.markdown(f'<div class="premium-access"><h2>✅ PREMIUM ACCESS ACTIVE ✅</h2><p>Welcome, Commander! All signals unlocked.</p></div>', unsafe_allow_html=True)
         else:
             st.markdown(f'<div class="premium-access"><h2>🔒 PREMIUM ACCESS REQUIRED 🔒</h2><p>Unlock advanced signals by making a payment.</p></div>', unsafe_allow_html=True)
 
+@live_fragment
+def render_minni_panels():
+    sync_initial_scan_state()
+    system_state = st.session_state.system_state
+
+    # One table each for status and alerts, so the element count stays flat however much a session logs
+    st.subheader("AI Layer Status")
+    st.dataframe(
+        {
+            "Layer": list(system_state.minni_status),
+            "Status": list(system_state.minni_status.values()),
+            "Latest operation": [system_state.minni_latest_operation.get(name, "N/A") for name in system_state.minni_status],
+        },
+        hide_index=True,
+        width="stretch",
+    )
+
+    with st.expander("Upstream Connection Pool"):
+        st.json(get_http_pool().stats())
+        st.json({"rate_limits": get_rate_limiter().stats(), "balance_cache": get_balance_cache().stats(), "chains": get_multichain().stats()})
+        if isinstance(get_rpc_client(), HedgedRpcClient):
+            st.json({"rpc_providers": get_rpc_client().stats()})
+
+    st.subheader("AI Layer Alerts")
+    alerts = system_state.minni_alerts
+    filter_cols = st.columns([3, 2, 1])
+    layers = filter_cols[0].multiselect("Layers", list(alerts), key="alert_layers", placeholder="All layers")
+    severities = filter_cols[1].multiselect("Severities", SEVERITIES, key="alert_severities", placeholder="All severities")
+    matching = alerts.count(layers, severities)
+    pages = max(1, -(-matching // ALERTS_PAGE_SIZE))
+    if st.session_state.get("alerts_page", 1) > pages: # Filters narrowed the result
+        st.session_state.alerts_page = pages
+    page = filter_cols[2].number_input("Page", min_value=1, max_value=pages, key="alerts_page")
+    records = alerts.page((page - 1) * ALERTS_PAGE_SIZE, ALERTS_PAGE_SIZE, layers, severities)
+    if records:
+        st.dataframe(
+            {
+                "Time": [datetime.fromtimestamp(record.timestamp).strftime("%H:%M:%S") for record in records],
+                "Layer": [record.layer for record in records],
+                "Severity": [record.severity.upper() for record in records],
+                "Message": [str(record) for record in records],
+            },
+            hide_index=True,
+            width="stretch",
+        )
+        first = (page - 1) * ALERTS_PAGE_SIZE + 1
+        dropped = sum(alerts.dropped().values())
+        st.caption(f"Alerts {first}-{first + len(records) - 1} of {matching}, newest first. {dropped} older alerts dropped from the log.")
+    else:
+        st.info("✅ No alerts match these filters." if layers or severities else "✅ No new alerts.")
+
+st.session_state.setdefault("session_id", secrets.token_hex(8))
+if "verified_payer" not in st.session_state:
+    st.session_state.verified_payer = read_access_token(get_access_token_secret(), st.query_params.get("access", "")) or ""
+    st.session_state.payer_address = st.session_state.verified_payer
+    st.session_state.payer_nonce = secrets.token_hex(16)
+minni_backend["self_defense_ai"].monitor("session_request", st.session_state.session_id)
+if METRICS_ENABLED:
+    metrics_server = get_metrics_exporter()
+    get_session_activity().touch(st.session_state.session_id)
+refresh_balance_state()
+
+st.markdown("---")
+
+# Switching tabs reruns the script, so each tab knows whether it is open and can skip hidden heavy work
+tab1, tab2, tab3 = st.tabs(["Dashboard", "Access & Payment", "Golden Minni Backend Operations"], key="active_tab", on_change="rerun")
+
+with tab1:
+    st.header("OraculumX Dashboard")
+
+    render_balance_panel()
+
     st.markdown("---")
     st.subheader("Current Market Signals")
 
@@ -479,12 +960,15 @@ with tab2:
     st.header("Access & Payment Gateway")
     st.write("To gain full access to OraculumX's premium AI-driven crypto signals, please make a one-time payment to the wallet address below.")
 
+    # Rendering a QR code imports qrcode and PIL, so it waits until this tab is actually opened
+    payment_qr = generate_qr_code(f"ethereum:{ETH_ADDR}?amount={MIN_ETH_FOR_PREMIUM}") if tab2.open else ""
+
     st.markdown(f"""
     <div class="payment-section">
         <h3>Unlock Premium Signals (ETH)</h3>
         <p>Send at least <span style="color:#00ff00; font-weight:bold;">{MIN_ETH_FOR_PREMIUM} ETH</span> to the address below:</p>
         <div style="margin: 20px auto; width: 250px;">
-            <img src="data:image/png;base64,{generate_qr_code(f"ethereum:{ETH_ADDR}?amount={MIN_ETH_FOR_PREMIUM}")}" alt="ETH QR Code" style="width:100%; height:auto;">
+            <img src="data:{MIME_TYPES[QR_FORMAT]};base64,{payment_qr}" alt="ETH QR Code" style="width:100%; height:auto; background-color:white;">
         </div>
         <p style="font-size:1.2em; font-weight:bold;">Ethereum (ETH) Address:</p>
         <div class="code-block">
@@ -500,28 +984,54 @@ with tab2:
             (Please ensure you are on the Sepolia testnet if using MetaMask for testing.)
         </p>
         <p style="font-size:0.9em; color:#a0a0a0;">
-            Your premium access will be automatically activated once the transaction is confirmed on the blockchain.
+            Your premium access will be automatically activated once the transaction is confirmed on the blockchain and you prove below that you control the paying address.
         </p>
         <p style="font-size:0.9em; color:#a0a0a0;">
-            Current ETH Balance in your payment wallet: <span style="font-weight:bold; color:#00ff00;">{st.session_state.eth_balance:.6f} ETH</span>
+            Current ETH Balance in your payment wallet: <span style="font-weight:bold; color:#00ff00;">{"loading..." if st.session_state.balance_loading else f"{st.session_state.eth_balance:.6f} ETH"}</span>
         </p>
         <p style="font-size:0.9em; color:#a0a0a0;">
-            Last checked: {st.session_state.last_balance_check_time.strftime("%Y-%m-%d %H:%M:%S")}
+            Last checked: {"loading..." if st.session_state.balance_loading else st.session_state.last_balance_check_time.strftime("%Y-%m-%d %H:%M:%S")}{" (stale)" if st.session_state.balance_is_stale else ""}
         </p>
         <button onclick="window.location.reload();" style="margin-top: 20px;">Refresh Balance Check</button>
     </div>
     """, unsafe_allow_html=True)
 
+    st.text_input(
+        "Already paid? Enter the address you paid from to unlock premium access",
+        key="payer_address",
+        placeholder="0x...",
+    )
+    payer_address = st.session_state.payer_address.strip().lower()
+    if payer_address and not st.session_state.verified_payer:
+        # Anyone can read a payer's address on-chain, so only a signature by its key unlocks its premium
+        st.caption("Sign this message with that address (personal_sign, e.g. in MetaMask) and paste the signature below:")
+        st.code(payer_challenge(payer_address, st.session_state.payer_nonce), language=None)
+        st.text_input("Signature", key="payer_signature", placeholder="0x...")
+        if st.session_state.get("payer_signature", "").strip():
+            st.error("This signature was not made by that address for the message above.")
+    elif payer_address and not st.session_state.premium_active:
+        st.info("No confirmed payment of the required amount from this address has been indexed yet.")
+    elif st.session_state.premium_active:
+        entitlement = get_entitlement_store().get(st.session_state.verified_payer)
+        if entitlement.expires_at is not None:
+            st.caption(f"Premium access active until {datetime.fromtimestamp(entitlement.expires_at):%Y-%m-%d %H:%M}.")
+    payment_indexer = get_payment_indexer()
+    if payment_indexer.last_error:
+        st.caption(payment_indexer.last_error)
+    else:
+        st.caption(f"Payment indexer at block {payment_indexer.store.cursor() or 'N/A'}.")
+
     st.markdown("---")
-    st.subheader("Other Payment Options (Coming Soon)")
-    st.info("Bitcoin (BTC) and Solana (SOL) payment gateways are under development by the Golden Minni AI module for multi-chain support.")
+    st.subheader("Other Payment Options")
+    st.info("Bitcoin (BTC) and Solana (SOL) balances are live; premium access is still granted for ETH payments only.")
+    other_balances = get_multichain().balances({"btc": [BTC_ADDR], "sol": [SOL_ADDR]}) if tab2.open else {}
 
     col_btc, col_sol = st.columns(2)
     with col_btc:
         st.markdown(f"""
         <div class="payment-section" style="border: 1px solid #708090;">
             <h3>Bitcoin (BTC) Address</h3>
-            <p style="color:#708090;">(Currently inactive)</p>
+            <p style="color:#708090;">{describe_chain_balance(other_balances.get("btc", {}).get(BTC_ADDR))}</p>
             <div class="code-block" style="color:#708090;">
                 <code>{BTC_ADDR}</code>
             </div>
@@ -531,7 +1041,7 @@ with tab2:
         st.markdown(f"""
         <div class="payment-section" style="border: 1px solid #708090;">
             <h3>Solana (SOL) Address</h3>
-            <p style="color:#708090;">(Currently inactive)</p>
+            <p style="color:#708090;">{describe_chain_balance(other_balances.get("sol", {}).get(SOL_ADDR))}</p>
             <div class="code-block" style="color:#708090;">
                 <code>{SOL_ADDR}</code>
             </div>
@@ -542,25 +1052,22 @@ with tab3:
     st.header("Golden Minni Backend Operations")
     st.write("Monitor the real-time status and alerts from your integrated Golden Minni AI layers.")
 
-    # Display Minni AI Status
-    st.subheader("AI Layer Status")
-    status_cols = st.columns(3)
-    for i, (name, status) in enumerate(st.session_state.system_state.minni_status.items()):
-        with status_cols[i % 3]:
-            st.metric(label=f"{name} Status", value=status, delta_color="off")
+    render_minni_panels()
 
-    st.subheader("AI Layer Latest Operations")
-    for name, operation in st.session_state.system_state.minni_latest_operation.items():
-        st.markdown(f"**{name}:** `{operation}`")
+    with st.expander("Live Refresh Cost"):
+        st.caption(f"Mode: {LIVE_REFRESH_MODE}, every {LIVE_REFRESH_INTERVAL}s. Full runs include every page load and interaction.")
+        st.json(get_render_stats().summary())
 
-    st.subheader("AI Layer Alerts")
-    for name, alerts in st.session_state.system_state.minni_alerts.items():
-        if alerts:
-            st.warning(f"🚨 **{name} Alerts:**")
-            for alert in alerts:
-                st.markdown(f"- {alert}")
+    with st.expander("Metrics (Debug)"):
+        if not METRICS_ENABLED:
+            st.caption("Instrumentation is off. Set METRICS_ENABLED=1 to record hot-path spans and counters.")
         else:
-            st.info(f"✅ No new alerts for {name}.")
+            if metrics_server is not None:
+                st.caption(f"Prometheus endpoint: http://127.0.0.1:{metrics_server.server_address[1]}/metrics. Span percentiles are bucket upper bounds.")
+            else:
+                st.caption(f"Prometheus endpoint not running (METRICS_PORT={METRICS_PORT}).")
+            st.json(METRICS.span_summary())
+            st.code(METRICS.render(), language=None)
 
     st.markdown("---")
     st.subheader("Simulate Golden Minni Backend Actions")
@@ -584,12 +1091,19 @@ with tab3:
                 f"Golden Minni initiated simulated transfer: {sim_amount} ETH to {sim_receiver_addr}"
             )
             st.session_state.system_state.minni_alerts["TransferAI"].append(
-                f"SIMULATION: Golden Minni processed request for {sim_amount} ETH to {sim_receiver_addr}. Requires actual private key for sending."
+                f"SIMULATION: Golden Minni processed request for {sim_amount} ETH to {sim_receiver_addr}. Requires actual private key for sending.",
+                severity="info",
             )
             st.success("Simulated transfer request sent to Golden Minni's TransferAI.")
             # Trigger a refresh of the AI operations display
             st.rerun()
 
+    st.markdown("#### Track a Transaction")
+    tracked_tx_hash = st.text_input("Transaction Hash (Sepolia)", key="tracked_tx_hash", placeholder="0x...").strip()
+    if tracked_tx_hash:
+        # Status comes from the shared receipt watcher; the rerun never waits for the chain
+        st.write(f"Status: **{minni_wallet.check_transaction_status(tracked_tx_hash)}**")
+
     st.markdown("---")
     st.markdown("#### Manually Trigger AI Layer Processes (Simulated)")
     st.info("These buttons simulate complex internal processes within Golden Minni's AI layers.")
@@ -597,18 +1111,60 @@ with tab3:
     col_ai_triggers = st.columns(3)
     with col_ai_triggers[0]:
         if st.button("Run Risk Assessment"):
-            st.session_state.golden_minni["risk_ai"].assess({"user": "sim_user_id", "value": 1000, "currency": "USD"})
+            minni_backend["risk_ai"].assess({"user": "sim_user_id", "value": 1000, "currency": "USD"})
             st.success("Risk assessment initiated by RiskAI.")
     with col_ai_triggers[1]:
         if st.button("Check Compliance"):
-            st.session_state.golden_minni["compliance_ai"].check_compliance({"id": "sim_user_id", "country": "USA"}, {"type": "withdrawal"})
+            minni_backend["compliance_ai"].check_compliance({"id": "sim_user_id", "country": "USA"}, {"type": "withdrawal"})
             st.success("Compliance check initiated by ComplianceAI.")
+        screening_stats = get_screening_index().stats()
+        st.caption(f"Screening {screening_stats['entries']} listed entries from {len(screening_stats['lists'])} lists.")
     with col_ai_triggers[2]:
         if st.button("Validate Critical Action"):
-            st.session_state.golden_minni["consensus_ai"].validate_action({"type": "asset_rebalance", "critical": True})
+            minni_backend["consensus_ai"].validate_action({
+                "type": "asset_rebalance",
+                "critical": True,
+                "read": ("eth_getBalance", [ETH_ADDR, "latest"]),
+            })
             st.success("Critical action validation initiated by ConsensusAI.")
+
+    st.markdown("#### Evaluate a Transfer Request Through All Layers")
+    if st.button("Run Full Evaluation Pipeline"):
+        decision = minni_backend["pipeline"].evaluate({
+            "id": f"sim_{secrets.token_hex(4)}",
+            "type": "withdrawal",
+            "amount": sim_amount,
+            "currency": "ETH",
+            "counterparty": sim_receiver_addr,
+            "user": {"id": "sim_user_id", "country": "USA"},
+        })
+        if decision["approved"]:
+            st.success(f"Approved in {decision['latency_ms']:.1f} ms.")
+        else:
+            st.error(f"Rejected ({', '.join(decision['reasons'])}) in {decision['latency_ms']:.1f} ms.")
+        st.json(decision)
+    with st.expander("Pipeline Stage Latency"):
+        st.json(minni_backend["pipeline"].latency.summary())
+    with st.expander("Threat Detection"):
+        threat_detector = get_threat_detector()
+        st.caption(f"{threat_detector.events} events scanned, {threat_detector.anomalies} anomalies in this process. Window: {THREAT_WINDOW:.0f}s.")
+        st.json(threat_detector.stats())
+        anomalies = threat_detector.latest(ALERTS_PAGE_SIZE)
+        if anomalies:
+            st.dataframe(
+                {
+                    "Time": [datetime.fromtimestamp(anomaly.timestamp).strftime("%H:%M:%S") for anomaly in anomalies],
+                    "Severity": [anomaly.severity.upper() for anomaly in anomalies],
+                    "Anomaly": [str(anomaly) for anomaly in anomalies],
+                },
+                hide_index=True,
+                width="stretch",
+            )
     
     st.markdown("---")
-    st.info("The OraculumX system continuously monitors the blockchain for payments to automatically grant premium access. This page auto-refreshes every 30 seconds.")
-    # Automatic refresh
-    st.markdown(f'<meta http-equiv="refresh" content="30">', unsafe_allow_html=True)
\ No newline at end of file
+    st.info(f"The OraculumX system continuously monitors the blockchain for payments to automatically grant premium access. Live panels refresh every {LIVE_REFRESH_INTERVAL} seconds.")
+    if LIVE_REFRESH_MODE == "meta":
+        # Legacy automatic refresh: reloads the whole page and starts a new session
+        st.markdown(f'<meta http-equiv="refresh" content="{LIVE_REFRESH_INTERVAL}">', unsafe_allow_html=True)
+
+get_render_stats().record("full_run", time.perf_counter() - script_run_started)
\ No newline at end of file
@@ -0,0 +1,17 @@
+import pytest
+
+from benchmarks.stubs import StubServer
+from golden_minni.net import HttpPool, JsonRpcClient
+
+
+@pytest.fixture
+def stub():
+    with StubServer() as server:
+        yield server
+
+
+@pytest.fixture
+def rpc(stub):
+    pool = HttpPool(pool_size=4, retries=0)
+    yield JsonRpcClient(pool, stub.url)
+    pool.close()
@@ -0,0 +1,28 @@
+from golden_minni.alerts import AlertLog
+
+
+def test_filtered_count_never_exceeds_unfiltered_count():
+    log = AlertLog(["Wallet", "Risk"], capacity=10)
+    for i in range(30):
+        log["Wallet"].append(f"info {i}", severity="info", timestamp=i)
+        log["Wallet"].append(f"error {i}", severity="error", timestamp=i + 0.5)
+    log["Risk"].append("critical", severity="critical", timestamp=100)
+
+    assert log.count() == 11
+    assert log.count(severities=["info", "error"]) == 10
+    assert log.count(severities=["info", "error", "critical"]) == 11
+    assert log.count(["Wallet"], ["info", "error"]) == log.count(["Wallet"]) == 10
+    assert log.count(["Wallet"], ["error"]) == 10 # Each severity keeps its own latest alerts
+
+    rows = log.page(0, 50, severities=["info", "error"])
+    assert len(rows) == log.count(severities=["info", "error"])
+    assert [record.timestamp for record in rows] == sorted((record.timestamp for record in rows), reverse=True)
+    assert log.page(5, 3, ["Wallet"], ["info", "error"]) == rows[5:8]
+
+
+def test_counts_match_pages_before_anything_is_dropped():
+    log = AlertLog(["Wallet"], capacity=10)
+    for i, severity in enumerate(["info", "warning", "error", "info"]):
+        log["Wallet"].append(str(i), severity=severity, timestamp=i)
+    assert log.count(severities=["info", "warning"]) == 3
+    assert [record.message for record in log.page(0, 10, severities=["info", "warning"])] == ["3", "1", "0"]
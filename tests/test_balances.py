@@ -0,0 +1,58 @@
+import threading
+import time
+
+from golden_minni.balances import BalancePoller, fetch_balances_wei
+
+
+def test_poller_start_does_not_wait_for_first_poll():
+    release = threading.Event()
+    polled = threading.Event()
+
+    def fetch(addresses):
+        release.wait(5)
+        polled.set()
+        return {address: 1.5 for address in addresses}
+
+    poller = BalancePoller(["0xaa"], fetch, interval=60)
+    poller.start()
+    try:
+        assert poller.snapshot("0xaa").loading # start() returned before the fetch finished
+        release.set()
+        assert polled.wait(5)
+        for _ in range(100):
+            if not poller.snapshot("0xaa").loading:
+                break
+            time.sleep(0.01)
+        snapshot = poller.snapshot("0xaa")
+        assert not snapshot.loading
+        assert snapshot.balance == 1.5
+    finally:
+        release.set()
+        poller.stop(5)
+
+
+def test_failed_first_poll_is_no_longer_loading():
+    def fetch(addresses):
+        raise ConnectionError("down")
+
+    poller = BalancePoller(["0xaa"], fetch)
+    poller.poll_once()
+    snapshot = poller.snapshot("0xaa")
+    assert not snapshot.loading
+    assert snapshot.error and snapshot.age() is None
+
+
+class FixedRpc:
+    def __init__(self, results):
+        self.results = results
+
+    def batch(self, calls):
+        return self.results[:len(calls)]
+
+
+def test_null_or_malformed_balance_is_a_per_address_error():
+    failure = ConnectionError("down")
+    balances = fetch_balances_wei(FixedRpc([None, "0x10", "0xzz", failure]), ["0xa", "0xb", "0xc", "0xd"])
+    assert balances["0xb"] == 16
+    assert isinstance(balances["0xa"], ValueError) and isinstance(balances["0xc"], ValueError)
+    assert balances["0xd"] is failure
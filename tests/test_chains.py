@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+from benchmarks.stubs import StubServer
+from golden_minni.chains import BtcBackend, ChainBackend, ChainTimeout, EthBackend, MultiChain, SolBackend
+from golden_minni.net import HttpPool, JsonRpcClient
+from golden_minni.payments import PaymentStore
+
+ADDRESSES = {
+    "eth": "0x5036dbcEEfae0a7429e64467222e1E259819c7C7",
+    "btc": "bc1qxy2kgdygjrsqtzq2n0yrf2493p83kkfjhx0wlh",
+    "sol": "GjKxT3YtFwN3j9p3L0w4V2x8E6r7Q0z1C5B7D8F9A",
+}
+QUERY = {chain: [address] for chain, address in ADDRESSES.items()}
+
+
+@pytest.fixture
+def stubs():
+    stubs = {chain: StubServer().start() for chain in ADDRESSES}
+    for chain, stub in stubs.items():
+        stub.chain.set_balance(ADDRESSES[chain], 10**9)
+    yield stubs
+    for stub in stubs.values():
+        stub.stop()
+
+
+@pytest.fixture
+def backends(stubs, tmp_path):
+    pool = HttpPool(pool_size=16, retries=0)
+    store = PaymentStore(str(tmp_path / "payments.db"))
+    store.record_block(1, [{"tx_hash": "0x01", "sender": "0xpayer", "receiver": ADDRESSES["eth"].lower(), "value_wei": 10**15}])
+    yield [
+        EthBackend(JsonRpcClient(pool, stubs["eth"].url), store, timeout=0.5),
+        BtcBackend(pool, stubs["btc"].esplora_url, timeout=0.5),
+        SolBackend(JsonRpcClient(pool, stubs["sol"].url), timeout=0.5),
+    ]
+    store.close()
+    pool.close()
+
+
+def test_every_backend_reads_balances_and_payments(stubs, backends):
+    stubs["btc"].chain.add_transfer("bc1qpayer", ADDRESSES["btc"], 50000)
+    stubs["sol"].chain.add_transfer("PayerSo1", ADDRESSES["sol"], 10**8, confirmed=False)
+    multi = MultiChain(backends)
+    balances = multi.balances(QUERY)
+    assert {chain: balances[chain][address].value for chain, address in ADDRESSES.items()} == {chain: 10**9 for chain in ADDRESSES}
+    assert balances["btc"][ADDRESSES["btc"]].amount == pytest.approx(10)
+    payments = multi.payments(QUERY)
+    assert [p["value"] for p in payments["eth"][ADDRESSES["eth"]]] == [10**15]
+    assert [(p["sender"], p["value"]) for p in payments["btc"][ADDRESSES["btc"]]] == [("bc1qpayer", 50000)]
+    assert [(p["sender"], p["confirmed"]) for p in payments["sol"][ADDRESSES["sol"]]] == [("PayerSo1", False)]
+
+
+def test_slow_chain_times_out_without_delaying_the_others(stubs, backends):
+    stubs["sol"].latency = 1.0
+    multi = MultiChain(backends)
+    started = time.perf_counter()
+    balances = multi.balances(QUERY)
+    assert time.perf_counter() - started < 0.9 # One chain's timeout, not the sum of every latency
+    assert balances["eth"][ADDRESSES["eth"]].value == balances["btc"][ADDRESSES["btc"]].value == 10**9
+    sol = balances["sol"][ADDRESSES["sol"]]
+    assert sol.value is None and isinstance(sol.error, ChainTimeout)
+    assert multi.timeouts == 1
+    time.sleep(1.0) # The timed-out fetch keeps running and fills the cache
+    assert multi.balances(QUERY)["sol"][ADDRESSES["sol"]].value == 10**9
+
+
+def test_each_chain_serves_repeat_reads_from_its_cache(stubs, backends):
+    multi = MultiChain(backends, ttl=30.0)
+    multi.balances(QUERY)
+    for stub in stubs.values():
+        stub.reset_counters()
+    multi.balances(QUERY)
+    assert all(stub.counters()["http_requests"] == 0 for stub in stubs.values())
+    assert all(multi.stats()[chain]["hits"] == 1 for chain in ADDRESSES)
+
+
+def test_incomplete_backend_fails_at_construction():
+    class BalancesOnly(ChainBackend):
+        chain = "xyz"
+
+        def fetch_balances(self, addresses):
+            return {}
+
+    with pytest.raises(TypeError):
+        BalancesOnly()
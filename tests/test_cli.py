@@ -0,0 +1,81 @@
+import io
+import json
+
+import pytest
+
+from golden_minni.cli import Progress, default_options, main, read_chunks, run
+
+
+@pytest.fixture
+def options(tmp_path):
+    (tmp_path / "sanctioned_addresses.txt").write_text("0x00000000000000000000000000000000000000bb,OFAC-SDN\n")
+    (tmp_path / "sanctioned_countries.txt").write_text("KP\n")
+    options = default_options()
+    options.update(screening_dir=str(tmp_path), screening_index=str(tmp_path / "screening.idx"))
+    return options
+
+
+def transfer(request_id, **fields):
+    return json.dumps({"id": request_id, "type": "transfer", "amount": 5, "currency": "USD",
+                       "counterparty": "0x" + "aa" * 20, "user": {"id": "u1", "country": "US"}, **fields})
+
+
+def evaluate(lines, options, workers=1, chunk_size=2):
+    out = io.StringIO()
+    progress = run(io.StringIO("\n".join(lines) + "\n"), out, workers, chunk_size, options, Progress(io.StringIO(), every=0))
+    return [json.loads(line) for line in out.getvalue().splitlines()], progress
+
+
+def test_bad_lines_get_an_error_record_and_the_batch_goes_on(options):
+    lines = [transfer(1), "{not json", "", "[1, 2]", transfer(2), "   ", "42", transfer(3)]
+    decisions, progress = evaluate(lines, options)
+    assert [d.get("request_id", d.get("line")) for d in decisions] == [1, 2, 4, 2, 7, 3]
+    errors = [d for d in decisions if "error" in d]
+    assert [d["line"] for d in errors] == [2, 4, 7]
+    assert errors[0]["error"].startswith("JSONDecodeError")
+    assert "not a JSON object" in errors[1]["error"]
+    assert (progress.approved, progress.rejected, progress.invalid) == (3, 0, 3)
+
+
+def test_decisions_follow_screening(options):
+    decisions, progress = evaluate([
+        transfer(1),
+        transfer(2, counterparty="0x00000000000000000000000000000000000000BB"),
+        transfer(3, user={"id": "u2", "country": "kp"}),
+    ], options)
+    assert [d["approved"] for d in decisions] == [True, False, False]
+    assert decisions[1]["reasons"] == ["non-compliant"]
+    assert progress.rejected == 2
+
+
+def test_untimed_history_is_not_a_burst(options):
+    decisions, _ = evaluate([transfer(i) for i in range(50)], options, chunk_size=16)
+    assert all(d["approved"] for d in decisions)
+
+
+def test_bursts_follow_record_timestamps(options):
+    spread = [transfer(i, timestamp=1.6e9 + 60 * i) for i in range(30)]
+    assert all(d["approved"] for d in evaluate(spread, options)[0])
+    burst = [transfer(i, timestamp=1.6e9 + i) for i in range(30)]
+    assert "threat detected" in evaluate(burst, options)[0][20]["reasons"]
+
+
+def test_worker_processes_keep_input_order(options):
+    lines = [transfer(i) for i in range(40)] + ["oops"]
+    decisions, progress = evaluate(lines, options, workers=2, chunk_size=7)
+    assert [d.get("request_id") for d in decisions[:-1]] == list(range(40))
+    assert decisions[-1]["line"] == 41
+    assert progress.total == 41
+
+
+def test_read_chunks_skips_blank_lines_and_keeps_line_numbers():
+    assert list(read_chunks(["a\n", "\n", "b\n", "c\n"], 2)) == [(1, ["a\n", "b\n"]), (4, ["c\n"])]
+
+
+def test_main_writes_decisions_and_a_summary(options, tmp_path, capsys):
+    source, sink = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    source.write_text(transfer(1) + "\nbad\n")
+    assert main([str(source), "-o", str(sink), "--workers", "1", "--progress-every", "0",
+                 "--screening-dir", options["screening_dir"], "--screening-index", options["screening_index"]]) == 0
+    assert len(sink.read_text().splitlines()) == 2
+    assert "2 requests" in capsys.readouterr().err
@@ -0,0 +1,31 @@
+from eth_account import Account
+from eth_account.messages import encode_defunct
+
+from golden_minni.entitlements import issue_access_token, payer_challenge, read_access_token, verify_payer_signature
+
+SECRET = b"test secret"
+
+
+def sign(account, message):
+    return account.sign_message(encode_defunct(text=message)).signature.hex()
+
+
+def test_only_the_payers_key_proves_control():
+    payer, stranger = Account.create(), Account.create()
+    message = payer_challenge(payer.address, "nonce-1")
+    assert verify_payer_signature(payer.address.lower(), message, sign(payer, message))
+    assert not verify_payer_signature(payer.address, message, sign(stranger, message))
+    assert not verify_payer_signature(payer.address, payer_challenge(payer.address, "nonce-2"), sign(payer, message))
+    assert not verify_payer_signature(payer.address, message, "0x1234")
+
+
+def test_access_tokens_cannot_be_forged_or_outlive_their_expiry():
+    token = issue_access_token(SECRET, "0xAA", expires_at=2000)
+    assert read_access_token(SECRET, token, now=1000) == "0xaa"
+    assert read_access_token(SECRET, token, now=2000) is None
+    assert read_access_token(b"other secret", token, now=1000) is None
+    payer, expires_at, digest = token.split(".")
+    assert read_access_token(SECRET, f"0xbb.{expires_at}.{digest}", now=1000) is None
+    assert read_access_token(SECRET, f"{payer}.9999.{digest}", now=1000) is None
+    for junk in ["", "0xaa", "a.b.c", None]:
+        assert read_access_token(SECRET, junk, now=1000) is None
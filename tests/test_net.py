@@ -0,0 +1,56 @@
+import json
+
+import pytest
+import requests
+
+from benchmarks.stubs import StubServer
+from golden_minni.net import HttpPool, JsonRpcClient, JsonRpcError
+
+
+def test_read_calls_are_retried_and_writes_are_not():
+    with StubServer(failure_rate=1.0) as stub:
+        pool = HttpPool(pool_size=2, retries=0)
+        rpc = JsonRpcClient(pool, stub.url, retries=2, backoff=0.0)
+        try:
+            assert isinstance(rpc.batch([("eth_getBalance", ["0xaa", "latest"])])[0], Exception)
+            assert stub.counters()["http_requests"] == 3
+            stub.reset_counters()
+            try:
+                rpc.call("eth_sendRawTransaction", ["0x00"])
+            except Exception:
+                pass
+            assert stub.counters()["http_requests"] == 1
+        finally:
+            pool.close()
+
+
+def test_retried_read_succeeds_after_transient_failures():
+    with StubServer(failure_rate=0.5, seed=3) as stub:
+        stub.chain.balances["0xaa"] = 7
+        pool = HttpPool(pool_size=2, retries=0)
+        rpc = JsonRpcClient(pool, stub.url, retries=10, backoff=0.0)
+        try:
+            assert [int(rpc.call("eth_getBalance", ["0xaa", "latest"]), 16) for _ in range(20)] == [7] * 20
+            assert rpc.retried == stub.counters()["failures"] > 0
+        finally:
+            pool.close()
+
+
+class CannedHttp:
+    """Answers every POST with the same JSON body."""
+
+    def __init__(self, body):
+        self.body = body
+
+    def post(self, url, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(self.body).encode()
+        return response
+
+
+@pytest.mark.parametrize("body", ["oops", None, 42, [1, "x"], {"error": "rate limited"}, [{"id": 1, "error": "bad"}]])
+def test_unexpected_batch_bodies_fail_per_call(body):
+    results = JsonRpcClient(CannedHttp(body), "http://rpc").batch([("eth_getBalance", ["0xaa", "latest"])] * 2)
+    assert len(results) == 2
+    assert all(isinstance(result, JsonRpcError) for result in results)
@@ -0,0 +1,138 @@
+import pytest
+
+from golden_minni.entitlements import EntitlementStore
+from golden_minni.payments import PaymentIndexer, PaymentStore
+
+RECEIVER = "0x5036dbceefae0a7429e64467222e1e259819c7c7"
+PAYER = "0x00000000000000000000000000000000000000aa"
+MIN_WEI = 10**16
+
+
+def payment(number, value, sender=PAYER, receiver=RECEIVER):
+    return {"hash": "0x%064x" % number, "from": sender, "to": receiver, "value": hex(value)}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PaymentStore(str(tmp_path / "payments.db"))
+    yield store
+    store.close()
+
+
+def test_first_poll_without_cursor_starts_at_the_safe_head(stub, rpc, store):
+    for number in range(1, 11):
+        stub.chain.add_block([payment(number, 10**15)])
+    indexer = PaymentIndexer(rpc, store, [RECEIVER], confirmations=2)
+    found = indexer.poll_once()
+    assert [p["tx_hash"] for p in found] == ["0x%064x" % 8]
+    assert store.cursor() == 8
+
+
+def test_blocks_shallower_than_confirmations_wait(stub, rpc, store):
+    for number in range(1, 6):
+        stub.chain.add_block([payment(number, 10**15)])
+    indexer = PaymentIndexer(rpc, store, [RECEIVER], confirmations=2, start_block=1)
+    assert len(indexer.poll_once()) == 3 # Blocks 4 and 5 could still be reorged away
+    assert store.cursor() == 3
+    assert indexer.poll_once() == []
+    stub.chain.add_block()
+    assert [p["tx_hash"] for p in indexer.poll_once()] == ["0x%064x" % 4]
+
+
+def test_restart_resumes_from_the_cursor(stub, rpc, store):
+    for number in range(1, 8):
+        stub.chain.add_block([payment(number, 10**15)])
+    PaymentIndexer(rpc, store, [RECEIVER], confirmations=0, start_block=1, max_blocks_per_poll=4).poll_once()
+    assert store.cursor() == 4
+    restarted = PaymentIndexer(rpc, store, [RECEIVER], confirmations=0, start_block=1)
+    assert [p["tx_hash"] for p in restarted.poll_once()] == ["0x%064x" % n for n in (5, 6, 7)]
+    assert restarted.poll_once() == []
+    assert store.total_paid_wei(PAYER) == 7 * 10**15
+
+
+def test_only_payments_to_our_addresses_are_recorded(stub, rpc, store):
+    stub.chain.add_block([payment(1, 10**15, receiver="0x" + "11" * 20), payment(2, 0), payment(3, 10**15)])
+    found = PaymentIndexer(rpc, store, [RECEIVER.upper().replace("0X", "0x")], confirmations=0, start_block=1).poll_once()
+    assert [p["tx_hash"] for p in found] == ["0x%064x" % 3]
+
+
+class FlakyRpc:
+    """Wraps a client and fails the block numbers in `failing` inside batches."""
+
+    def __init__(self, rpc, failing=()):
+        self.rpc = rpc
+        self.failing = set(failing)
+
+    def call(self, method, params=()):
+        return self.rpc.call(method, params)
+
+    def batch(self, calls):
+        results = self.rpc.batch(calls)
+        return [RuntimeError("node error") if int(params[0], 16) in self.failing else result
+                for (method, params), result in zip(calls, results)]
+
+
+def test_failed_block_stops_the_cursor_before_it(stub, rpc, store):
+    for number in range(1, 5):
+        stub.chain.add_block([payment(number, 10**15)])
+    delivered = []
+    indexer = PaymentIndexer(FlakyRpc(rpc, failing={3}), store, [RECEIVER], confirmations=0, start_block=1,
+                             on_payments=delivered.extend)
+    with pytest.raises(RuntimeError):
+        indexer.poll_once()
+    assert store.cursor() == 2
+    assert len(delivered) == 2 # Recorded blocks reached the listener before the failure
+    indexer.rpc.failing.clear()
+    assert len(indexer.poll_once()) == 2
+
+
+def test_entitlement_is_derived_from_payments_indexed_before_the_row(stub, rpc, store, tmp_path):
+    stub.chain.add_block([payment(1, MIN_WEI)])
+    PaymentIndexer(rpc, store, [RECEIVER], confirmations=0, start_block=1).poll_once()
+    entitlements = EntitlementStore(str(tmp_path / "payments.db"), store, MIN_WEI)
+    assert entitlements.is_premium(PAYER.upper().replace("0X", "0x"))
+    assert not entitlements.is_premium("0x" + "22" * 20)
+    assert not entitlements.is_premium("")
+
+
+def test_entitlement_follows_indexed_payments(stub, rpc, store, tmp_path):
+    entitlements = EntitlementStore(str(tmp_path / "payments.db"), store, MIN_WEI)
+    indexer = PaymentIndexer(rpc, store, [RECEIVER], confirmations=0, start_block=1, on_payments=entitlements.record_payments)
+    stub.chain.add_block([payment(1, MIN_WEI // 2)])
+    indexer.poll_once()
+    assert not entitlements.is_premium(PAYER) # Cached as not premium...
+    stub.chain.add_block([payment(2, MIN_WEI // 2)])
+    indexer.poll_once()
+    assert entitlements.is_premium(PAYER) # ...until record_payments invalidates it
+
+
+def test_entitlement_catches_up_after_a_poll_failed_partway(stub, rpc, store, tmp_path):
+    entitlements = EntitlementStore(str(tmp_path / "payments.db"), store, MIN_WEI, ttl=0)
+    flaky = FlakyRpc(rpc)
+    indexer = PaymentIndexer(flaky, store, [RECEIVER], confirmations=0, start_block=1, on_payments=entitlements.record_payments)
+    stub.chain.add_block([payment(1, MIN_WEI // 2)])
+    indexer.poll_once()
+    assert not entitlements.is_premium(PAYER)
+
+    def failing_listener(payments):
+        raise RuntimeError("database is locked")
+    indexer.on_payments = failing_listener # The block is recorded, its payments never reach the store
+    stub.chain.add_block([payment(2, MIN_WEI // 2)])
+    with pytest.raises(RuntimeError):
+        indexer.poll_once()
+    assert store.total_paid_wei(PAYER) == MIN_WEI
+    assert entitlements.is_premium(PAYER)
+
+
+def test_timed_entitlement_lapses_and_renewals_stack(store, tmp_path):
+    entitlements = EntitlementStore(str(tmp_path / "payments.db"), store, MIN_WEI, duration=3600, ttl=0)
+    store.record_block(1, [{"tx_hash": "0x01", "sender": PAYER, "receiver": RECEIVER, "value_wei": MIN_WEI}])
+    first = entitlements.record_payments([{"sender": PAYER, "value_wei": MIN_WEI}])[0]
+    store.record_block(2, [{"tx_hash": "0x02", "sender": PAYER, "receiver": RECEIVER, "value_wei": MIN_WEI}])
+    renewed = entitlements.record_payments([{"sender": PAYER, "value_wei": MIN_WEI}])[0]
+    assert renewed.expires_at == pytest.approx(first.expires_at + 3600, abs=5)
+    assert entitlements.get(PAYER).active()
+    assert not entitlements.get(PAYER).active(now=renewed.expires_at + 1)
+    # Delivering the same payments again grants nothing more
+    again = entitlements.record_payments([{"sender": PAYER, "value_wei": MIN_WEI}])[0]
+    assert again.expires_at == renewed.expires_at
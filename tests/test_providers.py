@@ -0,0 +1,109 @@
+import time
+
+import pytest
+
+from benchmarks.stubs import StubChain, StubServer
+from golden_minni.core import SystemState, _Consensus
+from golden_minni.net import HttpPool, JsonRpcClient, JsonRpcError
+from golden_minni.providers import HedgedRpcClient, Provider
+
+ADDRESS = "0x5036dbcEEfae0a7429e64467222e1E259819c7C7"
+WEI = 2 * 10**15
+
+
+@pytest.fixture
+def chain():
+    chain = StubChain()
+    chain.set_balance(ADDRESS, WEI)
+    return chain
+
+
+@pytest.fixture
+def serve():
+    """Starts StubServers on demand; returns (servers, Provider list) for the given profiles."""
+    pool = HttpPool(pool_size=16, retries=0)
+    servers = []
+
+    def start(profiles, window=32):
+        started, providers = {}, []
+        for name, (chain, kwargs) in profiles.items():
+            server = StubServer(chain, **kwargs).start()
+            servers.append(server)
+            started[name] = server
+            providers.append(Provider(name, JsonRpcClient(pool, server.url), window=window))
+        return started, providers
+
+    yield start
+    for server in servers:
+        server.stop()
+    pool.close()
+
+
+def balance(rpc):
+    return int(rpc.call("eth_getBalance", [ADDRESS, "latest"]), 16)
+
+
+def test_slow_read_is_hedged_to_the_next_provider(serve, chain):
+    servers, providers = serve({"slow": (chain, {"latency": 0.5}), "fast": (chain, {"latency": 0.01})})
+    rpc = HedgedRpcClient(providers, hedge_after=0.05, explore_every=0)
+    started = time.perf_counter()
+    assert balance(rpc) == WEI
+    assert time.perf_counter() - started < 0.3
+    assert rpc.hedges == 1
+    assert providers[1].wins == 1
+    assert servers["slow"].counters()["http_requests"] == 1 # Asked first, answer not waited for
+
+
+def test_failing_provider_fails_over_without_waiting_for_the_hedge_delay(serve, chain):
+    servers, providers = serve({"down": (chain, {"failure_rate": 1.0}), "up": (chain, {})})
+    rpc = HedgedRpcClient(providers, hedge_after=2.0, explore_every=0)
+    started = time.perf_counter()
+    assert balance(rpc) == WEI
+    assert time.perf_counter() - started < 1.0
+    assert rpc.hedges == 0
+    assert providers[0].error_rate > 0 and providers[1].error_rate == 0
+    for _ in range(3):
+        balance(rpc)
+    assert rpc.ranked()[0].name == "up" # Unmeasured providers go first only while they mostly succeed
+    requests = servers["down"].counters()["http_requests"]
+    balance(rpc)
+    assert servers["down"].counters()["http_requests"] == requests
+
+
+def test_json_rpc_errors_are_not_retried_elsewhere(serve, chain):
+    servers, providers = serve({"first": (chain, {}), "second": (chain, {})})
+    rpc = HedgedRpcClient(providers, hedge_after=1.0, explore_every=0)
+    with pytest.raises(JsonRpcError):
+        rpc.call("eth_unknownMethod", [])
+    assert servers["second"].counters()["http_requests"] == 0
+
+
+def test_ranking_follows_observed_latency(serve, chain):
+    servers, providers = serve({"a": (chain, {"latency": 0.01}), "b": (chain, {"latency": 0.06})}, window=3)
+    rpc = HedgedRpcClient(providers, hedge_after=1.0, explore_every=2)
+    for _ in range(6):
+        balance(rpc)
+    assert [provider.name for provider in rpc.ranked()] == ["a", "b"]
+    servers["a"].latency = 0.12 # "a" turns slow for good
+    for _ in range(8):
+        balance(rpc)
+    assert [provider.name for provider in rpc.ranked()] == ["b", "a"]
+
+
+def test_quorum_read_feeds_consensus_validation(serve, chain):
+    liar_chain = StubChain()
+    liar_chain.set_balance(ADDRESS, WEI + 1)
+    _, providers = serve({"honest": (chain, {}), "also_honest": (chain, {"latency": 0.02}), "liar": (liar_chain, {})})
+    action = {"type": "transfer", "critical": True, "read": ("eth_getBalance", [ADDRESS, "latest"])}
+
+    rpc = HedgedRpcClient(providers)
+    agreement = rpc.call_quorum("eth_getBalance", [ADDRESS, "latest"], k=2)
+    assert agreement.agreed and int(agreement.result, 16) == WEI
+    system_state = SystemState()
+    assert _Consensus(system_state, rpc, quorum=2).validate_action(action)
+    assert not system_state.minni_alerts["ConsensusAI"]
+
+    split = HedgedRpcClient([providers[0], providers[2]])
+    system_state = SystemState()
+    assert not _Consensus(system_state, split, quorum=2).validate_action(action)
+    assert "disagree" in system_state.minni_alerts["ConsensusAI"].latest(1)[0].message
@@ -0,0 +1,52 @@
+import base64
+import os
+
+from golden_minni.qr import QRCodeCache
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = QRCodeCache(max_entries=2)
+    first = cache.get("a", fmt="svg")
+    cache.get("b", fmt="svg")
+    assert cache.get("a", fmt="svg") == first # Hit; "b" is now the oldest
+    cache.get("c", fmt="svg")
+    cache.get("a", fmt="svg")
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 3
+    cache.get("b", fmt="svg") # Evicted, so rendered again
+    assert cache.stats()["misses"] == 4
+    assert cache.stats()["entries"] == 2
+
+
+def test_svg_mode_renders_svg():
+    svg = base64.b64decode(QRCodeCache().get("ethereum:0xaa", fmt="svg")).decode("utf-8")
+    assert "<svg" in svg
+
+
+def test_disk_store_survives_a_new_cache(tmp_path):
+    encoded = QRCodeCache(cache_dir=str(tmp_path)).get("a", fmt="png")
+    assert base64.b64decode(encoded).startswith(b"\x89PNG")
+    restarted = QRCodeCache(cache_dir=str(tmp_path))
+    assert restarted.get("a", fmt="png") == encoded
+    assert restarted.stats()["disk_hits"] == 1 and restarted.stats()["misses"] == 0
+
+
+def svg_file(cache, data):
+    return os.path.basename(cache._path(cache.cache_key(data, "svg", 10, 4, "L"), "svg"))
+
+
+def test_disk_store_prunes_least_recently_used_files(tmp_path):
+    cache = QRCodeCache(max_entries=1, cache_dir=str(tmp_path), max_disk_entries=2)
+    cache.get("a", fmt="svg")
+    cache.get("b", fmt="svg")
+    os.utime(tmp_path / svg_file(cache, "a"), (1, 1))
+    os.utime(tmp_path / svg_file(cache, "b"), (2, 2))
+    cache.get("a", fmt="svg") # Disk hit: "a" becomes the most recently used file
+    cache.get("c", fmt="svg")
+    assert sorted(os.listdir(tmp_path)) == sorted([svg_file(cache, "a"), svg_file(cache, "c")])
+
+
+def test_failed_store_leaves_no_temporary_file(tmp_path):
+    cache = QRCodeCache(cache_dir=str(tmp_path))
+    os.mkdir(tmp_path / svg_file(cache, "a")) # os.replace cannot overwrite a directory
+    assert base64.b64decode(cache.get("a", fmt="svg"))
+    assert os.listdir(tmp_path) == [svg_file(cache, "a")]
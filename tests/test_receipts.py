@@ -0,0 +1,28 @@
+import pytest
+
+from golden_minni.receipts import ReceiptTimeout, ReceiptWatcher
+
+TX = "0x" + "ab" * 32
+
+
+@pytest.mark.parametrize("tx_hash", ["", "0x", "0x1234", TX[2:], TX + "00", "0x" + "zz" * 32, None])
+def test_invalid_hashes_are_rejected(rpc, tx_hash):
+    watcher = ReceiptWatcher(rpc)
+    with pytest.raises(ValueError):
+        watcher.watch(tx_hash)
+    assert watcher.pending_count() == 0
+
+
+def test_timed_out_transaction_is_watched_again(stub, rpc):
+    watcher = ReceiptWatcher(rpc, timeout=0.0)
+    first = watcher.watch(TX.upper().replace("0X", "0x"))
+    watcher.poll_once()
+    assert first.status == "Timeout"
+    assert isinstance(first.future.exception(), ReceiptTimeout)
+
+    stub.chain.receipts[TX] = {"transactionHash": TX, "status": "0x1"}
+    second = watcher.watch(TX)
+    assert second is not first and second.status == "Pending"
+    watcher.poll_once()
+    assert second.status == "Confirmed"
+    assert watcher.watch(TX) is second # Final outcomes are remembered
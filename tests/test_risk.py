@@ -0,0 +1,38 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from golden_minni.risk import assess_batch, score_transaction, score_transactions
+
+
+def test_batch_matches_scalar_row_by_row():
+    rng = np.random.default_rng(1)
+    columns = {
+        "value": np.concatenate([rng.lognormal(5.0, 2.5, 500), [0.0, -5.0, 1e12, math.inf]]),
+        "currency": rng.choice(np.array(["USD", "ETH", "SOL", "XMR", None], dtype=object), 504),
+        "counterparty": rng.choice(np.array(["0xaa", "0xBB", "", None], dtype=object), 504),
+    }
+    expected = [score_transaction(*row) for row in zip(columns["value"], columns["currency"], columns["counterparty"])]
+    assert score_transactions(columns).tolist() == expected
+
+
+def test_missing_values_score_like_zero_in_both_paths():
+    frame = pd.DataFrame({"value": [math.nan, None, 0.0], "currency": ["ETH"] * 3, "counterparty": ["0xaa"] * 3})
+    scores = score_transactions(frame).tolist()
+    assert scores == [score_transaction(value, "ETH", "0xaa") for value in (math.nan, None, 0.0)]
+    assert len(set(scores)) == 1
+    assert score_transaction("", "ETH", "0xaa") == scores[0]
+
+
+def test_missing_columns_use_defaults():
+    assert score_transactions({"value": [100.0]}).tolist() == [score_transaction(100.0, None, None)]
+
+
+def test_assess_batch_summary():
+    result = assess_batch({"value": [1e9, 1.0], "currency": ["XMR", "USD"], "counterparty": ["0x01", "0x02"]}, threshold=70)
+    assert result["count"] == 2
+    assert result["high_risk"].tolist() == [True, False]
+    assert result["high_risk_count"] == 1
+    assert result["max_score"] == result["scores"][0]
+    assert assess_batch({"value": []})["max_score"] == 0
@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from golden_minni.screening import ScreeningIndex
+
+LISTED = "0x8589427373d6d84e98730d7795d8f6f8731fda16"
+
+
+@pytest.fixture
+def lists_dir(tmp_path):
+    (tmp_path / "sanctioned_addresses.txt").write_text(
+        f"# OFAC extract\n{LISTED},OFAC-SDN\n\n0x00000000000000000000000000000000000000bb\n"
+    )
+    (tmp_path / "sanctioned_countries.txt").write_text("KP,UN\nIR # inline comment\n")
+    return tmp_path
+
+
+def test_listed_addresses_hit_in_any_case(lists_dir):
+    index = ScreeningIndex(str(lists_dir)).load()
+    assert index.screen_address(LISTED) == "OFAC-SDN"
+    assert index.screen_address(LISTED.upper().replace("0X", "0x")) == "OFAC-SDN"
+    assert index.screen_address(" 0x00000000000000000000000000000000000000BB ") == "sanctioned_addresses"
+
+
+def test_clean_entries_miss(lists_dir):
+    index = ScreeningIndex(str(lists_dir)).load()
+    assert index.screen_address("0x" + "12" * 20) is None
+    assert index.screen_address("") is None
+    assert index.screen_country("US") is None
+    assert index.screen_country(None) is None
+    # An address is not a country and vice versa
+    assert index.screen_country(LISTED) is None
+    assert index.screen_address("KP") is None
+
+
+def test_countries_hit_case_insensitively(lists_dir):
+    index = ScreeningIndex(str(lists_dir)).load()
+    assert index.screen_country("kp") == "UN"
+    assert index.screen_country("IR") == "sanctioned_countries"
+
+
+def test_bulk_screening_returns_only_hits(lists_dir):
+    index = ScreeningIndex(str(lists_dir)).load()
+    clean = ["0x%040x" % n for n in range(1000, 3000)]
+    assert index.screen_addresses(clean + [LISTED, None, ""]) == {LISTED: "OFAC-SDN"}
+
+
+def test_compiled_index_is_reused_and_rebuilt_when_lists_change(lists_dir):
+    first = ScreeningIndex(str(lists_dir)).load()
+    mtime = os.path.getmtime(first.index_path)
+    second = ScreeningIndex(str(lists_dir)).load()
+    assert os.path.getmtime(second.index_path) == mtime
+    assert second.stats()["entries"] == 4
+
+    added = "0x" + "cc" * 20
+    with open(lists_dir / "sanctioned_addresses.txt", "a") as f:
+        f.write(f"{added},EU\n")
+    os.utime(lists_dir / "sanctioned_addresses.txt", ns=(0, os.stat(lists_dir / "sanctioned_addresses.txt").st_mtime_ns + 10**9))
+    assert second.screen_address(added) is None
+    assert second.reload_if_changed()
+    assert second.screen_address(added) == "EU"
+    assert second.screen_address(LISTED) == "OFAC-SDN"
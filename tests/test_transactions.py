@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+from golden_minni.transactions import GasPriceCache, NonceAllocator, TransactionPreparer
+
+SENDER = "0x00000000000000000000000000000000000000Aa"
+KEY = "0x" + "11" * 32
+RECEIVER = "0x00000000000000000000000000000000000000bb"
+
+
+def test_concurrent_allocations_are_consecutive_and_unique(stub, rpc):
+    stub.chain.nonces[SENDER.lower()] = 7
+    allocator = NonceAllocator(rpc)
+    blocks = []
+    lock = threading.Lock()
+
+    def allocate(count):
+        for _ in range(50):
+            start = allocator.allocate(SENDER, count)
+            with lock:
+                blocks.append(range(start, start + count))
+
+    threads = [threading.Thread(target=allocate, args=(1 + i % 3,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    nonces = sorted(nonce for block in blocks for nonce in block)
+    assert nonces == list(range(7, 7 + len(nonces)))
+    assert allocator.node_reads == 1 and stub.rpc_calls["eth_getTransactionCount"] == 1
+
+
+def test_released_runs_are_reused_first_fit(stub, rpc):
+    allocator = NonceAllocator(rpc)
+    starts = [allocator.allocate(SENDER, 1), allocator.allocate(SENDER, 1), allocator.allocate(SENDER, 1),
+              allocator.allocate(SENDER, 3), allocator.allocate(SENDER, 1)]
+    assert starts == [0, 1, 2, 3, 6]
+    assert allocator.release(SENDER, 1, 1)
+    assert allocator.release(SENDER, 3, 3)
+    assert allocator.allocate(SENDER, 2) == 3 # The gap at 1 is too short; the run at 3..5 fits
+    assert allocator.allocate(SENDER, 1) == 1 # The lowest gap is filled next
+    assert allocator.allocate(SENDER, 1) == 5
+    assert allocator.allocate(SENDER, 1) == 7 # No gaps left: the counter moves on
+    assert allocator.release(SENDER, 7, 1) and allocator.peek(SENDER) == 7 # Released at the top lowers the counter
+
+
+def test_releases_of_nonces_not_handed_out_are_rejected(stub, rpc):
+    stub.chain.nonces[SENDER.lower()] = 10
+    allocator = NonceAllocator(rpc)
+    assert not allocator.release(SENDER, 10, 1) # Nothing allocated yet
+    allocator.allocate(SENDER, 3)
+    with pytest.raises(ValueError):
+        allocator.release(SENDER, 12, 2) # 13 was never handed out
+    with pytest.raises(ValueError):
+        allocator.release(SENDER, 10, 0)
+    assert allocator.release(SENDER, 10, 1)
+    with pytest.raises(ValueError):
+        allocator.release(SENDER, 10, 1) # Already released
+    assert not allocator.release(SENDER, 5, 1) # Below what the node reported: not ours to hand back
+    allocator.reset(SENDER)
+    assert not allocator.release(SENDER, 11, 1)
+    assert allocator.allocate(SENDER, 1) == 10 and allocator.node_reads == 2
+
+
+def test_gas_price_is_read_once_per_ttl(stub, rpc):
+    stub.chain.gas_price = 5
+    gas_prices = GasPriceCache(rpc, ttl=0.2)
+    threads = [threading.Thread(target=gas_prices.get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert gas_prices.fetches == 1 and gas_prices.hits == 7
+    stub.chain.gas_price = 6
+    assert gas_prices.get() == 5
+    time.sleep(0.25)
+    assert gas_prices.get() == 6
+    assert stub.rpc_calls["eth_gasPrice"] == 2
+
+
+def test_failed_signing_hands_the_block_back(stub, rpc):
+    preparer = TransactionPreparer(rpc)
+    first = preparer.prepare(KEY, RECEIVER, 1)
+    preparer._sign = lambda private_key, transactions: 1 / 0
+    with pytest.raises(ZeroDivisionError):
+        preparer.prepare_batch(KEY, [(RECEIVER, 1)] * 3)
+    del preparer._sign
+    batch = preparer.prepare_batch(KEY, [(RECEIVER, 1)] * 2)
+    assert [tx.nonce for tx in batch] == [first.nonce + 1, first.nonce + 2]
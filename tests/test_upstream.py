@@ -0,0 +1,42 @@
+import threading
+import time
+
+from golden_minni.upstream import StaleWhileRevalidate
+
+
+def test_background_refresh_error_is_returned_with_stale_hits():
+    cache = StaleWhileRevalidate(ttl=0.0, max_stale=60.0)
+    cache.put("k", 1, fetched_at=time.time() - 1)
+    failure = ConnectionError("upstream down")
+
+    def fetch():
+        raise failure
+
+    first = cache.get("k", fetch)
+    assert first.stale and first.value == 1 and first.error is None
+    for _ in range(200):
+        if cache.peek("k")[2] is not None:
+            break
+        time.sleep(0.01)
+    second = cache.get("k", fetch)
+    assert second.stale and second.value == 1
+    assert second.error is failure
+
+    cache.put("k", 2)
+    assert cache.peek("k")[2] is None # A good fetch clears the error
+
+
+def test_counters_are_exact_under_concurrency():
+    cache = StaleWhileRevalidate(ttl=60.0)
+    cache.put("k", 1)
+
+    def read():
+        for _ in range(2000):
+            cache.get("k", lambda: 1)
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.stats()["hits"] == 16000